@@ -0,0 +1,4 @@
+"""
+Benchmarks for the llmflows flow engines. The benchmarks use the deterministic
+providers in `benchmarks.mocks` and don't make any network calls.
+"""
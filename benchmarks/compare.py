@@ -0,0 +1,77 @@
+"""
+Compares two engine benchmark result files and prints the relative change of the
+throughput and memory metrics.
+
+Usage:
+    python -m benchmarks.compare baseline.json candidate.json
+"""
+
+import json
+import argparse
+from typing import Union
+
+
+def _flatten(results: dict, prefix: str = "") -> dict[str, float]:
+    flat = {}
+    for key, value in results.items():
+        path = f"{prefix}.{key}" if prefix else str(key)
+        if isinstance(value, dict):
+            flat.update(_flatten(value, path))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[path] = value
+    return flat
+
+
+def compare(baseline: dict, candidate: dict) -> dict[str, dict[str, float]]:
+    """
+    Compares the metrics of two benchmark results.
+
+    Args:
+        baseline (dict): The baseline results.
+        candidate (dict): The candidate results.
+
+    Returns:
+        dict[str, dict[str, float]]: The baseline value, candidate value and relative
+            change of every metric present in both results.
+    """
+    metrics = ("steps_per_second", "per_step_overhead_us", "peak_bytes")
+    baseline_metrics = _flatten(baseline.get("engines", {}))
+    candidate_metrics = _flatten(candidate.get("engines", {}))
+
+    comparison = {}
+    for path, old_value in baseline_metrics.items():
+        if not path.endswith(metrics) or path not in candidate_metrics:
+            continue
+        new_value = candidate_metrics[path]
+        change = (new_value - old_value) / old_value if old_value else 0.0
+        comparison[path] = {
+            "baseline": old_value,
+            "candidate": new_value,
+            "change": change,
+        }
+    return comparison
+
+
+def main(argv: Union[list[str], None] = None) -> dict[str, dict[str, float]]:
+    """Compares two result files from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n", maxsplit=1)[0])
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    args = parser.parse_args(argv)
+
+    with open(args.baseline, encoding="utf-8") as baseline_file:
+        baseline = json.load(baseline_file)
+    with open(args.candidate, encoding="utf-8") as candidate_file:
+        candidate = json.load(candidate_file)
+
+    comparison = compare(baseline, candidate)
+    for path, values in comparison.items():
+        print(
+            f"{path:<55} {values['baseline']:>14.1f} {values['candidate']:>14.1f} "
+            f"{values['change']:>+8.1%}"
+        )
+    return comparison
+
+
+if __name__ == "__main__":
+    main()
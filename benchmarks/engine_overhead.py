@@ -0,0 +1,260 @@
+"""
+Microbenchmarks for the overhead of the Flow and AsyncFlow engines.
+
+The benchmarks build flows of FlowSteps and AsyncFlowSteps backed by `MockLLM` and
+measure:
+
+- steps per second and per-step overhead of a linear chain of steps
+- scaling with the depth and the width of the flow graph
+- the cost of callbacks
+- the memory allocated by a single flow run
+
+The results are written to a JSON file that can be compared between versions with
+`python -m benchmarks.compare`.
+
+Usage:
+    python -m benchmarks.engine_overhead --output engine_overhead.json
+"""
+
+import sys
+import json
+import time
+import asyncio
+import argparse
+import platform
+import tracemalloc
+from importlib import metadata
+from typing import Callable, Union
+from llmflows.flows import Flow, AsyncFlow, FlowStep, AsyncFlowStep
+from llmflows.callbacks import BaseCallback, AsyncBaseCallback
+from llmflows.prompts import PromptTemplate
+from benchmarks.mocks import MockLLM
+
+
+def build_chain(depth: int, is_async: bool, num_callbacks: int = 0, latency=0.0):
+    """
+    Builds a linear flow where each step uses the output of the previous step.
+
+    Args:
+        depth (int): The number of steps.
+        is_async (bool): Whether to build an AsyncFlow or a Flow.
+        num_callbacks (int): The number of no-op callbacks attached to each step.
+        latency (float): The simulated LLM latency in seconds.
+
+    Returns:
+        Union[Flow, AsyncFlow]: The flow.
+    """
+    llm = MockLLM(latency=latency)
+    step_class = AsyncFlowStep if is_async else FlowStep
+    callback_class = AsyncBaseCallback if is_async else BaseCallback
+
+    steps = []
+    for i in range(depth):
+        input_key = "input" if i == 0 else f"output_{i - 1}"
+        steps.append(
+            step_class(
+                name=f"step_{i}",
+                llm=llm,
+                prompt_template=PromptTemplate(f"Process {{{input_key}}}"),
+                output_key=f"output_{i}",
+                callbacks=[callback_class() for _ in range(num_callbacks)],
+            )
+        )
+
+    for previous_step, next_step in zip(steps, steps[1:]):
+        previous_step.connect(next_step)
+
+    return AsyncFlow(steps[0]) if is_async else Flow(steps[0])
+
+
+def build_fan_out(width: int, is_async: bool, latency=0.0):
+    """
+    Builds a flow with one root step connected to `width` independent steps.
+
+    Args:
+        width (int): The number of steps after the root step.
+        is_async (bool): Whether to build an AsyncFlow or a Flow.
+        latency (float): The simulated LLM latency in seconds.
+
+    Returns:
+        Union[Flow, AsyncFlow]: The flow.
+    """
+    llm = MockLLM(latency=latency)
+    step_class = AsyncFlowStep if is_async else FlowStep
+
+    root = step_class(
+        name="root",
+        llm=llm,
+        prompt_template=PromptTemplate("Process {input}"),
+        output_key="root_output",
+    )
+    root.connect(
+        *[
+            step_class(
+                name=f"branch_{i}",
+                llm=llm,
+                prompt_template=PromptTemplate(f"Branch {i}: {{root_output}}"),
+                output_key=f"branch_output_{i}",
+            )
+            for i in range(width)
+        ]
+    )
+
+    return AsyncFlow(root) if is_async else Flow(root)
+
+
+def run_flow(flow: Union[Flow, AsyncFlow], inputs: dict[str, str]) -> dict:
+    """Runs a flow once, regardless of whether it is a Flow or an AsyncFlow."""
+    if isinstance(flow, AsyncFlow):
+        return asyncio.run(flow.start(**inputs))
+    return flow.start(**inputs)
+
+
+def time_flow(
+    flow: Union[Flow, AsyncFlow], num_steps: int, repeat: int
+) -> dict[str, float]:
+    """
+    Runs a flow repeatedly and measures its throughput.
+
+    Args:
+        flow (Union[Flow, AsyncFlow]): The flow to run.
+        num_steps (int): The number of steps in the flow.
+        repeat (int): The number of flow runs.
+
+    Returns:
+        dict[str, float]: The run time statistics.
+    """
+    inputs = {"input": "benchmark input"}
+
+    if isinstance(flow, AsyncFlow):
+
+        async def run_all():
+            start = time.perf_counter()
+            for _ in range(repeat):
+                await flow.start(**inputs)
+            return time.perf_counter() - start
+
+        elapsed = asyncio.run(run_all())
+    else:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            flow.start(**inputs)
+        elapsed = time.perf_counter() - start
+
+    total_steps = num_steps * repeat
+    return {
+        "runs": repeat,
+        "steps": total_steps,
+        "total_seconds": elapsed,
+        "runs_per_second": repeat / elapsed,
+        "steps_per_second": total_steps / elapsed,
+        "per_step_overhead_us": elapsed / total_steps * 1e6,
+    }
+
+
+def measure_memory(flow: Union[Flow, AsyncFlow]) -> dict[str, int]:
+    """
+    Measures the memory allocated while running a flow once and the memory retained
+    by its results.
+
+    Args:
+        flow (Union[Flow, AsyncFlow]): The flow to run.
+
+    Returns:
+        dict[str, int]: The peak allocated and the retained memory in bytes.
+    """
+    run_flow(flow, {"input": "warm up"})
+    tracemalloc.start()
+    try:
+        baseline, _ = tracemalloc.get_traced_memory()
+        results = run_flow(flow, {"input": "benchmark input"})
+        retained, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del results
+    return {"peak_bytes": peak - baseline, "retained_bytes": retained - baseline}
+
+
+def run_benchmarks(quick: bool = False) -> dict:
+    """
+    Runs all engine benchmarks.
+
+    Args:
+        quick (bool): Use fewer repetitions and smaller graphs.
+
+    Returns:
+        dict: The benchmark results.
+    """
+    repeat = 20 if quick else 200
+    sizes = [1, 10] if quick else [1, 10, 50, 100]
+    results: dict = {"engines": {}}
+
+    for engine, is_async in [("Flow", False), ("AsyncFlow", True)]:
+        engine_results: dict = {"depth": {}, "width": {}, "callbacks": {}}
+
+        for depth in sizes:
+            engine_results["depth"][depth] = time_flow(
+                build_chain(depth, is_async), depth, repeat
+            )
+
+        for width in sizes:
+            engine_results["width"][width] = time_flow(
+                build_fan_out(width, is_async), width + 1, repeat
+            )
+
+        for num_callbacks in [0, 1, 5]:
+            engine_results["callbacks"][num_callbacks] = time_flow(
+                build_chain(10, is_async, num_callbacks=num_callbacks), 10, repeat
+            )
+
+        engine_results["memory_per_run"] = measure_memory(build_chain(10, is_async))
+        engine_results["memory_per_run_wide"] = measure_memory(
+            build_fan_out(10, is_async)
+        )
+
+        results["engines"][engine] = engine_results
+
+    return results
+
+
+def get_environment() -> dict[str, str]:
+    """Returns information about the environment the benchmarks ran in."""
+    try:
+        version = metadata.version("llmflows")
+    except metadata.PackageNotFoundError:
+        version = "unknown"
+
+    return {
+        "llmflows_version": version,
+        "python_version": sys.version.split()[0],
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
+
+
+def main(argv: Union[list[str], None] = None, run: Callable = run_benchmarks) -> dict:
+    """Runs the benchmarks from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n", maxsplit=1)[0])
+    parser.add_argument("--output", default="engine_overhead.json")
+    parser.add_argument("--quick", action="store_true")
+    args = parser.parse_args(argv)
+
+    results = {"environment": get_environment(), **run(quick=args.quick)}
+    with open(args.output, "w", encoding="utf-8") as output_file:
+        json.dump(results, output_file, indent=2)
+
+    for engine, engine_results in results["engines"].items():
+        chain = engine_results["depth"][max(engine_results["depth"])]
+        print(
+            f"{engine}: {chain['steps_per_second']:.0f} steps/s, "
+            f"{chain['per_step_overhead_us']:.1f} us/step, "
+            f"{engine_results['memory_per_run']['peak_bytes'] / 1024:.1f} KiB peak/run"
+        )
+    print(f"Results written to {args.output}")
+
+    return results
+
+
+if __name__ == "__main__":
+    main()
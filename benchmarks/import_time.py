@@ -0,0 +1,103 @@
+"""
+Measures the cold import time of llmflows modules and checks which provider SDKs they
+import.
+
+Each module is imported in a fresh interpreter, so the measurement includes the imports
+of all its dependencies. Importing the flows package must not import any provider SDK.
+
+Usage:
+    python -m benchmarks.import_time --repeat 5 --output import_time.json
+"""
+
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+from typing import Union
+
+MODULES = [
+    "llmflows",
+    "llmflows.flows",
+    "llmflows.llms",
+    "llmflows.vectorstores",
+    "llmflows.prompts",
+    "llmflows.callbacks",
+]
+
+PROVIDER_SDKS = ["openai", "anthropic", "google.generativeai", "pinecone"]
+
+_MEASURE_SCRIPT = """
+import sys, json, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+sdks = [name for name in {sdks!r} if name in sys.modules]
+print(json.dumps({{"seconds": elapsed, "sdks": sdks}}))
+"""
+
+
+def measure_import(module: str) -> dict:
+    """
+    Imports a module in a fresh interpreter.
+
+    Args:
+        module (str): The name of the module.
+
+    Returns:
+        dict: The import time in seconds and the provider SDKs that were imported.
+    """
+    script = _MEASURE_SCRIPT.format(module=module, sdks=PROVIDER_SDKS)
+    output = subprocess.run(
+        [sys.executable, "-c", script], capture_output=True, check=True, text=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def run_benchmarks(repeat: int = 5) -> dict:
+    """
+    Measures the import time of all modules.
+
+    Args:
+        repeat (int): The number of fresh interpreters per module.
+
+    Returns:
+        dict: The median and minimum import time and the imported SDKs per module.
+    """
+    results = {}
+    for module in MODULES:
+        measurements = [measure_import(module) for _ in range(repeat)]
+        seconds = [measurement["seconds"] for measurement in measurements]
+        results[module] = {
+            "median_seconds": statistics.median(seconds),
+            "min_seconds": min(seconds),
+            "sdks": measurements[0]["sdks"],
+        }
+    return results
+
+
+def main(argv: Union[list[str], None] = None) -> dict:
+    """Runs the import time benchmark from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n", maxsplit=1)[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.repeat)
+    for module, result in results.items():
+        sdks = ", ".join(result["sdks"]) or "none"
+        print(f"{module:<25} {result['median_seconds'] * 1000:>8.1f} ms  SDKs: {sdks}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output_file:
+            json.dump(results, output_file, indent=2)
+
+    if results["llmflows.flows"]["sdks"]:
+        print("Importing llmflows.flows imports provider SDKs.")
+        sys.exit(1)
+
+    return results
+
+
+if __name__ == "__main__":
+    main()
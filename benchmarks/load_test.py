@@ -0,0 +1,475 @@
+# pylint: disable=R0903, R0913, R0917
+"""
+Load-test harness that drives a flow at a target request rate or concurrency and
+reports latency percentiles, throughput, retries and errors.
+
+A load test takes a flow factory and an input generator. The flow factory is called
+for every request, because a flow instance keeps the state of the run in progress and
+can't run multiple requests at the same time. Providers that should be shared between
+requests, e.g. to count calls, can be created once and closed over by the factory.
+
+Flows are driven either open-loop, starting requests at a fixed rate (`rps`), or
+closed-loop, keeping a fixed number of requests in flight (`concurrency`). Flows run in
+a thread pool and async flows run on an event loop.
+
+Combined with the simulated providers in `benchmarks.mocks`, load tests run fully
+offline:
+
+    python -m benchmarks.load_test --rps 20 --duration 10 --latency 0.2 \
+        --rate-limit-rate 0.02 --output load_test.json
+
+    python -m benchmarks.load_test --saturation 10 20 50 100 --async-flow
+"""
+
+import json
+import time
+import asyncio
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Union
+from llmflows.flows import Flow, AsyncFlow, FlowStep, AsyncFlowStep
+from llmflows.prompts import PromptTemplate
+from benchmarks.mocks import MockLLM, lognormal_latency, constant_latency
+
+FlowFactory = Callable[[], Union[Flow, AsyncFlow]]
+InputGenerator = Callable[[int], dict[str, Any]]
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    """
+    Returns a percentile of a list of values using linear interpolation.
+
+    Args:
+        values (list[float]): The values.
+        fraction (float): The percentile as a fraction, e.g. 0.95 for p95.
+
+    Returns:
+        float: The percentile, or 0.0 if there are no values.
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def _count_retries(results: dict) -> int:
+    retries = 0
+    for step_info in results.values():
+        call_data = step_info.get("call_data")
+        if isinstance(call_data, dict) and isinstance(call_data.get("retries"), int):
+            retries += call_data["retries"]
+    return retries
+
+
+class _RequestIds:
+    """Thread-safe source of request indices, up to an optional maximum."""
+
+    def __init__(self, max_requests: Union[int, None]):
+        self.max_requests = max_requests
+        self._next = 0
+        self._lock = threading.Lock()
+
+    def next(self) -> Union[int, None]:
+        """Returns the index of the next request, or None if the maximum is reached."""
+        with self._lock:
+            if self.max_requests is not None and self._next >= self.max_requests:
+                return None
+            self._next += 1
+            return self._next - 1
+
+
+class _Recorder:
+    """Thread-safe collection of the outcome of each request."""
+
+    def __init__(self):
+        self.latencies: list[float] = []
+        self.retries = 0
+        self.errors: dict[str, int] = {}
+        self.max_in_flight = 0
+        self._in_flight = 0
+        self._lock = threading.Lock()
+
+    def started(self) -> None:
+        """Records the start of a request."""
+        with self._lock:
+            self._in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self._in_flight)
+
+    def finished(self, latency: float, results: Union[dict, None], error=None) -> None:
+        """Records the end of a request."""
+        with self._lock:
+            self._in_flight -= 1
+            if error is not None:
+                name = error.__class__.__name__
+                self.errors[name] = self.errors.get(name, 0) + 1
+                return
+            self.latencies.append(latency)
+            self.retries += _count_retries(results)
+
+    def summary(
+        self, elapsed: float, duration: float, target_rps: Union[float, None]
+    ) -> dict:
+        """Summarizes the recorded requests."""
+        completed = len(self.latencies)
+        failed = sum(self.errors.values())
+        return {
+            "target_rps": target_rps,
+            "requests": completed + failed,
+            "completed": completed,
+            "failed": failed,
+            "errors": dict(self.errors),
+            "retries": self.retries,
+            "duration_seconds": elapsed,
+            "offered_rps": (completed + failed) / duration if duration else 0.0,
+            "throughput_rps": completed / elapsed if elapsed else 0.0,
+            "max_in_flight": self.max_in_flight,
+            "latency_seconds": {
+                "min": min(self.latencies, default=0.0),
+                "mean": sum(self.latencies) / completed if completed else 0.0,
+                "p50": percentile(self.latencies, 0.50),
+                "p95": percentile(self.latencies, 0.95),
+                "p99": percentile(self.latencies, 0.99),
+                "max": max(self.latencies, default=0.0),
+            },
+        }
+
+
+def _run_sync(
+    flow_factory: FlowFactory,
+    input_generator: InputGenerator,
+    recorder: _Recorder,
+    rps: Union[float, None],
+    concurrency: int,
+    duration: float,
+    max_requests: Union[int, None],
+) -> None:
+    deadline = time.perf_counter() + duration
+    request_ids = _RequestIds(max_requests)
+
+    def run_request(request_id: int, start: Union[float, None] = None) -> None:
+        # Open-loop latencies are measured from the scheduled start, so time spent
+        # waiting for a free worker counts (no coordinated omission).
+        recorder.started()
+        start = time.perf_counter() if start is None else start
+        try:
+            results = flow_factory().start(**input_generator(request_id))
+        except Exception as error:  # pylint: disable=broad-exception-caught
+            recorder.finished(time.perf_counter() - start, None, error)
+            return
+        recorder.finished(time.perf_counter() - start, results)
+
+    if rps:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            interval = 1 / rps
+            next_start = time.perf_counter()
+            while next_start < deadline:
+                request_id = request_ids.next()
+                if request_id is None:
+                    break
+                time.sleep(max(0.0, next_start - time.perf_counter()))
+                executor.submit(run_request, request_id, next_start)
+                next_start += interval
+        return
+
+    def worker() -> None:
+        while time.perf_counter() < deadline:
+            request_id = request_ids.next()
+            if request_id is None:
+                return
+            run_request(request_id)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for _ in range(concurrency):
+            executor.submit(worker)
+
+
+async def _run_async(
+    flow_factory: FlowFactory,
+    input_generator: InputGenerator,
+    recorder: _Recorder,
+    rps: Union[float, None],
+    concurrency: int,
+    duration: float,
+    max_requests: Union[int, None],
+) -> None:
+    deadline = time.perf_counter() + duration
+    request_ids = _RequestIds(max_requests)
+
+    async def run_request(request_id: int, start: Union[float, None] = None) -> None:
+        recorder.started()
+        start = time.perf_counter() if start is None else start
+        try:
+            results = await flow_factory().start(**input_generator(request_id))
+        except Exception as error:  # pylint: disable=broad-exception-caught
+            recorder.finished(time.perf_counter() - start, None, error)
+            return
+        recorder.finished(time.perf_counter() - start, results)
+
+    if rps:
+        tasks = []
+        interval = 1 / rps
+        next_start = time.perf_counter()
+        while next_start < deadline:
+            request_id = request_ids.next()
+            if request_id is None:
+                break
+            await asyncio.sleep(max(0.0, next_start - time.perf_counter()))
+            tasks.append(asyncio.create_task(run_request(request_id, next_start)))
+            next_start += interval
+        await asyncio.gather(*tasks)
+        return
+
+    async def worker() -> None:
+        while time.perf_counter() < deadline:
+            request_id = request_ids.next()
+            if request_id is None:
+                return
+            await run_request(request_id)
+
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+
+
+def run_load_test(
+    flow_factory: FlowFactory,
+    input_generator: InputGenerator,
+    rps: Union[float, None] = None,
+    concurrency: int = 10,
+    duration: float = 10.0,
+    max_requests: Union[int, None] = None,
+) -> dict:
+    """
+    Drives a flow with a fixed request rate or a fixed concurrency.
+
+    In open-loop mode, the latency of a request is measured from the time it was
+    scheduled to start, so requests queued behind busy workers or a blocked event loop
+    are not reported faster than they were.
+
+    Args:
+        flow_factory (Callable[[], Union[Flow, AsyncFlow]]): Returns a new flow for
+            each request.
+        input_generator (Callable[[int], dict[str, Any]]): Returns the inputs of the
+            request with the given index.
+        rps (Union[float, None]): The target number of requests started per second. If
+            None, `concurrency` requests are kept in flight instead.
+        concurrency (int): The number of concurrent requests in closed-loop mode, or
+            the number of worker threads for sync flows in open-loop mode.
+        duration (float): How long to start new requests for, in seconds. Requests in
+            flight at the end are awaited.
+        max_requests (Union[int, None]): Optional maximum number of requests.
+
+    Returns:
+        dict: The request counts, errors, retries, throughput and latency percentiles.
+
+    Raises:
+        ValueError: If neither a positive rps nor a positive concurrency is given.
+    """
+    if not rps and concurrency < 1:
+        raise ValueError("Either rps or concurrency must be positive.")
+
+    is_async = isinstance(flow_factory(), AsyncFlow)
+    recorder = _Recorder()
+    args = (flow_factory, input_generator, recorder, rps, concurrency)
+
+    start = time.perf_counter()
+    if is_async:
+        asyncio.run(_run_async(*args, duration, max_requests))
+    else:
+        _run_sync(*args, duration, max_requests)
+    elapsed = time.perf_counter() - start
+
+    summary = recorder.summary(elapsed, min(duration, elapsed), rps)
+    summary["mode"] = "open-loop" if rps else "closed-loop"
+    summary["engine"] = "AsyncFlow" if is_async else "Flow"
+    if not rps:
+        summary["concurrency"] = concurrency
+    return summary
+
+
+def find_saturation(
+    flow_factory: FlowFactory,
+    input_generator: InputGenerator,
+    rps_levels: list[float],
+    duration: float = 10.0,
+    concurrency: int = 64,
+    max_p95: Union[float, None] = None,
+    min_throughput_ratio: float = 0.9,
+) -> dict:
+    """
+    Runs load tests at increasing request rates and finds the rate at which the flow
+    saturates.
+
+    A level is saturated if the achieved throughput is below `min_throughput_ratio` of
+    the target rate, if the p95 latency exceeds `max_p95` or if any request failed.
+
+    Args:
+        flow_factory (Callable[[], Union[Flow, AsyncFlow]]): Returns a new flow for
+            each request.
+        input_generator (Callable[[int], dict[str, Any]]): Returns the inputs of the
+            request with the given index.
+        rps_levels (list[float]): The request rates to test.
+        duration (float): The duration of each level in seconds.
+        concurrency (int): The number of worker threads for sync flows.
+        max_p95 (Union[float, None]): Optional p95 latency objective in seconds.
+        min_throughput_ratio (float): The minimum achieved fraction of the target rate.
+
+    Returns:
+        dict: The results of each level, the highest sustainable rate and the first
+            saturated rate (None if no level saturated).
+    """
+    levels = []
+    max_sustainable = None
+    saturation_rps = None
+
+    for rps in sorted(rps_levels):
+        result = run_load_test(
+            flow_factory,
+            input_generator,
+            rps=rps,
+            concurrency=concurrency,
+            duration=duration,
+        )
+        saturated = (
+            result["failed"] > 0
+            or result["throughput_rps"] < rps * min_throughput_ratio
+            or (max_p95 is not None and result["latency_seconds"]["p95"] > max_p95)
+        )
+        result["saturated"] = saturated
+        levels.append(result)
+
+        if saturated:
+            saturation_rps = rps
+            break
+        max_sustainable = rps
+
+    return {
+        "levels": levels,
+        "max_sustainable_rps": max_sustainable,
+        "saturation_rps": saturation_rps,
+    }
+
+
+def build_demo_flow_factory(
+    is_async: bool,
+    num_steps: int = 3,
+    latency: Union[float, Callable[[], float]] = 0.2,
+    **simulation,
+) -> FlowFactory:
+    """
+    Returns a factory for a linear flow of steps backed by one shared `MockLLM`.
+
+    Args:
+        is_async (bool): Whether to build AsyncFlows or Flows.
+        num_steps (int): The number of steps in the flow.
+        latency (Union[float, Callable[[], float]]): The simulated LLM latency.
+        **simulation: Error simulation settings passed to `MockLLM`.
+
+    Returns:
+        Callable[[], Union[Flow, AsyncFlow]]: The flow factory.
+    """
+    llm = MockLLM(latency=latency, **simulation)
+    step_class = AsyncFlowStep if is_async else FlowStep
+    flow_class = AsyncFlow if is_async else Flow
+
+    def flow_factory() -> Union[Flow, AsyncFlow]:
+        steps = [
+            step_class(
+                name=f"step_{i}",
+                llm=llm,
+                prompt_template=PromptTemplate(
+                    "Answer {question}" if i == 0 else f"Refine {{answer_{i - 1}}}"
+                ),
+                output_key=f"answer_{i}",
+            )
+            for i in range(num_steps)
+        ]
+        for previous_step, next_step in zip(steps, steps[1:]):
+            previous_step.connect(next_step)
+        return flow_class(steps[0])
+
+    return flow_factory
+
+
+def main(argv: Union[list[str], None] = None) -> dict:
+    """Runs a load test of a simulated flow from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n", maxsplit=1)[0])
+    parser.add_argument("--rps", type=float, default=None)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--steps", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--latency-sigma", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--server-error-rate", type=float, default=0.0)
+    parser.add_argument("--max-retries", type=int, default=3)
+    parser.add_argument("--async-flow", action="store_true")
+    parser.add_argument("--saturation", type=float, nargs="+", default=None)
+    parser.add_argument("--max-p95", type=float, default=None)
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args(argv)
+
+    if args.latency_sigma:
+        latency = lognormal_latency(args.latency, args.latency_sigma)
+    else:
+        latency = constant_latency(args.latency)
+
+    flow_factory = build_demo_flow_factory(
+        args.async_flow,
+        num_steps=args.steps,
+        latency=latency,
+        rate_limit_rate=args.rate_limit_rate,
+        server_error_rate=args.server_error_rate,
+        max_retries=args.max_retries,
+    )
+
+    def input_generator(request_id: int) -> dict[str, Any]:
+        return {"question": f"question {request_id}"}
+
+    if args.saturation:
+        results = find_saturation(
+            flow_factory,
+            input_generator,
+            args.saturation,
+            duration=args.duration,
+            concurrency=max(args.concurrency, 64),
+            max_p95=args.max_p95,
+        )
+        for level in results["levels"]:
+            _print_summary(level)
+        print(
+            f"Max sustainable rps: {results['max_sustainable_rps']}, "
+            f"saturation rps: {results['saturation_rps']}"
+        )
+    else:
+        results = run_load_test(
+            flow_factory,
+            input_generator,
+            rps=args.rps,
+            concurrency=args.concurrency,
+            duration=args.duration,
+        )
+        _print_summary(results)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output_file:
+            json.dump(results, output_file, indent=2)
+
+    return results
+
+
+def _print_summary(result: dict) -> None:
+    latency = result["latency_seconds"]
+    target = f"{result['target_rps']} rps" if result["target_rps"] else "closed-loop"
+    print(
+        f"{result['engine']} @ {target}: {result['throughput_rps']:.1f} rps, "
+        f"p50 {latency['p50'] * 1000:.0f} ms, p95 {latency['p95'] * 1000:.0f} ms, "
+        f"p99 {latency['p99'] * 1000:.0f} ms, {result['retries']} retries, "
+        f"{result['failed']} failed"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,338 @@
+# pylint: disable=R0903, R0913, W0221
+"""
+Deterministic stand-ins for the LLM, chat LLM, embeddings and vector store classes.
+
+The mocks don't make network calls. Each of them can simulate provider latency, so
+benchmarks can measure the overhead of the flow engines in isolation (zero latency) or
+under realistic conditions (e.g. 200ms per call). The mocks can also fail a fraction of
+their calls with simulated rate limit (429) and server (5xx) errors, which are retried
+with the same retry logic the real providers use.
+"""
+
+import math
+import time
+import random
+import asyncio
+import hashlib
+from typing import Callable, Union
+from llmflows.llms.llm import BaseLLM
+from llmflows.llms.chat_llm import BaseChatLLM
+from llmflows.llms.embeddings import BaseEmbeddings
+from llmflows.llms.message_history import MessageHistory
+from llmflows.llms.llm_utils import call_with_retry, async_call_with_retry
+from llmflows.vectorstores.vector_doc import VectorDoc
+from llmflows.vectorstores.vector_store import VectorStore
+
+Latency = Union[float, Callable[[], float]]
+
+
+def constant_latency(seconds: float) -> Callable[[], float]:
+    """Returns a latency function that always returns the same latency."""
+    return lambda: seconds
+
+
+def uniform_latency(low: float, high: float, seed: int = 0) -> Callable[[], float]:
+    """Returns a latency function that samples latencies uniformly from a range."""
+    rng = random.Random(seed)
+    return lambda: rng.uniform(low, high)
+
+
+def lognormal_latency(
+    median: float, sigma: float = 0.5, seed: int = 0
+) -> Callable[[], float]:
+    """
+    Returns a latency function with a log-normal distribution, which is a good
+    approximation of LLM API latencies with a long tail.
+    """
+    rng = random.Random(seed)
+    mu = math.log(median)
+    return lambda: rng.lognormvariate(mu, sigma)
+
+
+class SimulatedProviderError(Exception):
+    """
+    Base class for the errors raised by the mock providers.
+
+    Args:
+        status_code (int): The simulated HTTP status code.
+    """
+
+    def __init__(self, status_code: int):
+        super().__init__(f"Simulated provider error (HTTP {status_code})")
+        self.status_code = status_code
+
+
+class SimulatedRateLimitError(SimulatedProviderError):
+    """Simulated 429 Too Many Requests error."""
+
+    def __init__(self):
+        super().__init__(429)
+
+
+class SimulatedServerError(SimulatedProviderError):
+    """Simulated 5xx server error."""
+
+    def __init__(self, status_code: int = 503):
+        super().__init__(status_code)
+
+
+RETRYABLE_ERRORS = (SimulatedRateLimitError, SimulatedServerError)
+
+
+class _SimulatedProvider:
+    """Shared latency and error handling for all mock providers."""
+
+    def __init__(
+        self,
+        latency: Latency = 0.0,
+        rate_limit_rate: float = 0.0,
+        server_error_rate: float = 0.0,
+        max_retries: int = 3,
+        seed: int = 0,
+    ):
+        self.latency = latency
+        self.rate_limit_rate = rate_limit_rate
+        self.server_error_rate = server_error_rate
+        self.max_retries = max_retries
+        self.calls = 0
+        self.errors = 0
+        self._rng = random.Random(seed)
+
+    def _get_latency(self) -> float:
+        self.calls += 1
+        return self.latency() if callable(self.latency) else self.latency
+
+    def _maybe_fail(self) -> None:
+        if not self.rate_limit_rate and not self.server_error_rate:
+            return
+        sample = self._rng.random()
+        if sample < self.rate_limit_rate:
+            self.errors += 1
+            raise SimulatedRateLimitError()
+        if sample < self.rate_limit_rate + self.server_error_rate:
+            self.errors += 1
+            raise SimulatedServerError()
+
+    def _wait(self) -> None:
+        latency = self._get_latency()
+        if latency > 0:
+            time.sleep(latency)
+        self._maybe_fail()
+
+    async def _wait_async(self) -> None:
+        latency = self._get_latency()
+        if latency > 0:
+            await asyncio.sleep(latency)
+        self._maybe_fail()
+
+    def _call(self) -> int:
+        """Simulates a provider call with retries and returns the number of retries."""
+        _, retries = call_with_retry(self._wait, RETRYABLE_ERRORS, self.max_retries)
+        return retries
+
+    async def _call_async(self) -> int:
+        """Async version of `_call`."""
+        _, retries = await async_call_with_retry(
+            self._wait_async, RETRYABLE_ERRORS, self.max_retries
+        )
+        return retries
+
+
+def _usage(prompt: str, completion: str) -> dict[str, int]:
+    prompt_tokens = len(prompt) // 4 + 1
+    completion_tokens = len(completion) // 4 + 1
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens,
+    }
+
+
+class MockLLM(BaseLLM, _SimulatedProvider):
+    """
+    Deterministic completion LLM.
+
+    Args:
+        model (str): The model name reported in the model configuration.
+        response (Union[str, Callable[[str], str]]): The generated text or a function
+            that computes it from the prompt.
+        latency (Union[float, Callable[[], float]]): Simulated latency in seconds.
+        **simulation: Optional error simulation settings: `rate_limit_rate` and
+            `server_error_rate` (fractions of failed calls), `max_retries` and `seed`.
+    """
+
+    def __init__(
+        self,
+        model: str = "mock-llm",
+        response: Union[str, Callable[[str], str]] = "mock response",
+        latency: Latency = 0.0,
+        **simulation,
+    ):
+        BaseLLM.__init__(self, model)
+        _SimulatedProvider.__init__(self, latency, **simulation)
+        self.response = response
+
+    def _format_results(self, prompt: str, retries: int) -> tuple[str, dict, dict]:
+        text = self.response(prompt) if callable(self.response) else self.response
+        call_data = {"raw_outputs": {"usage": _usage(prompt, text)}, "retries": retries}
+        model_config = {"model_name": self.model}
+        return text, call_data, model_config
+
+    def generate(self, prompt: str) -> tuple[str, dict, dict]:
+        return self._format_results(prompt, self._call())
+
+    async def generate_async(self, prompt: str) -> tuple[str, dict, dict]:
+        return self._format_results(prompt, await self._call_async())
+
+
+class MockChatLLM(BaseChatLLM, _SimulatedProvider):
+    """
+    Deterministic chat LLM.
+
+    Args:
+        model (str): The model name reported in the model configuration.
+        response (Union[str, Callable[[MessageHistory], str]]): The generated message
+            or a function that computes it from the message history.
+        latency (Union[float, Callable[[], float]]): Simulated latency in seconds.
+        **simulation: Optional error simulation settings: `rate_limit_rate` and
+            `server_error_rate` (fractions of failed calls), `max_retries` and `seed`.
+    """
+
+    def __init__(
+        self,
+        model: str = "mock-chat-llm",
+        response: Union[str, Callable[[MessageHistory], str]] = "mock response",
+        latency: Latency = 0.0,
+        **simulation,
+    ):
+        BaseChatLLM.__init__(self, model)
+        _SimulatedProvider.__init__(self, latency, **simulation)
+        self.response = response
+
+    def _format_results(
+        self, message_history: MessageHistory, retries: int
+    ) -> tuple[str, dict, dict]:
+        if callable(self.response):
+            text = self.response(message_history)
+        else:
+            text = self.response
+        prompt = message_history.get_conversation_string()
+        call_data = {"raw_outputs": {"usage": _usage(prompt, text)}, "retries": retries}
+        model_config = {"model_name": self.model, "messages": message_history.messages}
+        return text, call_data, model_config
+
+    def generate(self, message_history: MessageHistory) -> tuple[str, dict, dict]:
+        return self._format_results(message_history, self._call())
+
+    async def generate_async(
+        self, message_history: MessageHistory
+    ) -> tuple[str, dict, dict]:
+        return self._format_results(message_history, await self._call_async())
+
+
+def deterministic_embedding(text: str, dimension: int) -> list[float]:
+    """
+    Returns a pseudo-random unit vector derived from the hash of a text, so equal texts
+    always get equal embeddings.
+    """
+    seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "big")
+    rng = random.Random(seed)
+    vector = [rng.gauss(0, 1) for _ in range(dimension)]
+    norm = sum(value * value for value in vector) ** 0.5
+    return [value / norm for value in vector]
+
+
+class MockEmbeddings(BaseEmbeddings, _SimulatedProvider):
+    """
+    Deterministic embeddings model.
+
+    Args:
+        model (str): The model name.
+        dimension (int): The dimension of the generated embeddings.
+        latency (Union[float, Callable[[], float]]): Simulated latency in seconds per
+            call, regardless of the number of documents.
+        **simulation: Optional error simulation settings: `rate_limit_rate` and
+            `server_error_rate` (fractions of failed calls), `max_retries` and `seed`.
+    """
+
+    def __init__(
+        self,
+        model: str = "mock-embeddings",
+        dimension: int = 16,
+        latency: Latency = 0.0,
+        **simulation,
+    ):
+        BaseEmbeddings.__init__(self, model)
+        _SimulatedProvider.__init__(self, latency, **simulation)
+        self.dimension = dimension
+
+    def _embed(
+        self, docs: Union[VectorDoc, list[VectorDoc]]
+    ) -> Union[VectorDoc, list[VectorDoc]]:
+        doc_list = docs if isinstance(docs, list) else [docs]
+        for doc in doc_list:
+            doc.embedding = deterministic_embedding(doc.doc, self.dimension)
+        return docs
+
+    def generate(
+        self, docs: Union[VectorDoc, list[VectorDoc]]
+    ) -> Union[VectorDoc, list[VectorDoc]]:
+        self._call()
+        return self._embed(docs)
+
+    async def generate_async(
+        self, docs: Union[VectorDoc, list[VectorDoc]]
+    ) -> Union[VectorDoc, list[VectorDoc]]:
+        await self._call_async()
+        return self._embed(docs)
+
+
+class MockVectorStore(VectorStore, _SimulatedProvider):
+    """
+    In-memory vector store that searches by brute-force dot product and returns
+    results in the same format as the Pinecone vector store.
+
+    Args:
+        latency (Union[float, Callable[[], float]]): Simulated latency in seconds.
+        **simulation: Optional error simulation settings: `rate_limit_rate` and
+            `server_error_rate` (fractions of failed calls), `max_retries` and `seed`.
+    """
+
+    def __init__(self, latency: Latency = 0.0, **simulation):
+        VectorStore.__init__(self, "mock-index", "mock-api-key", "mock-region")
+        _SimulatedProvider.__init__(self, latency, **simulation)
+        self.docs: dict[str, VectorDoc] = {}
+
+    def describe(self) -> None:
+        print({"index": self.storage_entity, "total_vector_count": len(self.docs)})
+
+    def _search(self, query: VectorDoc, top_k: int) -> tuple[list, dict, dict]:
+        query_embedding = query.embedding
+        scored = sorted(
+            (
+                (sum(a * b for a, b in zip(query_embedding, doc.embedding)), doc)
+                for doc in self.docs.values()
+            ),
+            key=lambda item: item[0],
+            reverse=True,
+        )[:top_k]
+        matches = [
+            {
+                "id": doc.doc_id,
+                "score": score,
+                "metadata": {**doc.metadata, "text": doc.doc},
+            }
+            for score, doc in scored
+        ]
+        call_data = {"raw_outputs": {"matches": matches}}
+        config = {"environment": self.region, "index_name": self.storage_entity}
+        return matches, call_data, config
+
+    def search(self, query: VectorDoc, top_k: int) -> tuple[list, dict, dict]:
+        self._call()
+        return self._search(query, top_k)
+
+    def upsert(self, docs: list[VectorDoc]) -> None:
+        self._call()
+        for doc in docs:
+            self.docs[doc.doc_id] = doc
@@ -1,6 +1,6 @@
 # pylint: skip-file
 import os
-from llmflows.flows import Flow, ChatFlowStep, FunctionalFlowStep
+from llmflows.flows import Flow, ChatFlowStep, FunctionalFlowStep, LoopFlowStep
 from llmflows.llms import OpenAIChat, MessageHistory
 from prompts import system_prompt, react_prompt_template
 from tools import tool_selector
@@ -30,24 +30,33 @@ observation = FunctionalFlowStep(
 # Connect flowsteps
 thought_action.connect(observation)
 
-# Create the flow
-react_agent_flow = Flow(thought_action)
+# Create the flow of a single thought, action and observation
+react_iteration_flow = Flow(thought_action)
+
+
+def is_final_answer(observation):
+    return observation == "<final_answer>"
+
+
+def add_to_history(react_history, thought_action, observation):
+    # add the thought, action and observations from this iteration to the history
+    return {"react_history": react_history + thought_action + observation + "\n"}
+
+
+# Run the thought, action and observation steps until the agent has an answer
+react_agent = LoopFlowStep(
+    name="ReAct Agent",
+    flow=react_iteration_flow,
+    result_key="thought_action",
+    output_key="answer",
+    stop_fn=is_final_answer,
+    carry_fn=add_to_history,
+    initial_state={"react_history": ""},
+    max_iterations=5,
+)
+
+react_agent_flow = Flow(react_agent)
 
 problem = "What is the age difference between Barak Obama and Michelle Obama?"
-max_steps = 5
-react_history = ""
-
-for i in range(max_steps):
-    result = react_agent_flow.start(
-        question=problem, react_history=react_history, verbose=True
-    )
-
-    if result["Observation Step"]["generated"] == "<final_answer>":
-        break
-    else:
-        # add the thought, action and observations from this flow to the history
-        react_history += (
-            result["Thought + Action Step"]["generated"]
-            + result["Observation Step"]["generated"]
-            + "\n"
-        )
+result = react_agent_flow.start(question=problem, verbose=True)
+print(result["ReAct Agent"]["result"]["answer"])
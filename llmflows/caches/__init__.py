@@ -0,0 +1,2 @@
+# pylint: disable=missing-module-docstring
+from .step_cache import BaseStepCache, InMemoryStepCache, get_cache_key
@@ -0,0 +1,167 @@
+"""
+This module contains the step caches used to memoize the results of flow steps.
+
+A step cache maps a key, computed from the identity of a flow step and its resolved
+inputs, to the result, call data and configuration produced by the step. When a step
+with a cache runs with inputs it has already seen, the stored values are returned and
+the step's `generate` method is skipped.
+"""
+
+import json
+import time
+import hashlib
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Union
+
+
+def get_cache_key(step: Any, inputs: dict[str, Any]) -> str:
+    """
+    Computes the cache key of a flow step run.
+
+    The key is a hash of the step's class, name and output key, its prompt template and
+    language model configuration (model, temperature and max tokens) if it has them,
+    the module and qualified name of the function of functional flow steps, and the
+    vector store, embeddings model and search parameters of vector store flow steps,
+    together with the exact inputs the step receives. Changing the prompt, the model,
+    the function or the search of a step therefore doesn't return results cached with
+    the old ones.
+
+    Args:
+        step (Any): The flow step.
+        inputs (dict[str, Any]): The resolved inputs of the step.
+
+    Returns:
+        str: The cache key.
+    """
+    key_data = {
+        "class": step.__class__.__name__,
+        "name": step.name,
+        "output_key": step.output_key,
+        "inputs": inputs,
+    }
+    prompt_template = getattr(step, "prompt_template", None)
+    if prompt_template is not None:
+        key_data["prompt"] = prompt_template.prompt
+    llm = getattr(step, "llm", None)
+    if llm is not None:
+        key_data["llm"] = {
+            "class": llm.__class__.__name__,
+            "model": getattr(llm, "model", None),
+            "temperature": getattr(llm, "temperature", None),
+            "max_tokens": getattr(llm, "max_tokens", None),
+        }
+    flowstep_fn = getattr(step, "flowstep_fn", None)
+    if flowstep_fn is not None:
+        key_data["function"] = (
+            f"{getattr(flowstep_fn, '__module__', None)}."
+            f"{getattr(flowstep_fn, '__qualname__', type(flowstep_fn).__qualname__)}"
+        )
+    vector_store = getattr(step, "vector_store", None)
+    if vector_store is not None:
+        key_data["search"] = {
+            "vector_store": vector_store.__class__.__name__,
+            "storage_entity": getattr(vector_store, "storage_entity", None),
+            "embeddings": getattr(step.embeddings_model, "model", None),
+            "top_k": step.top_k,
+            "append_top_k": step.append_top_k,
+            "list_output": step.list_output,
+        }
+    serialized = json.dumps(key_data, sort_keys=True, default=str)
+    return hashlib.sha256(serialized.encode("utf-8")).hexdigest()
+
+
+class BaseStepCache(ABC):
+    """
+    Base class for all step caches. Each cache storage should extend this class.
+    """
+
+    @abstractmethod
+    def get(self, key: str) -> Union[tuple[Any, Any, Any], None]:
+        """
+        Returns the cached values for a key.
+
+        Args:
+            key (str): The cache key.
+
+        Returns:
+            Union[tuple[Any, Any, Any], None]: The cached result, call data and
+                configuration, or None if the key is not in the cache.
+        """
+
+    @abstractmethod
+    def set(self, key: str, value: tuple[Any, Any, Any]) -> None:
+        """
+        Stores values in the cache.
+
+        Args:
+            key (str): The cache key.
+            value (tuple[Any, Any, Any]): The result, call data and configuration of
+                the step.
+        """
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Removes all entries from the cache."""
+
+
+class InMemoryStepCache(BaseStepCache):
+    """
+    A thread-safe in-memory step cache with LRU and optional TTL eviction.
+
+    Args:
+        max_size (int): The maximum number of entries in the cache.
+        ttl (Union[float, None]): Optional time in seconds after which an entry
+            expires.
+
+    Attributes:
+        max_size (int): The maximum number of entries in the cache.
+        ttl (Union[float, None]): Time in seconds after which an entry expires.
+        hits (int): The number of cache hits.
+        misses (int): The number of cache misses.
+    """
+
+    def __init__(self, max_size: int = 1024, ttl: Union[float, None] = None):
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[
+            str, tuple[float, tuple[Any, Any, Any]]
+        ] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Union[tuple[Any, Any, Any], None]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            stored_at, value = entry
+            if self.ttl is not None and time.monotonic() - stored_at > self.ttl:
+                del self._entries[key]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: str, value: tuple[Any, Any, Any]) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
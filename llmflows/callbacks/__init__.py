@@ -3,3 +3,4 @@ from .base_callback import BaseCallback
 from .functional_callback import FunctionalCallback
 from .async_base_callback import AsyncBaseCallback
 from .async_functional_callback import AsyncFunctionalCallback
+from .callback_dispatcher import CallbackDispatcher, AsyncCallbackDispatcher
@@ -0,0 +1,332 @@
+# pylint: disable=R0902
+"""
+This module provides the CallbackDispatcher and AsyncCallbackDispatcher classes, which
+run flow step callbacks in the background instead of on the critical path of the flow.
+
+A flow step with a dispatcher only pushes its callback events onto a bounded queue.
+Worker threads (for callbacks) or worker tasks (for async callbacks) take the events
+from the queue and invoke the callbacks. When the queue is full, events are either
+dropped or the flow step waits for free space, depending on the `when_full` policy.
+Call `flush` to wait for all queued events, e.g. before the process exits.
+"""
+
+import queue
+import asyncio
+import logging
+import threading
+from typing import Any, Union
+from llmflows.tracing.tracer import start_span
+
+BLOCK = "block"
+DROP = "drop"
+
+
+def _validate_policy(when_full: str) -> str:
+    if when_full not in (BLOCK, DROP):
+        raise ValueError("when_full must be either 'block' or 'drop'.")
+    return when_full
+
+
+def _log_error(callback: Any, event: str, error: Exception) -> None:
+    logging.error("Callback %s.%s failed: %s", callback.__class__.__name__, event, error)
+
+
+class CallbackDispatcher:
+    """
+    Dispatches the events of callbacks to background worker threads.
+
+    Events are processed in the order they were dispatched if there is only one worker.
+    With multiple workers, the events of different flow steps run in parallel and the
+    events of a single callback may run out of order.
+
+    Args:
+        max_queue_size (int): The maximum number of queued events.
+        num_workers (int): The number of worker threads.
+        when_full (str): "block" to wait for free space when the queue is full, or
+            "drop" to discard the event.
+
+    Attributes:
+        dropped (int): The number of events discarded because the queue was full.
+        failed (int): The number of events whose callback raised an exception.
+    """
+
+    def __init__(
+        self, max_queue_size: int = 1000, num_workers: int = 1, when_full: str = BLOCK
+    ):
+        if num_workers < 1:
+            raise ValueError("num_workers must be at least 1.")
+        self.max_queue_size = max_queue_size
+        self.num_workers = num_workers
+        self.when_full = _validate_policy(when_full)
+        self.dropped = 0
+        self.failed = 0
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue_size)
+        self._workers: list[threading.Thread] = []
+        self._lock = threading.Lock()
+        self._dispatched = threading.Condition(self._lock)
+        self._dispatching = 0
+        self._closed = False
+
+    def _start_workers(self) -> None:
+        with self._lock:
+            if self._workers:
+                return
+            for i in range(self.num_workers):
+                worker = threading.Thread(
+                    target=self._work, name=f"llmflows-callbacks-{i}", daemon=True
+                )
+                worker.start()
+                self._workers.append(worker)
+
+    def _work(self) -> None:
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                callback, event, payload = item
+                with start_span(
+                    event,
+                    "callback",
+                    callback=callback.__class__.__name__,
+                    background=True,
+                ):
+                    getattr(callback, event)(payload)
+            except Exception as error:  # pylint: disable=broad-exception-caught
+                with self._lock:
+                    self.failed += 1
+                _log_error(callback, event, error)
+                try:
+                    callback.on_error(error)
+                except Exception:  # pylint: disable=broad-exception-caught
+                    logging.exception("Callback error handler failed.")
+            finally:
+                self._queue.task_done()
+
+    def dispatch(self, callback: Any, event: str, payload: Any) -> bool:
+        """
+        Queues a callback event.
+
+        Args:
+            callback (BaseCallback): The callback.
+            event (str): The callback method, e.g. "on_end".
+            payload (Any): The argument of the callback method.
+
+        Returns:
+            bool: True if the event was queued, False if it was dropped.
+
+        Raises:
+            RuntimeError: If the dispatcher was shut down.
+        """
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("The callback dispatcher was shut down.")
+            # Shutting down waits for the dispatch calls in progress.
+            self._dispatching += 1
+
+        try:
+            if not self._workers:
+                self._start_workers()
+            self._queue.put((callback, event, payload), block=self.when_full == BLOCK)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            return False
+        finally:
+            with self._lock:
+                self._dispatching -= 1
+                self._dispatched.notify_all()
+        return True
+
+    @property
+    def pending(self) -> int:
+        """The number of queued events that have not been processed yet."""
+        return self._queue.unfinished_tasks
+
+    def flush(self, timeout: Union[float, None] = None) -> bool:
+        """
+        Waits until all queued events have been processed.
+
+        Args:
+            timeout (Union[float, None]): The maximum time to wait in seconds.
+
+        Returns:
+            bool: True if all events were processed, False if the timeout expired.
+        """
+        if timeout is None:
+            self._queue.join()
+            return True
+
+        flushed = threading.Event()
+
+        def wait() -> None:
+            self._queue.join()
+            flushed.set()
+
+        threading.Thread(target=wait, daemon=True).start()
+        return flushed.wait(timeout)
+
+    def shutdown(self, flush: bool = True) -> None:
+        """
+        Stops the worker threads. New events are rejected, and the events of dispatch
+        calls in progress are queued before the queue is drained.
+
+        Args:
+            flush (bool): Process the queued events before stopping. Otherwise the
+                queued events are discarded.
+        """
+        with self._lock:
+            self._closed = True
+            self._dispatched.wait_for(lambda: not self._dispatching)
+
+        if not flush:
+            while True:
+                try:
+                    self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                self._queue.task_done()
+                with self._lock:
+                    self.dropped += 1
+
+        for _ in self._workers:
+            self._queue.put(None)
+        for worker in self._workers:
+            worker.join()
+        self._workers = []
+
+
+class AsyncCallbackDispatcher:
+    """
+    Dispatches the events of async callbacks to background asyncio tasks.
+
+    The worker tasks run concurrently, so the events of different callbacks don't wait
+    for each other. The workers run on the event loop of the flow; call `flush` before
+    the event loop is closed, otherwise queued events are lost.
+
+    Args:
+        max_queue_size (int): The maximum number of queued events.
+        num_workers (int): The number of worker tasks.
+        when_full (str): "block" to wait for free space when the queue is full, or
+            "drop" to discard the event.
+
+    Attributes:
+        dropped (int): The number of events discarded because the queue was full.
+        failed (int): The number of events whose callback raised an exception.
+    """
+
+    def __init__(
+        self, max_queue_size: int = 1000, num_workers: int = 8, when_full: str = BLOCK
+    ):
+        if num_workers < 1:
+            raise ValueError("num_workers must be at least 1.")
+        self.max_queue_size = max_queue_size
+        self.num_workers = num_workers
+        self.when_full = _validate_policy(when_full)
+        self.dropped = 0
+        self.failed = 0
+        self._queue: Union[asyncio.Queue, None] = None
+        self._workers: list[asyncio.Task] = []
+        self._loop = None
+
+    def _get_queue(self) -> asyncio.Queue:
+        loop = asyncio.get_running_loop()
+        if self._queue is None or self._loop is not loop:
+            # The dispatcher is used on a new event loop, e.g. by a new asyncio.run.
+            self._loop = loop
+            self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+            self._workers = [
+                loop.create_task(self._work(self._queue))
+                for _ in range(self.num_workers)
+            ]
+        return self._queue
+
+    async def _work(self, event_queue: asyncio.Queue) -> None:
+        while True:
+            callback, event, payload = await event_queue.get()
+            try:
+                with start_span(
+                    event,
+                    "callback",
+                    callback=callback.__class__.__name__,
+                    background=True,
+                ):
+                    await getattr(callback, event)(payload)
+            except Exception as error:  # pylint: disable=broad-exception-caught
+                self.failed += 1
+                _log_error(callback, event, error)
+                try:
+                    await callback.on_error(error)
+                except Exception:  # pylint: disable=broad-exception-caught
+                    logging.exception("Callback error handler failed.")
+            finally:
+                event_queue.task_done()
+
+    async def dispatch(self, callback: Any, event: str, payload: Any) -> bool:
+        """
+        Queues an async callback event.
+
+        Args:
+            callback (AsyncBaseCallback): The async callback.
+            event (str): The callback method, e.g. "on_end".
+            payload (Any): The argument of the callback method.
+
+        Returns:
+            bool: True if the event was queued, False if it was dropped.
+        """
+        event_queue = self._get_queue()
+        if self.when_full == BLOCK:
+            await event_queue.put((callback, event, payload))
+            return True
+
+        try:
+            event_queue.put_nowait((callback, event, payload))
+        except asyncio.QueueFull:
+            self.dropped += 1
+            return False
+        return True
+
+    @property
+    def pending(self) -> int:
+        """The number of queued events that have not been processed yet."""
+        if self._queue is None:
+            return 0
+        return self._queue._unfinished_tasks  # pylint: disable=protected-access
+
+    async def flush(self, timeout: Union[float, None] = None) -> bool:
+        """
+        Waits until all queued events have been processed.
+
+        Args:
+            timeout (Union[float, None]): The maximum time to wait in seconds.
+
+        Returns:
+            bool: True if all events were processed, False if the timeout expired.
+        """
+        if self._queue is None or self._loop is not asyncio.get_running_loop():
+            return True
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    async def shutdown(self, flush: bool = True) -> None:
+        """
+        Stops the worker tasks.
+
+        Args:
+            flush (bool): Process the queued events before stopping. Otherwise the
+                queued events are discarded.
+        """
+        if flush:
+            await self.flush()
+        elif self._queue is not None:
+            self.dropped += self._queue.qsize()
+
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._queue = None
+        self._loop = None
@@ -0,0 +1,7 @@
+# pylint: disable=missing-module-docstring
+from .checkpoint_store import (
+    BaseCheckpointStore,
+    InMemoryCheckpointStore,
+    FileCheckpointStore,
+    SQLiteCheckpointStore,
+)
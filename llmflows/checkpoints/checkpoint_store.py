@@ -0,0 +1,230 @@
+"""
+This module contains the checkpoint stores used to persist the progress of flow runs.
+
+A flow with a checkpoint store saves the inputs of every run and the execution info of
+every completed flow step. If a run fails, `resume` continues the run from the failed
+flow step and reuses the results of the flow steps that already completed, so their
+language model calls are not paid for twice.
+"""
+
+import os
+import json
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from typing import Any
+
+
+def _dumps(value: Any) -> str:
+    try:
+        return json.dumps(value)
+    except TypeError as error:
+        raise TypeError(f"The checkpoint is not JSON serializable: {error}") from error
+
+
+class BaseCheckpointStore(ABC):
+    """
+    Base class for all checkpoint stores. A checkpoint store keeps the inputs and the
+    completed flow steps of many flow runs, each identified by a run id.
+    """
+
+    @abstractmethod
+    def start_run(self, run_id: str, inputs: dict[str, Any]) -> None:
+        """
+        Saves the inputs of a new flow run.
+
+        Args:
+            run_id (str): The id of the run.
+            inputs (dict[str, Any]): The inputs of the flow.
+        """
+
+    @abstractmethod
+    def save_step(
+        self, run_id: str, step_name: str, execution_info: dict[str, Any]
+    ) -> None:
+        """
+        Saves the execution info of a completed flow step.
+
+        Args:
+            run_id (str): The id of the run.
+            step_name (str): The name of the flow step.
+            execution_info (dict[str, Any]): The execution info of the flow step.
+        """
+
+    @abstractmethod
+    def load_run(self, run_id: str) -> tuple[dict[str, Any], dict[str, dict]]:
+        """
+        Loads the inputs and the completed flow steps of a run.
+
+        Args:
+            run_id (str): The id of the run.
+
+        Returns:
+            tuple[dict[str, Any], dict[str, dict]]: The inputs of the flow and the
+                execution info of every completed flow step by name.
+
+        Raises:
+            KeyError: If the run doesn't exist.
+        """
+
+    @abstractmethod
+    def delete_run(self, run_id: str) -> None:
+        """
+        Deletes a run and its checkpoints.
+
+        Args:
+            run_id (str): The id of the run.
+        """
+
+
+class InMemoryCheckpointStore(BaseCheckpointStore):
+    """
+    A checkpoint store that keeps the runs in memory. Useful for retrying failed runs
+    within the same process.
+    """
+
+    def __init__(self):
+        self._runs = {}
+        self._lock = threading.Lock()
+
+    def start_run(self, run_id: str, inputs: dict[str, Any]) -> None:
+        with self._lock:
+            self._runs[run_id] = (dict(inputs), {})
+
+    def save_step(
+        self, run_id: str, step_name: str, execution_info: dict[str, Any]
+    ) -> None:
+        with self._lock:
+            self._runs[run_id][1][step_name] = execution_info
+
+    def load_run(self, run_id: str) -> tuple[dict[str, Any], dict[str, dict]]:
+        with self._lock:
+            inputs, steps = self._runs[run_id]
+            return dict(inputs), dict(steps)
+
+    def delete_run(self, run_id: str) -> None:
+        with self._lock:
+            self._runs.pop(run_id, None)
+
+
+class FileCheckpointStore(BaseCheckpointStore):
+    """
+    A checkpoint store that keeps every run in a JSON lines file in a directory. The
+    first line contains the inputs of the run, every other line a completed flow step,
+    so saving a flow step only appends a line.
+
+    The inputs and the execution info must be JSON serializable, otherwise saving them
+    raises a TypeError.
+
+    Args:
+        directory (str): The directory of the checkpoint files.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _run_path(self, run_id: str) -> str:
+        return os.path.join(self.directory, f"{run_id}.jsonl")
+
+    def start_run(self, run_id: str, inputs: dict[str, Any]) -> None:
+        with self._lock:
+            with open(self._run_path(run_id), "w", encoding="utf-8") as file:
+                file.write(_dumps({"inputs": inputs}) + "\n")
+
+    def save_step(
+        self, run_id: str, step_name: str, execution_info: dict[str, Any]
+    ) -> None:
+        line = _dumps({"step": step_name, "execution_info": execution_info})
+        with self._lock:
+            with open(self._run_path(run_id), "a", encoding="utf-8") as file:
+                file.write(line + "\n")
+
+    def load_run(self, run_id: str) -> tuple[dict[str, Any], dict[str, dict]]:
+        try:
+            with open(self._run_path(run_id), encoding="utf-8") as file:
+                records = [json.loads(line) for line in file if line.strip()]
+        except FileNotFoundError as error:
+            raise KeyError(run_id) from error
+
+        steps = {record["step"]: record["execution_info"] for record in records[1:]}
+        return records[0]["inputs"], steps
+
+    def delete_run(self, run_id: str) -> None:
+        with self._lock:
+            if os.path.exists(self._run_path(run_id)):
+                os.remove(self._run_path(run_id))
+
+
+class SQLiteCheckpointStore(BaseCheckpointStore):
+    """
+    A checkpoint store that keeps all runs in a single SQLite database.
+
+    The inputs and the execution info are stored as JSON and must be JSON serializable,
+    otherwise saving them raises a TypeError.
+
+    Args:
+        path (str): Path to the SQLite database file. Use ":memory:" for an in-memory
+            database.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS runs ("
+            "run_id TEXT PRIMARY KEY, inputs TEXT NOT NULL)"
+        )
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS steps ("
+            "run_id TEXT NOT NULL, "
+            "step_name TEXT NOT NULL, "
+            "execution_info TEXT NOT NULL, "
+            "PRIMARY KEY (run_id, step_name))"
+        )
+        self._connection.commit()
+
+    def start_run(self, run_id: str, inputs: dict[str, Any]) -> None:
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO runs (run_id, inputs) VALUES (?, ?)",
+                (run_id, _dumps(inputs)),
+            )
+            self._connection.commit()
+
+    def save_step(
+        self, run_id: str, step_name: str, execution_info: dict[str, Any]
+    ) -> None:
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO steps (run_id, step_name, execution_info) "
+                "VALUES (?, ?, ?)",
+                (run_id, step_name, _dumps(execution_info)),
+            )
+            self._connection.commit()
+
+    def load_run(self, run_id: str) -> tuple[dict[str, Any], dict[str, dict]]:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT inputs FROM runs WHERE run_id = ?", (run_id,)
+            ).fetchone()
+            if row is None:
+                raise KeyError(run_id)
+            steps = self._connection.execute(
+                "SELECT step_name, execution_info FROM steps WHERE run_id = ?",
+                (run_id,),
+            ).fetchall()
+        return json.loads(row[0]), {name: json.loads(info) for name, info in steps}
+
+    def delete_run(self, run_id: str) -> None:
+        with self._lock:
+            self._connection.execute("DELETE FROM steps WHERE run_id = ?", (run_id,))
+            self._connection.execute("DELETE FROM runs WHERE run_id = ?", (run_id,))
+            self._connection.commit()
+
+    def close(self) -> None:
+        """Closes the database connection."""
+        with self._lock:
+            self._connection.close()
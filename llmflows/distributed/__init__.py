@@ -0,0 +1,4 @@
+# pylint: disable=missing-module-docstring
+from .broker import BaseBroker, LocalBroker, SQLiteBroker
+from .worker import Worker, run_worker, start_workers, stop_workers
+from .distributed_flow import DistributedFlow
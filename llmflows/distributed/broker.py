@@ -0,0 +1,320 @@
+"""
+This module contains the task brokers used to run the steps of a flow on worker
+processes. A broker has a task queue, which the coordinator of a flow run fills with
+the steps that are ready to run, and a result queue per flow run, which the workers
+fill with the execution info of the steps.
+
+The LocalBroker uses multiprocessing queues for the workers of a single machine. The
+SQLiteBroker keeps the queues in a SQLite database, so workers on every machine that
+can access the database file can take part in a flow run.
+
+When a flow run ends, the coordinator calls `finish_run` so the broker discards the
+results of the run that were not received, e.g. the results of the flow steps that were
+still running when another flow step failed.
+"""
+
+import time
+import queue
+import pickle
+import sqlite3
+import threading
+import multiprocessing
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from typing import Any, Callable, Union
+
+
+class BaseBroker(ABC):
+    """
+    Base class for all task brokers. Tasks and results are dictionaries of picklable
+    values.
+    """
+
+    @abstractmethod
+    def put_task(self, task: dict[str, Any]) -> None:
+        """
+        Adds a task to the task queue.
+
+        Args:
+            task (dict[str, Any]): The task.
+        """
+
+    @abstractmethod
+    def get_task(self, timeout: Union[float, None] = None) -> Union[dict, None]:
+        """
+        Takes the next task from the task queue.
+
+        Args:
+            timeout (Union[float, None]): The maximum time to wait in seconds.
+
+        Returns:
+            Union[dict, None]: The task, or None if the timeout expired.
+        """
+
+    @abstractmethod
+    def put_result(self, result: dict[str, Any]) -> None:
+        """
+        Adds the result of a task to the result queue of its flow run.
+
+        Args:
+            result (dict[str, Any]): The result. Must contain the "run_id" of the task.
+        """
+
+    @abstractmethod
+    def get_result(
+        self, run_id: str, timeout: Union[float, None] = None
+    ) -> Union[dict, None]:
+        """
+        Takes the next result of a flow run from the result queue.
+
+        Args:
+            run_id (str): The id of the flow run.
+            timeout (Union[float, None]): The maximum time to wait in seconds.
+
+        Returns:
+            Union[dict, None]: The result, or None if the timeout expired.
+        """
+
+    @abstractmethod
+    def finish_run(self, run_id: str, pending_tasks: int = 0) -> None:
+        """
+        Discards the tasks and results of a flow run that ended. Results of the pending
+        tasks that arrive later are discarded as well.
+
+        Args:
+            run_id (str): The id of the flow run.
+            pending_tasks (int): The number of tasks of the run whose results were not
+                received.
+        """
+
+
+class LocalBroker(BaseBroker):
+    """
+    A broker for worker processes on the same machine, based on multiprocessing
+    queues. The broker must be passed to the worker processes when they are started.
+
+    Tasks can't be removed from the task queue, so the pending tasks of a finished run
+    still run on the workers, and their results are discarded when they arrive.
+
+    Args:
+        context (Union[str, None]): Optional multiprocessing start method, e.g.
+            "spawn". Defaults to the start method of the platform.
+    """
+
+    def __init__(self, context: Union[str, None] = None):
+        mp_context = multiprocessing.get_context(context)
+        self._tasks = mp_context.Queue()
+        self._results = mp_context.Queue()
+        self._init_coordinator_state()
+
+    def _init_coordinator_state(self) -> None:
+        # Results of other flow runs that were received while waiting for a run.
+        self._received = defaultdict(list)
+        # Number of results still expected for every finished run.
+        self._discarded = {}
+        self._lock = threading.Lock()
+
+    def __getstate__(self) -> dict:
+        return {"_tasks": self._tasks, "_results": self._results}
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._init_coordinator_state()
+
+    def put_task(self, task: dict[str, Any]) -> None:
+        self._tasks.put(task)
+
+    def get_task(self, timeout: Union[float, None] = None) -> Union[dict, None]:
+        try:
+            return self._tasks.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def put_result(self, result: dict[str, Any]) -> None:
+        self._results.put(result)
+
+    def get_result(
+        self, run_id: str, timeout: Union[float, None] = None
+    ) -> Union[dict, None]:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                if self._received.get(run_id):
+                    return self._received[run_id].pop(0)
+                try:
+                    result = self._results.get(timeout=0.05)
+                except queue.Empty:
+                    result = None
+
+                if result is not None and not self._discard(result["run_id"]):
+                    if result["run_id"] == run_id:
+                        return result
+                    self._received[result["run_id"]].append(result)
+
+            if deadline is not None and time.monotonic() >= deadline:
+                return None
+
+    def _discard(self, run_id: str) -> bool:
+        if run_id not in self._discarded:
+            return False
+        self._discarded[run_id] -= 1
+        if self._discarded[run_id] <= 0:
+            del self._discarded[run_id]
+        return True
+
+    def finish_run(self, run_id: str, pending_tasks: int = 0) -> None:
+        with self._lock:
+            received = len(self._received.pop(run_id, []))
+            if pending_tasks > received:
+                self._discarded[run_id] = pending_tasks - received
+
+
+class SQLiteBroker(BaseBroker):
+    """
+    A broker that keeps the task and result queues in a SQLite database. It's a simple
+    stand-in for a network broker: every process that can open the database file can
+    run workers or coordinate flow runs.
+
+    Each process opens its own connection, and waiting for tasks and results polls the
+    database. Finishing a run removes its tasks that no worker took yet.
+
+    Args:
+        path (str): Path to the SQLite database file.
+        poll_interval (float): The time between two polls in seconds. Defaults to 0.01.
+    """
+
+    def __init__(self, path: str, poll_interval: float = 0.01):
+        self.path = path
+        self.poll_interval = poll_interval
+        self._connection = None
+        self._lock = threading.Lock()
+        with self._lock:
+            connection = self._connect()
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS tasks ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+                "run_id TEXT, payload BLOB NOT NULL)"
+            )
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+                "run_id TEXT NOT NULL, payload BLOB NOT NULL)"
+            )
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS finished_runs ("
+                "run_id TEXT PRIMARY KEY, pending INTEGER NOT NULL)"
+            )
+            connection.commit()
+
+    def __getstate__(self) -> dict:
+        return {"path": self.path, "poll_interval": self.poll_interval}
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._connection = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None:
+            self._connection = sqlite3.connect(
+                self.path, timeout=30, isolation_level=None, check_same_thread=False
+            )
+        return self._connection
+
+    def _transaction(self, statements: Callable[[sqlite3.Connection], Any]) -> Any:
+        with self._lock:
+            connection = self._connect()
+            # An immediate transaction makes sure only one process changes the rows.
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                value = statements(connection)
+                connection.execute("COMMIT")
+            except Exception:
+                connection.execute("ROLLBACK")
+                raise
+        return value
+
+    def _pop(self, table: str, condition: str, params: tuple) -> Union[dict, None]:
+        def pop(connection: sqlite3.Connection) -> Any:
+            row = connection.execute(
+                f"SELECT id, payload FROM {table}{condition} ORDER BY id LIMIT 1",
+                params,
+            ).fetchone()
+            if row is not None:
+                connection.execute(f"DELETE FROM {table} WHERE id = ?", (row[0],))
+            return row
+
+        row = self._transaction(pop)
+        return None if row is None else pickle.loads(row[1])
+
+    def _poll(
+        self, table: str, condition: str, params: tuple, timeout: Union[float, None]
+    ) -> Union[dict, None]:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            item = self._pop(table, condition, params)
+            if item is not None:
+                return item
+            if deadline is not None and time.monotonic() >= deadline:
+                return None
+            time.sleep(self.poll_interval)
+
+    def put_task(self, task: dict[str, Any]) -> None:
+        with self._lock:
+            self._connect().execute(
+                "INSERT INTO tasks (run_id, payload) VALUES (?, ?)",
+                (task.get("run_id"), pickle.dumps(task)),
+            )
+
+    def get_task(self, timeout: Union[float, None] = None) -> Union[dict, None]:
+        return self._poll("tasks", "", (), timeout)
+
+    def put_result(self, result: dict[str, Any]) -> None:
+        run_id = result["run_id"]
+
+        def insert(connection: sqlite3.Connection) -> None:
+            discarded = connection.execute(
+                "UPDATE finished_runs SET pending = pending - 1 WHERE run_id = ?",
+                (run_id,),
+            ).rowcount
+            if discarded:
+                connection.execute(
+                    "DELETE FROM finished_runs WHERE run_id = ? AND pending <= 0",
+                    (run_id,),
+                )
+            else:
+                connection.execute(
+                    "INSERT INTO results (run_id, payload) VALUES (?, ?)",
+                    (run_id, pickle.dumps(result)),
+                )
+
+        self._transaction(insert)
+
+    def get_result(
+        self, run_id: str, timeout: Union[float, None] = None
+    ) -> Union[dict, None]:
+        return self._poll("results", " WHERE run_id = ?", (run_id,), timeout)
+
+    def finish_run(self, run_id: str, pending_tasks: int = 0) -> None:
+        def delete(connection: sqlite3.Connection) -> None:
+            removed = connection.execute(
+                "DELETE FROM tasks WHERE run_id = ?", (run_id,)
+            ).rowcount
+            removed += connection.execute(
+                "DELETE FROM results WHERE run_id = ?", (run_id,)
+            ).rowcount
+            if pending_tasks > removed:
+                connection.execute(
+                    "INSERT OR REPLACE INTO finished_runs (run_id, pending) "
+                    "VALUES (?, ?)",
+                    (run_id, pending_tasks - removed),
+                )
+
+        self._transaction(delete)
+
+    def close(self) -> None:
+        """Closes the database connection of this process."""
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
@@ -0,0 +1,154 @@
+# pylint: disable=too-few-public-methods
+"""
+This module contains the DistributedFlow class, which coordinates a flow run whose
+steps run on worker processes or machines.
+
+The coordinator keeps the state of the run. Whenever all parents of a flow step have
+finished, the flow step becomes a task on the broker, and the next free worker runs it.
+Flow steps whose inputs are available at the same time therefore run in parallel on
+different workers.
+"""
+
+import uuid
+from typing import Any, Union
+from llmflows.flows.flow_as_step import FlowAsStep
+from llmflows.flows.recording import validate_recording
+from llmflows.distributed.broker import BaseBroker
+from llmflows.distributed.worker import FlowFactory, get_factory_name, load_factory
+from llmflows.tracing.tracer import start_span
+from llmflows.metrics.registry import track_flow
+
+
+class DistributedFlow:
+    """
+    Runs the steps of a flow on the workers of a broker.
+
+    The flow is built with the flow factory, both by the coordinator, to know the steps
+    and how they are connected, and by every worker, to run the steps. The flow steps
+    run with `run`, so their caches, callbacks and metrics are the ones of the worker
+    processes. Flow steps that embed other flows are not supported.
+
+    When a run ends, successfully or not, the results of its flow steps that were not
+    received are discarded by the broker, see `BaseBroker.finish_run`.
+
+    Args:
+        flow_factory (Union[Callable, str]): A function without arguments that returns
+            the flow, or its "module:function" name. It must be importable by the
+            workers.
+        broker (BaseBroker): The broker used to send tasks to the workers.
+        recording (Union[str, None]): Optional recording level of the execution info
+            of the flow steps, "minimal", "standard" or "full".
+        timeout (Union[float, None]): Optional maximum time in seconds to wait for the
+            result of a flow step.
+
+    Attributes:
+        flow (Union[Flow, AsyncFlow]): The flow built by the coordinator.
+        broker (BaseBroker): The broker used to send tasks to the workers.
+
+    Raises:
+        ValueError: If the flow contains steps that embed other flows.
+    """
+
+    def __init__(
+        self,
+        flow_factory: FlowFactory,
+        broker: BaseBroker,
+        recording: Union[str, None] = None,
+        timeout: Union[float, None] = None,
+    ):
+        self.factory_name = get_factory_name(flow_factory)
+        self.flow = load_factory(self.factory_name)()
+        self.broker = broker
+        self.recording = validate_recording(recording)
+        self.timeout = timeout
+
+        if any(isinstance(step, FlowAsStep) for step in self.flow.steps):
+            raise ValueError("Distributed flows can't contain embedded flows.")
+
+    def start(self, **inputs) -> dict:
+        """
+        Runs the flow on the workers with the provided inputs.
+
+        Args:
+            **inputs (dict): The inputs to the flow.
+
+        Returns:
+            A dictionary of the results from each flow step.
+
+        Raises:
+            ValueError: If any required inputs are missing.
+            RuntimeError: If a flow step failed on a worker.
+            TimeoutError: If the result of a flow step didn't arrive in time.
+        """
+        self.flow._check_all_input_keys_available(inputs)  # pylint: disable=W0212
+        run = _DistributedRun(self, inputs)
+
+        try:
+            with start_span("DistributedFlow", "flow", steps=len(self.flow.steps)):
+                with track_flow("DistributedFlow"):
+                    run.submit(self.flow.steps[:1])
+                    while run.pending:
+                        run.receive()
+        finally:
+            self.broker.finish_run(run.run_id, len(run.pending))
+
+        return run.results
+
+
+class _DistributedRun:
+    """
+    Keeps the state of a single run of a distributed flow.
+    """
+
+    def __init__(self, flow: DistributedFlow, inputs: dict[str, Any]):
+        self.flow = flow
+        self.run_id = uuid.uuid4().hex
+        self.outputs = dict(inputs)
+        self.results = {}
+        self.pending = {}
+        self._submitted = set()
+
+    def submit(self, steps: list) -> None:
+        """
+        Sends the flow steps whose parents have all finished to the workers.
+        """
+        for step in steps:
+            if step in self._submitted or any(
+                parent.output_key not in self.outputs for parent in step.parents
+            ):
+                continue
+
+            self._submitted.add(step)
+            task_id = uuid.uuid4().hex
+            self.pending[task_id] = step
+            self.flow.broker.put_task(
+                {
+                    "type": "step",
+                    "run_id": self.run_id,
+                    "task_id": task_id,
+                    "factory": self.flow.factory_name,
+                    "step": step.name,
+                    "inputs": {key: self.outputs[key] for key in step.required_keys},
+                    "recording": self.flow.recording,
+                }
+            )
+
+    def receive(self) -> None:
+        """
+        Waits for the result of a flow step and sends the next flow steps.
+        """
+        result = self.flow.broker.get_result(self.run_id, timeout=self.flow.timeout)
+        if result is None:
+            raise TimeoutError("No flow step result received from the workers.")
+
+        step = self.pending.pop(result["task_id"])
+        if "error" in result:
+            raise RuntimeError(
+                f"Flow step '{step.name}' failed on a worker: {result['error']}\n"
+                f"{result['traceback']}"
+            )
+
+        execution_info = result["execution_info"]
+        self.results[step.name] = execution_info
+        self.outputs.update(execution_info["result"])
+        self.submit(step.get_next_steps(self.outputs))
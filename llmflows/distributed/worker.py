@@ -0,0 +1,181 @@
+"""
+This module contains the Worker class, which runs the flow step tasks of a broker, and
+helpers to start and stop worker processes.
+
+A worker doesn't receive flow steps from the coordinator. It builds the flow with the
+flow factory named in the task, once per factory, and runs the flow step with the same
+name. The factory must be importable in the worker process, i.e. a function defined at
+the top level of a module, or a "module:function" string.
+
+Flow steps that keep state between runs, like chat flow steps with their message
+history, are built again for every task, so runs never share their state.
+"""
+
+import asyncio
+import inspect
+import logging
+import importlib
+import traceback
+import multiprocessing
+from typing import Any, Callable, Union
+from llmflows.distributed.broker import BaseBroker
+
+FlowFactory = Union[Callable[[], Any], str]
+
+
+def get_factory_name(factory: FlowFactory) -> str:
+    """
+    Returns the "module:function" name of a flow factory.
+
+    Args:
+        factory (Union[Callable, str]): The flow factory or its name.
+
+    Returns:
+        str: The name of the flow factory.
+    """
+    if isinstance(factory, str):
+        return factory
+    return f"{factory.__module__}:{factory.__qualname__}"
+
+
+def load_factory(name: str) -> Callable[[], Any]:
+    """
+    Imports a flow factory.
+
+    Args:
+        name (str): The "module:function" name of the flow factory.
+
+    Returns:
+        Callable[[], Union[Flow, AsyncFlow]]: The flow factory.
+    """
+    module_name, _, attribute = name.partition(":")
+    factory = importlib.import_module(module_name)
+    for part in attribute.split("."):
+        factory = getattr(factory, part)
+    return factory
+
+
+class Worker:
+    """
+    Runs flow step tasks from a broker and puts their results on the result queue of
+    the flow run.
+
+    Args:
+        broker (BaseBroker): The broker to take the tasks from.
+
+    Attributes:
+        tasks_done (int): The number of tasks the worker ran.
+    """
+
+    def __init__(self, broker: BaseBroker):
+        self.broker = broker
+        self.tasks_done = 0
+        self._steps = {}
+
+    def _get_step(self, factory_name: str, step_name: str) -> Any:
+        if factory_name not in self._steps:
+            flow = load_factory(factory_name)()
+            self._steps[factory_name] = {step.name: step for step in flow.steps}
+        step = self._steps[factory_name][step_name]
+        if not getattr(step, "cacheable", True):
+            flow = load_factory(factory_name)()
+            step = next(step for step in flow.steps if step.name == step_name)
+        return step
+
+    def run_task(self, task: dict[str, Any]) -> dict[str, Any]:
+        """
+        Runs a flow step task.
+
+        Args:
+            task (dict[str, Any]): The task.
+
+        Returns:
+            dict[str, Any]: The result with the execution info of the flow step, or the
+                error if the flow step failed.
+        """
+        result = {"run_id": task["run_id"], "task_id": task["task_id"]}
+        try:
+            step = self._get_step(task["factory"], task["step"])
+            execution = step.run(task["inputs"], False, task["recording"])
+            if inspect.isawaitable(execution):
+                execution = asyncio.run(execution)
+            result["execution_info"] = execution
+        except Exception as error:  # pylint: disable=broad-exception-caught
+            logging.error("Flow step '%s' failed: %s", task["step"], error)
+            result["error"] = f"{error.__class__.__name__}: {error}"
+            result["traceback"] = traceback.format_exc()
+        return result
+
+    def run(
+        self,
+        max_tasks: Union[int, None] = None,
+        idle_timeout: Union[float, None] = None,
+    ) -> None:
+        """
+        Runs tasks until a stop task is received.
+
+        Args:
+            max_tasks (Union[int, None]): Optional maximum number of tasks to run.
+            idle_timeout (Union[float, None]): Optional time in seconds after which an
+                idle worker stops.
+        """
+        while max_tasks is None or self.tasks_done < max_tasks:
+            task = self.broker.get_task(timeout=idle_timeout)
+            if task is None or task.get("type") == "stop":
+                return
+            self.broker.put_result(self.run_task(task))
+            self.tasks_done += 1
+
+
+def run_worker(broker: BaseBroker, idle_timeout: Union[float, None] = None) -> None:
+    """
+    Runs a worker until it is stopped. Used as the target of worker processes.
+
+    Args:
+        broker (BaseBroker): The broker to take the tasks from.
+        idle_timeout (Union[float, None]): Optional time in seconds after which an
+            idle worker stops.
+    """
+    Worker(broker).run(idle_timeout=idle_timeout)
+
+
+def start_workers(
+    broker: BaseBroker, num_workers: int, context: Union[str, None] = None
+) -> list:
+    """
+    Starts worker processes on this machine.
+
+    Args:
+        broker (BaseBroker): The broker to take the tasks from.
+        num_workers (int): The number of worker processes.
+        context (Union[str, None]): Optional multiprocessing start method.
+
+    Returns:
+        list[multiprocessing.Process]: The worker processes.
+    """
+    mp_context = multiprocessing.get_context(context)
+    processes = []
+    for i in range(num_workers):
+        process = mp_context.Process(
+            target=run_worker, args=(broker,), name=f"llmflows-worker-{i}", daemon=True
+        )
+        process.start()
+        processes.append(process)
+    return processes
+
+
+def stop_workers(
+    broker: BaseBroker, processes: list, timeout: Union[float, None] = None
+) -> None:
+    """
+    Stops worker processes after they finished their current tasks.
+
+    Args:
+        broker (BaseBroker): The broker of the workers.
+        processes (list[multiprocessing.Process]): The worker processes.
+        timeout (Union[float, None]): The maximum time to wait for each process.
+    """
+    for _ in processes:
+        broker.put_task({"type": "stop"})
+    for process in processes:
+        process.join(timeout)
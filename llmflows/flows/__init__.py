@@ -4,6 +4,14 @@ from .async_flow import AsyncFlow
 from .flowstep import FlowStep
 from .chat_flowstep import ChatFlowStep
 from .functional_flowstep import FunctionalFlowStep
+from .router_flowstep import RouterFlowStep
+from .loop_flowstep import LoopFlowStep
+from .map_flowstep import MapFlowStep
+from .flow_as_step import FlowAsStep
 from .vectorstore_flowstep import VectorStoreFlowStep
 from .async_flowstep import AsyncFlowStep
 from .async_chat_flowstep import AsyncChatFlowStep
+from .async_vectorstore_flowstep import AsyncVectorStoreFlowStep
+from .async_functional_flowstep import AsyncFunctionalFlowStep
+from .async_loop_flowstep import AsyncLoopFlowStep
+from .async_map_flowstep import AsyncMapFlowStep
@@ -4,7 +4,9 @@
 LLMFlow module containing the AsyncBaseFlow which all async Flow classes inherit
 """
 
+from typing import Union
 from llmflows.flows.async_base_flowstep import AsyncBaseFlowStep
+from llmflows.flows.recording import validate_recording
 
 
 class AsyncBaseFlow:
@@ -14,16 +16,24 @@ class AsyncBaseFlow:
 
     Args:
         first_step (AsyncFlowStep): The first step of the flow.
+        recording (Union[str, None]): Optional recording level of the execution info
+            of the flow steps, "minimal", "standard" or "full". Flow steps with their
+            own recording level use it instead. Defaults to "full".
 
     Attributes:
         steps (list): All steps in the flow.
         output_keys (set): Set of output keys for all steps in the flow.
         input_keys (set): Set of input keys for all steps in the flow.
         names (set): Set of names of all steps in the flow.
+        recording (Union[str, None]): The recording level of the execution info of
+            the flow steps.
     """
 
-    def __init__(self, first_step: AsyncBaseFlowStep):
+    def __init__(
+        self, first_step: AsyncBaseFlowStep, recording: Union[str, None] = None
+    ):
         self._first_step = first_step
+        self.recording = validate_recording(recording)
         self.steps = self._get_all_steps()
         self.output_keys = set()
         self.input_keys = set()
@@ -86,13 +96,32 @@ class AsyncBaseFlow:
             self.names.add(step.name)
 
             flowstep_class = step.__class__.__name__
-            if flowstep_class == "AsyncFlowStep":
+            if flowstep_class == "FlowAsStep":
+                self.output_keys.update(step.output_mapping.values())
+
+            if flowstep_class in (
+                "AsyncFlowStep",
+                "AsyncVectorStoreFlowStep",
+                "FlowStep",
+                "VectorStoreFlowStep",
+            ):
                 self.input_keys.update(step.prompt_template.variables)
-            elif flowstep_class == "AsyncChatFlowStep":
+            elif flowstep_class in ("AsyncChatFlowStep", "ChatFlowStep"):
                 self.input_keys.update({step.message_key})
 
                 if step.message_prompt_template:
                     self.input_keys.update(step.message_prompt_template.variables)
+            elif flowstep_class in (
+                "AsyncFunctionalFlowStep",
+                "FunctionalFlowStep",
+                "RouterFlowStep",
+                "LoopFlowStep",
+                "AsyncLoopFlowStep",
+                "MapFlowStep",
+                "AsyncMapFlowStep",
+                "FlowAsStep",
+            ):
+                self.input_keys.update(step.required_keys)
 
 
     def _check_all_input_keys_available(self, user_inputs):
@@ -1,4 +1,4 @@
-# pylint: disable=R0801, R0913
+# pylint: disable=R0801, R0902, R0913, W0613
 
 """
 This module contains the AsyncBaseFlowStep used as a base class by all async
@@ -9,11 +9,23 @@ The async implementation allows async flowsteps to be run in parallel if
 multiple flowsteps have all the required inputs available.
 """
 
+import copy
 import time
+import asyncio
 import datetime
 from abc import ABC, abstractmethod
 from typing import Any, Union
 from llmflows.callbacks.async_base_callback import AsyncBaseCallback
+from llmflows.callbacks.callback_dispatcher import AsyncCallbackDispatcher
+from llmflows.caches.step_cache import BaseStepCache, get_cache_key
+from llmflows.llms.llm_utils import get_token_usage
+from llmflows.tracing.tracer import start_span, get_tracer
+from llmflows.metrics.registry import get_registry
+from llmflows.flows.recording import (
+    DEFAULT_RECORDING,
+    record_execution_info,
+    validate_recording,
+)
 
 
 class AsyncBaseFlowStep(ABC):
@@ -25,6 +37,13 @@ class AsyncBaseFlowStep(ABC):
         output_key (str): The dict key for the output of the flow step.
         callbacks (Union[list[AsyncBaseCallback]): Optional functions to be invoked with
             the results.
+        cache (Union[BaseStepCache, None]): Optional cache used to memoize the results
+            of the flow step based on its inputs. Raises a ValueError for flow steps
+            that are not cacheable.
+        recording (Union[str, None]): Optional recording level of the execution info,
+            "minimal", "standard" or "full". Overrides the recording level of the flow.
+        callback_dispatcher (Union[AsyncCallbackDispatcher, None]): Optional dispatcher that
+            runs the callbacks in the background instead of waiting for them.
 
     Attributes:
         name (str): The name of the flow step.
@@ -33,19 +52,36 @@ class AsyncBaseFlowStep(ABC):
         parents (list[BaseFlowStep]): The preceding steps that connect to this step.
         callbacks (Union[list[AsyncBaseCallback]): Optional callbacks to be invoked with
             the results.
+        cache (Union[BaseStepCache, None]): Optional cache used to memoize the results
+            of the flow step.
+        recording (Union[str, None]): The recording level of the execution info.
+        callback_dispatcher (Union[AsyncCallbackDispatcher, None]): Optional dispatcher that
+            runs the callbacks in the background.
+        cacheable (bool): Whether the results of the flow step only depend on its
+            inputs, so they can be cached.
     """
 
+    cacheable = True
+
     def __init__(
         self,
         name: str,
         output_key: str,
         callbacks: Union[list[AsyncBaseCallback], None],
+        cache: Union[BaseStepCache, None] = None,
+        recording: Union[str, None] = None,
+        callback_dispatcher: Union[AsyncCallbackDispatcher, None] = None,
     ):
         self.name = name
         self.output_key = output_key
         self.next_steps: list[AsyncBaseFlowStep] = []
         self.parents: list[AsyncBaseFlowStep] = []
         self.callbacks = callbacks if callbacks else []
+        if cache is not None and not self.cacheable:
+            raise ValueError(f"{self.__class__.__name__} doesn't support a cache")
+        self.cache = cache
+        self.recording = validate_recording(recording)
+        self.callback_dispatcher = callback_dispatcher
 
     def connect(self, *steps: "AsyncBaseFlowStep") -> None:
         """
@@ -62,6 +98,19 @@ class AsyncBaseFlowStep(ABC):
         for step in steps:
             step.parents.append(self)
 
+    def get_next_steps(self, outputs: dict[str, Any]) -> list["AsyncBaseFlowStep"]:
+        """
+        Returns the subsequent flow steps that are activated after this flow step ran.
+        All subsequent flow steps are activated unless a subclass routes the flow.
+
+        Args:
+            outputs (dict[str, Any]): The inputs and outputs available in the flow.
+
+        Returns:
+            list[AsyncBaseFlowStep]: The subsequent flow steps to run.
+        """
+        return self.next_steps
+
     def _check_unique_keys(self, *steps: "AsyncBaseFlowStep") -> None:
         """
         Ensures unique output keys among connected steps.
@@ -90,7 +139,10 @@ class AsyncBaseFlowStep(ABC):
         """
 
     async def run(
-        self, inputs: dict[str, str], verbose: bool = False
+        self,
+        inputs: dict[str, str],
+        verbose: bool = False,
+        recording: Union[str, None] = None,
     ) -> dict[str, str]:
         """
         Runs the flow step with the provided inputs and returns a dictionary with
@@ -98,33 +150,120 @@ class AsyncBaseFlowStep(ABC):
 
         This includes the start and end times, the prompts and the input to the
         language model, the output from the language model, details about the model
-        configuration and the result of the step. Callback functions can be run
-        with the result as well.
+        configuration and the result of the step. If the step has a cache and was
+        already run with the same inputs, the cached results are used instead of
+        calling `generate` and `cache_hit` is set to True. Callback functions can be
+        run with the result as well.
+
+        If a metrics registry is installed, the latency, token usage, retries and
+        errors of the run are recorded in it.
+
+        The recording level controls which details are kept in the returned execution
+        info, see `llmflows.flows.recording`. Callbacks always receive the complete
+        execution info.
+
+        If the flow step has a callback dispatcher, the callbacks are queued and run in
+        the background instead.
 
         Args:
             inputs (dict[str, str]): The inputs to the flow step.
             verbose (bool, optional): If true, the output of the step
                 and callbacks are printed.
+            recording (Union[str, None], optional): The recording level of the flow,
+                used if the flow step doesn't have its own recording level.
 
         Returns:
             dict[str, str]: A dictionary with various runtime details and results.
         """
+        registry = get_registry()
+        if registry is not None:
+            registry.steps_in_flight.inc((self.name,))
+
+        try:
+            with start_span(
+                self.name, "step", step_class=self.__class__.__name__
+            ) as span:
+                execution_info = await self._run(inputs, verbose)
+
+                if get_tracer() is not None:
+                    span.set_attribute("cache_hit", execution_info["cache_hit"])
+                    model_config = execution_info["model_config"]
+                    if isinstance(model_config, dict) and "model_name" in model_config:
+                        span.set_attribute("model", model_config["model_name"])
+                    span.set_attributes(get_token_usage(execution_info["call_data"]))
+        except Exception as error:
+            if registry is not None:
+                registry.record_error(self.name, error)
+            raise
+        finally:
+            if registry is not None:
+                registry.steps_in_flight.dec((self.name,))
+
+        if registry is not None:
+            registry.record_step(self.name, execution_info)
+
+        return record_execution_info(
+            execution_info, self.recording or recording or DEFAULT_RECORDING
+        )
+
+    async def _invoke_callbacks(self, event: str, payload: Any) -> None:
+        """
+        Invokes a callback method of all callbacks concurrently, or queues the calls if
+        the flow step has a callback dispatcher.
+
+        Args:
+            event (str): The callback method, e.g. "on_end".
+            payload (Any): The argument of the callback method.
+        """
+        if self.callback_dispatcher is not None:
+            for callback in self.callbacks:
+                await self.callback_dispatcher.dispatch(callback, event, payload)
+            return
+
+        async def invoke(callback: AsyncBaseCallback) -> None:
+            with start_span(event, "callback", callback=callback.__class__.__name__):
+                await getattr(callback, event)(payload)
+
+        if len(self.callbacks) == 1:
+            await invoke(self.callbacks[0])
+        elif self.callbacks:
+            await asyncio.gather(*[invoke(callback) for callback in self.callbacks])
+
+    async def _run(self, inputs: dict[str, str], verbose: bool) -> dict[str, str]:
+        """
+        Runs the flow step and its callbacks. See `run` for details.
+        """
         execution_info = {}
         start_time = datetime.datetime.now().isoformat()
         start_perf_time = time.perf_counter()
         execution_info["start_time"] = start_time
         execution_info["prompt_inputs"] = inputs
 
-        for callback in self.callbacks:
-            await callback.on_start(inputs)
+        await self._invoke_callbacks("on_start", inputs)
+
+        cache_key = None
+        if self.cache is not None and self.cacheable:
+            cache_key = get_cache_key(self, inputs)
+        cached = self.cache.get(cache_key) if cache_key is not None else None
+
+        # The cache keeps its own copies, so the returned execution info can be
+        # modified without changing the cached entries.
+        if cached is not None:
+            result, call_data, model_config = cached
+            call_data, model_config = copy.deepcopy((call_data, model_config))
+        else:
+            result, call_data, model_config = await self.generate(inputs)
+            if cache_key is not None:
+                self.cache.set(
+                    cache_key, (result, *copy.deepcopy((call_data, model_config)))
+                )
 
-        result, call_data, model_config = await self.generate(inputs)
+        execution_info["cache_hit"] = cached is not None
         execution_info["llm_output"] = result
         execution_info["call_data"] = call_data
         execution_info["model_config"] = model_config
 
-        for callback in self.callbacks:
-            await callback.on_results(result)
+        await self._invoke_callbacks("on_results", result)
 
         if verbose:
             print(f"{self.name}:\n{result}\n")
@@ -136,7 +275,6 @@ class AsyncBaseFlowStep(ABC):
         execution_info["execution_time"] = end_perf_time - start_perf_time
         execution_info["result"] = {self.output_key: result}
 
-        for callback in self.callbacks:
-            await callback.on_end(execution_info)
+        await self._invoke_callbacks("on_end", execution_info)
 
         return execution_info
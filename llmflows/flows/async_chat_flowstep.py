@@ -9,8 +9,11 @@ run in parallel if multiple flowsteps have all the required inputs available.
 from typing import Any, Union
 from llmflows.llms import MessageHistory
 from llmflows.llms.chat_llm import BaseChatLLM
+from llmflows.llms.compaction import SummaryCompaction
 from llmflows.prompts.prompt_template import PromptTemplate
 from llmflows.callbacks.async_base_callback import AsyncBaseCallback
+from llmflows.callbacks.callback_dispatcher import AsyncCallbackDispatcher
+from llmflows.caches.step_cache import BaseStepCache
 from llmflows.flows.async_base_flowstep import AsyncBaseFlowStep
 
 
@@ -32,6 +35,15 @@ class AsyncChatFlowStep(AsyncBaseFlowStep):
             with the language model.
         callbacks (Union[list[AsyncBaseCallback], None]): Callbacks to be invoked
             within the flowstep
+        compaction (Union[SummaryCompaction, None]): Optional compaction policy that
+            summarizes the oldest messages in the background once the message history
+            grows above a token threshold.
+        cache (Union[BaseStepCache, None]): Not supported, since the results of a chat
+            flow step depend on the message history. Must be None.
+        recording (Union[str, None]): Optional recording level of the execution
+            info, "minimal", "standard" or "full".
+        callback_dispatcher (Union[AsyncCallbackDispatcher, None]): Optional dispatcher
+            that runs the callbacks in the background.
 
     Attributes:
         llm (BaseLLM): The language model to be used in the flow step.
@@ -41,8 +53,12 @@ class AsyncChatFlowStep(AsyncBaseFlowStep):
         message_prompt_template (PromptTemplate): Prompt template for the message used
             with the language model.
         required_keys (set[str]): The keys required for the flow step to run.
+        compaction (Union[SummaryCompaction, None]): Optional compaction policy for the
+            message history.
     """
 
+    cacheable = False
+
     def __init__(
         self,
         name: str,
@@ -52,19 +68,26 @@ class AsyncChatFlowStep(AsyncBaseFlowStep):
         message_history: Union[MessageHistory, None] = None,
         message_prompt_template: Union[PromptTemplate, None] = None,
         callbacks: Union[list[AsyncBaseCallback], None] = None,
+        compaction: Union[SummaryCompaction, None] = None,
+        cache: Union[BaseStepCache, None] = None,
+        recording: Union[str, None] = None,
+        callback_dispatcher: Union[AsyncCallbackDispatcher, None] = None,
     ):
-        super().__init__(name, output_key, callbacks)
+        super().__init__(
+            name, output_key, callbacks, cache, recording, callback_dispatcher
+        )
         self.llm = llm
         self.message_key = message_key
         self.message_history = message_history if message_history else MessageHistory()
         self.message_prompt_template = message_prompt_template
+        self.compaction = compaction
         self.required_keys = self._add_required_keys()
         self._validate_message_key()
 
     def _add_required_keys(self):
-        required_keys = {}
+        required_keys = {self.message_key}
         if self.message_prompt_template:
-            required_keys = {self.message_key}.union(
+            required_keys = required_keys.union(
                 self.message_prompt_template.variables,
             )
 
@@ -93,6 +116,15 @@ class AsyncChatFlowStep(AsyncBaseFlowStep):
             else None
         )
         call_data["message_prompt"] = message
-        call_data["message_history"] = self.message_history.messages
+        # Record a copy rather than the live message list, which keeps growing.
+        history = self.message_history.snapshot()
+        call_data["message_history"] = history
+        if isinstance(model_config, dict) and isinstance(
+            model_config.get("messages"), list
+        ):
+            model_config["messages"] = history
+
+        if self.compaction:
+            self.compaction.schedule_async(self.message_history)
 
         return text_result, call_data, model_config
@@ -1,14 +1,31 @@
-# pylint: disable=R0801
+# pylint: disable=R0801, R0902
 
 """
 LLMFlow module for the AsyncFlow class used for defining and running flows, which are
 digraphs of steps. The async implementation of this class allows running
 async flowsteps that have all their required inputs available in parallel.
+
+An AsyncFlow can also contain regular (non-async) flowsteps, e.g. a FunctionalFlowStep.
+These run in a bounded thread pool, so they don't block the event loop and the async
+flowsteps keep running in parallel.
 """
 
+import time
+import uuid
 import asyncio
+import datetime
+import functools
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import Union
+from llmflows.checkpoints.checkpoint_store import BaseCheckpointStore
 from llmflows.flows.async_flowstep import AsyncFlowStep
+from llmflows.flows.async_base_flowstep import AsyncBaseFlowStep
 from llmflows.flows.async_base_flow import AsyncBaseFlow
+from llmflows.flows.flow_as_step import FlowAsStep
+from llmflows.flows.recording import get_reusable_results
+from llmflows.tracing.tracer import start_span
+from llmflows.metrics.registry import track_flow
 
 
 class AsyncFlow(AsyncBaseFlow):
@@ -18,22 +35,78 @@ class AsyncFlow(AsyncBaseFlow):
 
     Args:
         first_step (AsyncFlowStep): The first step of the flow.
+        recording (Union[str, None]): Optional recording level of the execution info
+            of the flow steps, "minimal", "standard" or "full". Defaults to "full".
+        max_workers (int): The maximum number of threads used to run the regular
+            (non-async) flow steps of the flow. Defaults to 8.
+        checkpoint_store (Union[BaseCheckpointStore, None]): Optional store used to
+            save the progress of every run, so a failed run can be resumed.
+
+    The thread pool is created on the first run of a regular flow step. Call `close`
+    or use the flow as an async context manager to shut it down when the flow is no
+    longer needed.
 
     Attributes:
         _first_step (AsyncFlowStep): The first step in the flow.
         results (dict): Stores the results of the completed flow steps.
         completed_steps (set): Keeps track of the steps that have been completed.
+        max_workers (int): The maximum number of threads used to run the regular
+            flow steps.
+        checkpoint_store (Union[BaseCheckpointStore, None]): The checkpoint store.
+        run_id (Union[str, None]): The id of the current or last checkpointed run.
     """
 
-    def __init__(self, first_step: AsyncFlowStep):
-        super().__init__(first_step)
+    def __init__(
+        self,
+        first_step: AsyncFlowStep,
+        recording: Union[str, None] = None,
+        max_workers: int = 8,
+        checkpoint_store: Union[BaseCheckpointStore, None] = None,
+    ):
+        super().__init__(first_step, recording)
+        self.results = {}
+        self.completed_steps = set()
+        self._previous_results = None
+        self._run_recording = self.recording
+        self.max_workers = max_workers
+        self._executor = None
+        self.checkpoint_store = checkpoint_store
+        self.run_id = None
+        self._checkpointing = False
+
+    def _reset_flow(self):
+        """
+        Resets the flow by clearing the results and completed steps.
+        """
         self.results = {}
         self.completed_steps = set()
+        self._previous_results = None
+        self._run_recording = self.recording
+        self._checkpointing = False
+
+    async def __aenter__(self) -> "AsyncFlow":
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """
+        Shuts down the thread pool used to run the regular flow steps, waiting for the
+        running steps to finish. The flow creates a new thread pool if it runs again.
+        """
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
 
     async def start(self, verbose=False, **inputs) -> dict:
         """
         Executes the flow with the provided inputs.
 
+        If the flow has a checkpoint store, the run gets a new `run_id` and every
+        completed step is saved to the store. The checkpoints are deleted when the run
+        succeeds, and kept for `resume` when it fails.
+
         Args:
             verbose (bool): Specifies if the flow step should print their output.
             **inputs (dict): The inputs to the flow.
@@ -45,10 +118,114 @@ class AsyncFlow(AsyncBaseFlow):
             ValueError: If any required inputs are missing.
         """
         self._check_all_input_keys_available(inputs)
-        await self._run_step(self._first_step, inputs, verbose)
-        return self.results
+        if self.checkpoint_store is not None:
+            self.run_id = uuid.uuid4().hex
+            self.checkpoint_store.start_run(self.run_id, inputs)
+        return await self._start(inputs, verbose)
+
+    async def resume(self, run_id: str, verbose=False) -> dict:
+        """
+        Continues a failed run from its checkpoints. The steps that completed in the
+        failed run reuse their saved execution info, which is marked with `reused` set
+        to True, and the other steps are executed.
+
+        Args:
+            run_id (str): The id of the failed run.
+            verbose (bool): Specifies if the flow step should print their output.
+
+        Returns:
+            A dictionary of the results from each flow step.
+
+        Raises:
+            ValueError: If the flow has no checkpoint store.
+            KeyError: If the run doesn't exist in the checkpoint store.
+        """
+        if self.checkpoint_store is None:
+            raise ValueError("The flow has no checkpoint store to resume from.")
+
+        inputs, completed = self.checkpoint_store.load_run(run_id)
+        self.run_id = run_id
+        self._previous_results = completed
+        return await self._start(inputs, verbose)
+
+    async def _start(self, inputs: dict, verbose: bool) -> dict:
+        """
+        Executes the flow in a flow span and deletes the checkpoints of the run when it
+        succeeds.
+        """
+        self._checkpointing = self.checkpoint_store is not None
+        flow_name = self.__class__.__name__
+        with start_span(flow_name, "flow", steps=len(self.steps)):
+            with track_flow(flow_name):
+                results = await self.execute(inputs, verbose)
+
+        if self.checkpoint_store is not None:
+            self.checkpoint_store.delete_run(self.run_id)
+        return results
+
+    async def execute(
+        self, inputs: dict, verbose=False, recording: Union[str, None] = None
+    ) -> dict:
+        """
+        Executes the steps of the flow without validating the inputs or recording the
+        flow in the tracer and the metrics registry.
+
+        Used by flow steps that run a flow as part of another flow. The outputs of the
+        flow steps are added to the given inputs dictionary in place.
+
+        Args:
+            inputs (dict): The inputs to the flow.
+            verbose (bool): Specifies if the flow step should print their output.
+            recording (Union[str, None]): Optional recording level used if the flow
+                has none, e.g. the recording level of the parent flow.
+
+        Returns:
+            A dictionary of the results from each flow step.
+        """
+        self._run_recording = self.recording or recording
+        try:
+            await self._run_step(
+                self._first_step,
+                inputs,
+                verbose,
+                self.results,
+                self._previous_results,
+            )
+            return self.results
+        finally:
+            self._reset_flow()
 
-    async def _run_step(self, step, inputs, verbose):
+    async def rerun(self, previous_results: dict, verbose=False, **inputs) -> dict:
+        """
+        Executes the flow incrementally, reusing the results of a previous run.
+
+        A step is executed again only if the inputs it receives differ from the inputs
+        recorded for it in the previous results. All other steps reuse their recorded
+        execution info, which is marked with `reused` set to True, except for chat flow
+        steps, which are always executed again since their results depend on their
+        message history.
+
+        Args:
+            previous_results (dict): The results returned by a previous `start` or
+                `rerun` call of this flow.
+            verbose (bool): Specifies if the flow step should print their output.
+            **inputs (dict): The inputs to the flow.
+
+        Returns:
+            A dictionary of the results from each flow step.
+
+        Raises:
+            ValueError: If any required inputs are missing.
+        """
+        self._previous_results = previous_results
+        try:
+            return await self.start(verbose=verbose, **inputs)
+        finally:
+            # The results must not leak into the next run if the rerun fails before
+            # the flow is executed, e.g. because of missing inputs.
+            self._previous_results = None
+
+    async def _run_step(self, step, inputs, verbose, results, previous_results):
         """
         Executes the given step and its next steps in a DFS-like manner.
 
@@ -56,6 +233,10 @@ class AsyncFlow(AsyncBaseFlow):
             step (AsyncFlowStep): The step to run.
             inputs (dict): The inputs to the step.
             verbose (bool): Specifies if the flow step should print its output.
+            results (dict): The results of the flow steps, or of the steps of an
+                embedded flow.
+            previous_results (Union[dict, None]): The results of a previous run used
+                to reuse the results of the steps.
 
         Returns:
             Any: The output of the step.
@@ -66,15 +247,101 @@ class AsyncFlow(AsyncBaseFlow):
         required_inputs = {key: inputs[key] for key in step.required_keys}
 
         if step not in self.completed_steps:
-            flow_data = await step.run(required_inputs, verbose)
             self.completed_steps.add(step)
+            flow_data = get_reusable_results(step, required_inputs, previous_results)
+            if flow_data is None and isinstance(step, FlowAsStep):
+                flow_data = await self._run_sub_flow(
+                    step, required_inputs, verbose, previous_results
+                )
+            elif flow_data is None:
+                flow_data = await self._run_flowstep(step, required_inputs, verbose)
 
             if flow_data:
-                self.results[step.name] = flow_data
+                results[step.name] = flow_data
                 inputs.update(flow_data["result"])
+                if self._checkpointing and results is self.results:
+                    self._save_checkpoint(step, required_inputs, flow_data)
 
         tasks = [
-            self._run_step(next_step, inputs, verbose)
-            for next_step in step.next_steps
+            self._run_step(next_step, inputs, verbose, results, previous_results)
+            for next_step in step.get_next_steps(inputs)
         ]
         await asyncio.gather(*tasks)
+
+    def _save_checkpoint(self, step, required_inputs, flow_data):
+        """
+        Saves the execution info of a completed step of the current run. The inputs of
+        the step are always saved, so the step can be reused by `resume` at every
+        recording level.
+
+        Args:
+            step (AsyncFlowStep): The completed step.
+            required_inputs (dict): The inputs to the step.
+            flow_data (dict): The execution info of the step.
+        """
+        self.checkpoint_store.save_step(
+            self.run_id, step.name, {**flow_data, "prompt_inputs": required_inputs}
+        )
+
+    async def _run_sub_flow(self, step, required_inputs, verbose, previous_results):
+        """
+        Runs the steps of an embedded flow with the scheduler of this flow.
+
+        Args:
+            step (FlowAsStep): The step with the embedded flow.
+            required_inputs (dict): The inputs to the step.
+            verbose (bool): Specifies if the flow step should print its output.
+            previous_results (Union[dict, None]): The results of a previous run.
+
+        Returns:
+            dict: The execution info of the step.
+        """
+        start_time = datetime.datetime.now().isoformat()
+        start_perf_time = time.perf_counter()
+        flow_inputs = step.get_flow_inputs(required_inputs)
+        flow_results = {}
+        previous = (previous_results or {}).get(step.name) or {}
+
+        with start_span(step.name, "flow", steps=len(step.flow.steps)):
+            await self._run_step(
+                step.first_step,
+                flow_inputs,
+                verbose,
+                flow_results,
+                previous.get("steps"),
+            )
+
+        return step.get_execution_info(
+            required_inputs, flow_inputs, flow_results, start_time, start_perf_time
+        )
+
+    async def _run_flowstep(self, step, required_inputs, verbose):
+        """
+        Runs a flow step. Async flow steps run on the event loop and regular flow steps
+        run in the thread pool of the flow.
+
+        Args:
+            step (Union[AsyncBaseFlowStep, BaseFlowStep]): The step to run.
+            required_inputs (dict): The inputs to the step.
+            verbose (bool): Specifies if the flow step should print its output.
+
+        Returns:
+            dict: The execution info of the step.
+        """
+        if isinstance(step, AsyncBaseFlowStep):
+            return await step.run(required_inputs, verbose, self._run_recording)
+
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="llmflows-steps"
+            )
+
+        # Run the step in a copy of the current context to keep the active span.
+        context = contextvars.copy_context()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor,
+            functools.partial(
+                context.run, step.run, required_inputs, verbose, self._run_recording
+            ),
+        )
@@ -11,6 +11,8 @@ from typing import Any, Union
 from llmflows.llms.llm import BaseLLM
 from llmflows.prompts.prompt_template import PromptTemplate
 from llmflows.callbacks.async_base_callback import AsyncBaseCallback
+from llmflows.callbacks.callback_dispatcher import AsyncCallbackDispatcher
+from llmflows.caches.step_cache import BaseStepCache
 from llmflows.flows.async_base_flowstep import AsyncBaseFlowStep
 
 
@@ -30,6 +32,12 @@ class AsyncFlowStep(AsyncBaseFlowStep):
             language model.
         callbacks Union[list[AsyncBaseCallback], None]: Callbacks to be invoked
             when running the flow
+        cache (Union[BaseStepCache, None]): Optional cache used to memoize the
+            results of the flow step.
+        recording (Union[str, None]): Optional recording level of the execution
+            info, "minimal", "standard" or "full".
+        callback_dispatcher (Union[AsyncCallbackDispatcher, None]): Optional dispatcher
+            that runs the callbacks in the background.
 
     Attributes:
         llm (BaseLLM): The language model to be used in the flow step.
@@ -45,8 +53,13 @@ class AsyncFlowStep(AsyncBaseFlowStep):
         prompt_template: PromptTemplate,
         output_key: str,
         callbacks: Union[list[AsyncBaseCallback], None] = None,
+        cache: Union[BaseStepCache, None] = None,
+        recording: Union[str, None] = None,
+        callback_dispatcher: Union[AsyncCallbackDispatcher, None] = None,
     ):
-        super().__init__(name, output_key, callbacks)
+        super().__init__(
+            name, output_key, callbacks, cache, recording, callback_dispatcher
+        )
         self.llm = llm
         self.prompt_template = prompt_template
         self.required_keys = prompt_template.variables
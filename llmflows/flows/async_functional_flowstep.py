@@ -0,0 +1,104 @@
+# pylint: disable=R0801, R0913
+"""
+LLMFlow module for the `AsyncFunctionalFlowStep` class that can be used to run a given
+function within an async flow.
+
+The function runs in an executor, so CPU-bound or blocking functions don't stall the
+event loop and the other flow steps of the AsyncFlow keep running in parallel.
+"""
+
+import asyncio
+import inspect
+import functools
+from concurrent.futures import Executor
+from typing import Callable, Any, Union
+from llmflows.flows.async_base_flowstep import AsyncBaseFlowStep
+from llmflows.flows.functional_flowstep import filter_inputs, check_result
+from llmflows.callbacks.async_base_callback import AsyncBaseCallback
+from llmflows.callbacks.callback_dispatcher import AsyncCallbackDispatcher
+from llmflows.caches.step_cache import BaseStepCache
+
+
+class AsyncFunctionalFlowStep(AsyncBaseFlowStep):
+    """
+    Represents an async functional flow step that runs a function. The function must
+        take a dictionary of strings as input and return a string(like regular flow
+        steps)
+
+    Regular functions run in the given executor, or in the default executor of the
+    event loop if no executor is given. Coroutine functions are awaited on the event
+    loop.
+
+    Args:
+        name (str): The name of the flow step.
+        flowstep_fn (Callable): The function or coroutine function to run.
+        output_key (str): The key to use for the output.
+        callbacks (list[AsyncBaseCallback], optional): List of callback instances.
+            Defaults to None.
+        cache (Union[BaseStepCache, None]): Optional cache used to memoize the
+            results of the flow step.
+        recording (Union[str, None]): Optional recording level of the execution
+            info, "minimal", "standard" or "full".
+        callback_dispatcher (Union[AsyncCallbackDispatcher, None]): Optional dispatcher
+            that runs the callbacks in the background.
+        executor (Union[Executor, None]): Optional executor, e.g. a
+            `ThreadPoolExecutor` or a `ProcessPoolExecutor`, used to run the function.
+            Functions run in a process pool must be picklable, i.e. defined at the top
+            level of a module. The executor is not shut down by the flow step.
+
+    Attributes:
+        required_keys (list[str]): The keys required for the flow step to run.
+        flowstep_fn (Callable): The function to be run.
+        executor (Union[Executor, None]): The executor used to run the function.
+
+    Raises:
+        ValueError: If an executor is given for a coroutine function.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        flowstep_fn: Callable[..., Any],
+        output_key: str,
+        callbacks: Union[list[AsyncBaseCallback], None] = None,
+        cache: Union[BaseStepCache, None] = None,
+        recording: Union[str, None] = None,
+        callback_dispatcher: Union[AsyncCallbackDispatcher, None] = None,
+        executor: Union[Executor, None] = None,
+    ):
+        super().__init__(
+            name, output_key, callbacks, cache, recording, callback_dispatcher
+        )
+        self.flowstep_fn = flowstep_fn
+        self.executor = executor
+        self.required_keys = inspect.getfullargspec(self.flowstep_fn).args
+        self._fn_args = frozenset(self.required_keys)
+        self._is_coroutine = inspect.iscoroutinefunction(self.flowstep_fn)
+
+        if self._is_coroutine and executor is not None:
+            raise ValueError("Coroutine functions can't run in an executor.")
+
+    async def generate(
+        self, inputs: dict[str, Any]
+    ) -> tuple[Any, Union[dict, None], Union[dict, None]]:
+        """
+        Executes the function with the provided inputs.
+
+        Args:
+            inputs (dict[str, Any]): Input parameters as a dictionary.
+
+        Returns:
+            The result of the function call, followed by two None values (for call
+                data and config, which are not applicable in this case).
+        """
+        filtered_inputs = filter_inputs(inputs, self._fn_args)
+
+        if self._is_coroutine:
+            result = await self.flowstep_fn(**filtered_inputs)
+        else:
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(
+                self.executor, functools.partial(self.flowstep_fn, **filtered_inputs)
+            )
+
+        return check_result(result), None, None
@@ -0,0 +1,146 @@
+# pylint: disable=R0801, R0902, R0913
+"""
+LLMFlow module for the `AsyncLoopFlowStep` class that runs an async flow repeatedly
+within another async flow, e.g. the thought, action and observation steps of an agent.
+"""
+
+import contextvars
+from typing import Callable, Any, Union
+from llmflows.flows.async_flow import AsyncFlow
+from llmflows.flows.async_base_flowstep import AsyncBaseFlowStep
+from llmflows.flows.functional_flowstep import filter_inputs
+from llmflows.flows.loop_flowstep import get_fn_args, get_loop_required_keys
+from llmflows.callbacks.async_base_callback import AsyncBaseCallback
+from llmflows.callbacks.callback_dispatcher import AsyncCallbackDispatcher
+from llmflows.caches.step_cache import BaseStepCache
+from llmflows.tracing.tracer import start_span
+
+# The verbose flag and recording level of the loop step run in progress.
+_run_options = contextvars.ContextVar("async_loop_run_options", default=(False, None))
+
+
+class AsyncLoopFlowStep(AsyncBaseFlowStep):
+    """
+    Represents an async flow step that runs an async flow repeatedly until a stop
+        condition is met or the maximum number of iterations is reached.
+
+    See `LoopFlowStep` for the stop and carry functions, and for the verbose flag and
+    recording level of the flow. The steps of the flow run in parallel within each
+    iteration like in any AsyncFlow.
+
+    Args:
+        name (str): The name of the flow step.
+        flow (AsyncFlow): The flow that runs in every iteration.
+        result_key (str): The output key of the flow used as the result of the loop.
+        output_key (str): The key to use for the output.
+        stop_fn (Callable[..., bool]): The function that decides if the loop stops.
+        carry_fn (Union[Callable[..., dict], None]): Optional function that updates
+            the carried state after each iteration.
+        initial_state (Union[dict, None]): Optional initial values of the carried state.
+        max_iterations (int): The maximum number of iterations. Defaults to 10.
+        callbacks (list[AsyncBaseCallback], optional): List of callback instances.
+            Defaults to None.
+        cache (Union[BaseStepCache, None]): Optional cache used to memoize the
+            results of the flow step.
+        recording (Union[str, None]): Optional recording level of the execution
+            info, "minimal", "standard" or "full".
+        callback_dispatcher (Union[AsyncCallbackDispatcher, None]): Optional dispatcher
+            that runs the callbacks in the background.
+
+    Attributes:
+        required_keys (list[str]): The keys required for the flow step to run.
+        flow (AsyncFlow): The flow that runs in every iteration.
+        result_key (str): The output key of the flow used as the result of the loop.
+        stop_fn (Callable[..., bool]): The function that decides if the loop stops.
+        carry_fn (Union[Callable[..., dict], None]): The function that updates the
+            carried state.
+        initial_state (dict): The initial values of the carried state.
+        max_iterations (int): The maximum number of iterations.
+
+    Raises:
+        ValueError: If the result key is not an output key of the flow.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        flow: AsyncFlow,
+        result_key: str,
+        output_key: str,
+        stop_fn: Callable[..., bool],
+        carry_fn: Union[Callable[..., dict], None] = None,
+        initial_state: Union[dict, None] = None,
+        max_iterations: int = 10,
+        callbacks: Union[list[AsyncBaseCallback], None] = None,
+        cache: Union[BaseStepCache, None] = None,
+        recording: Union[str, None] = None,
+        callback_dispatcher: Union[AsyncCallbackDispatcher, None] = None,
+    ):
+        super().__init__(
+            name, output_key, callbacks, cache, recording, callback_dispatcher
+        )
+        if result_key not in flow.output_keys:
+            raise ValueError(f"'{result_key}' is not an output key of the loop flow.")
+
+        self.flow = flow
+        self.result_key = result_key
+        self.stop_fn = stop_fn
+        self.carry_fn = carry_fn
+        self.initial_state = dict(initial_state) if initial_state else {}
+        self.max_iterations = max_iterations
+        self._stop_args = get_fn_args(stop_fn)
+        self._carry_args = get_fn_args(carry_fn)
+        self.required_keys = get_loop_required_keys(
+            flow, self.initial_state, self._stop_args | self._carry_args
+        )
+
+    async def run(
+        self,
+        inputs: dict[str, str],
+        verbose: bool = False,
+        recording: Union[str, None] = None,
+    ) -> dict[str, str]:
+        """
+        Runs the loop step, see `AsyncBaseFlowStep.run`. The verbose flag and the
+        recording level are passed on to the flow of the loop.
+        """
+        token = _run_options.set((verbose, self.recording or recording))
+        try:
+            return await super().run(inputs, verbose, recording)
+        finally:
+            _run_options.reset(token)
+
+    async def generate(
+        self, inputs: dict[str, Any]
+    ) -> tuple[Any, Union[dict, None], Union[dict, None]]:
+        """
+        Runs the flow of the loop until it stops.
+
+        Args:
+            inputs (dict[str, Any]): Input parameters as a dictionary.
+
+        Returns:
+            The value of the result key after the last iteration, the results of all
+                iterations as call data, and None for the config.
+        """
+        verbose, recording = _run_options.get()
+        state = {**self.initial_state, **inputs}
+        iterations = []
+        stopped = False
+
+        for index in range(self.max_iterations):
+            for key in self.flow.output_keys:
+                state.pop(key, None)
+
+            with start_span("iteration", "internal", loop=self.name, index=index):
+                iterations.append(await self.flow.execute(state, verbose, recording))
+
+            if self.stop_fn(**filter_inputs(state, self._stop_args)):
+                stopped = True
+                break
+
+            if self.carry_fn is not None:
+                state.update(self.carry_fn(**filter_inputs(state, self._carry_args)))
+
+        call_data = {"iterations": iterations, "stopped": stopped}
+        return state.get(self.result_key), call_data, None
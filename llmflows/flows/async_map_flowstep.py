@@ -0,0 +1,130 @@
+# pylint: disable=R0801, R0902, R0913
+"""
+LLMFlow module for the `AsyncMapFlowStep` class that runs an async flow step over every
+element of a list concurrently, e.g. to summarize every passage retrieved from a vector
+store with one round trip of latency.
+"""
+
+import asyncio
+import contextvars
+from typing import Any, Union
+from llmflows.flows.async_base_flowstep import AsyncBaseFlowStep
+from llmflows.flows.map_flowstep import get_map_required_keys, get_item_inputs
+from llmflows.callbacks.async_base_callback import AsyncBaseCallback
+from llmflows.callbacks.callback_dispatcher import AsyncCallbackDispatcher
+from llmflows.caches.step_cache import BaseStepCache
+
+# The verbose flag and recording level of the map step run in progress.
+_run_options = contextvars.ContextVar("async_map_run_options", default=(False, None))
+
+
+class AsyncMapFlowStep(AsyncBaseFlowStep):
+    """
+    Represents an async flow step that runs another async flow step over every element
+    of a list.
+
+    See `MapFlowStep` for the inputs and results, and for the verbose flag and
+    recording level of the mapped flow step. The mapped flow step runs for at most
+    `max_concurrency` elements at the same time.
+
+    Args:
+        name (str): The name of the flow step.
+        flowstep (AsyncBaseFlowStep): The async flow step to run for every element.
+        items_key (str): The key of the list of elements.
+        item_key (str): The key the mapped flow step receives an element with.
+        output_key (str): The key to use for the list of results.
+        max_concurrency (int): The maximum number of elements processed concurrently.
+            Defaults to 8.
+        callbacks (list[AsyncBaseCallback], optional): List of callback instances.
+            Defaults to None.
+        cache (Union[BaseStepCache, None]): Optional cache used to memoize the
+            results of the flow step.
+        recording (Union[str, None]): Optional recording level of the execution
+            info, "minimal", "standard" or "full".
+        callback_dispatcher (Union[AsyncCallbackDispatcher, None]): Optional dispatcher
+            that runs the callbacks in the background.
+
+    Attributes:
+        required_keys (set[str]): The keys required for the flow step to run.
+        flowstep (AsyncBaseFlowStep): The async flow step to run for every element.
+        items_key (str): The key of the list of elements.
+        item_key (str): The key the mapped flow step receives an element with.
+        max_concurrency (int): The maximum number of elements processed concurrently.
+
+    Raises:
+        ValueError: If the mapped flow step doesn't require the item key or isn't
+            cacheable.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        flowstep: AsyncBaseFlowStep,
+        items_key: str,
+        item_key: str,
+        output_key: str,
+        max_concurrency: int = 8,
+        callbacks: Union[list[AsyncBaseCallback], None] = None,
+        cache: Union[BaseStepCache, None] = None,
+        recording: Union[str, None] = None,
+        callback_dispatcher: Union[AsyncCallbackDispatcher, None] = None,
+    ):
+        super().__init__(
+            name, output_key, callbacks, cache, recording, callback_dispatcher
+        )
+        self.flowstep = flowstep
+        self.items_key = items_key
+        self.item_key = item_key
+        self.max_concurrency = max_concurrency
+        self.required_keys = get_map_required_keys(flowstep, items_key, item_key)
+
+    async def run(
+        self,
+        inputs: dict[str, str],
+        verbose: bool = False,
+        recording: Union[str, None] = None,
+    ) -> dict[str, str]:
+        """
+        Runs the map step, see `AsyncBaseFlowStep.run`. The verbose flag and the
+        recording level are passed on to the mapped flow step.
+        """
+        token = _run_options.set((verbose, self.recording or recording))
+        try:
+            return await super().run(inputs, verbose, recording)
+        finally:
+            _run_options.reset(token)
+
+    async def generate(
+        self, inputs: dict[str, Any]
+    ) -> tuple[Any, Union[dict, None], Union[dict, None]]:
+        """
+        Runs the mapped flow step for every element of the list.
+
+        Args:
+            inputs (dict[str, Any]): Input parameters as a dictionary.
+
+        Returns:
+            The list of results, the execution info of every run as call data, and
+                None for the config.
+
+        Raises:
+            TypeError: If the elements are not a list or a tuple.
+        """
+        verbose, recording = _run_options.get()
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def run_item(item_inputs: dict[str, Any]) -> dict:
+            async with semaphore:
+                return await self.flowstep.run(item_inputs, verbose, recording)
+
+        runs = await asyncio.gather(
+            *[
+                run_item(item_inputs)
+                for item_inputs in get_item_inputs(
+                    inputs, self.items_key, self.item_key
+                )
+            ]
+        )
+
+        results = [run["result"][self.flowstep.output_key] for run in runs]
+        return results, {"runs": list(runs)}, None
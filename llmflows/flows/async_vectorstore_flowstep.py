@@ -0,0 +1,114 @@
+# pylint: disable=R0801, R0913
+"""
+This module provides the `AsyncVectorStoreFlowStep` class which extends the
+`AsyncBaseFlowStep` class.
+
+This class represents an async flow step that uses its prompt to search for a vector
+store. The embedding and the search don't block the event loop, so the retrieval can
+run in parallel with other flow steps of an AsyncFlow.
+"""
+
+from typing import Any, Union
+from llmflows.prompts.prompt_template import PromptTemplate
+from llmflows.llms.embeddings import BaseEmbeddings
+from llmflows.flows.async_base_flowstep import AsyncBaseFlowStep
+from llmflows.callbacks.async_base_callback import AsyncBaseCallback
+from llmflows.callbacks.callback_dispatcher import AsyncCallbackDispatcher
+from llmflows.caches.step_cache import BaseStepCache
+from llmflows.vectorstores.vector_store import VectorStore
+from llmflows.vectorstores.vector_doc import VectorDoc
+
+
+class AsyncVectorStoreFlowStep(AsyncBaseFlowStep):
+    """
+    Represents an async flowstep that uses a prompt to search for a vector store.
+
+    The AsyncVectorStoreFlowStep uses the prompt template and the inputs to create a
+    prompt, then uses the embeddings model to embed the prompt asynchronously, and
+    finally uses the async search of the vector store to search for similar vectors.
+
+    If the `append_top_k` attribute is set to True, the top_k results will be appended
+    in the final result. If the `list_output` attribute is set to True, the result is
+    the list of the texts of the top_k results instead, e.g. to run a flow step for
+    every result with a map flow step.
+
+    Args:
+        name (str): The name of the flow step.
+        vector_store (VectorStore): The vector store instance to use.
+        embeddings_model (BaseEmbeddings): The embeddings model instance to use.
+        prompt_template (PromptTemplate): Optional prompt template to be used with the
+            required keys to create a search prompt.
+        output_key (str): The dict key to use for the output.
+        top_k (int, optional): The number of top results to return. Defaults to 1.
+        append_top_k (bool, optional): Whether to append top_k results. Defaults to
+            False.
+        callbacks (Union[list[AsyncBaseCallback], None]): Callbacks to be invoked
+            while the flow is running.
+        cache (Union[BaseStepCache, None]): Optional cache used to memoize the
+            results of the flow step.
+        recording (Union[str, None]): Optional recording level of the execution
+            info, "minimal", "standard" or "full".
+        callback_dispatcher (Union[AsyncCallbackDispatcher, None]): Optional dispatcher
+            that runs the callbacks in the background.
+        list_output (bool, optional): Whether the result is the list of the texts of
+            the top_k results. Defaults to False.
+
+    Attributes:
+        embeddings_model (BaseEmbeddings): The embeddings model instance to use.
+        prompt_template (PromptTemplate): Optional prompt template to be used with the
+            required keys to create a search prompt.
+        required_keys (list[str]): A list of required keys.
+        vector_store (VectorStore): The vector store instance to use.
+        top_k (int): The number of top results to return.
+        append_top_k (bool): Whether to append top_k results.
+        list_output (bool): Whether the result is the list of the texts of the top_k
+            results.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        vector_store: VectorStore,
+        embeddings_model: BaseEmbeddings,
+        prompt_template: PromptTemplate,
+        output_key: str,
+        top_k: int = 1,
+        append_top_k: bool = False,
+        callbacks: Union[list[AsyncBaseCallback], None] = None,
+        cache: Union[BaseStepCache, None] = None,
+        recording: Union[str, None] = None,
+        callback_dispatcher: Union[AsyncCallbackDispatcher, None] = None,
+        list_output: bool = False,
+    ):
+        super().__init__(
+            name, output_key, callbacks, cache, recording, callback_dispatcher
+        )
+        self.embeddings_model = embeddings_model
+        self.prompt_template = prompt_template
+        self.required_keys = prompt_template.variables
+        self.vector_store = vector_store
+        self.top_k = top_k
+        self.append_top_k = append_top_k
+        self.list_output = list_output
+
+    async def generate(
+        self, inputs: dict[str, Any]
+    ) -> tuple[Any, Union[dict, None], Union[dict, None]]:
+        question = VectorDoc(doc=self.prompt_template.get_prompt(**inputs))
+        embedded_question = await self.embeddings_model.generate_async(question)
+        search_results, call_data, config = await self.vector_store.search_async(
+            embedded_question, top_k=self.top_k
+        )
+
+        if self.list_output:
+            texts = [match["metadata"]["text"] for match in search_results]
+            return texts[: self.top_k], call_data, config
+
+        result = search_results[0]["metadata"]["text"]
+
+        if self.append_top_k:
+            result = ""
+            for i in range(self.top_k):
+                result += search_results[i]["metadata"]["text"] + "\n"
+
+        return result, call_data, config
@@ -3,7 +3,9 @@ This module provides the BaseFlow class which is used as a base class by all non
 flow classes.
 """
 
+from typing import Union
 from llmflows.flows.base_flowstep import BaseFlowStep
+from llmflows.flows.recording import validate_recording
 
 
 class BaseFlow:
@@ -13,16 +15,22 @@ class BaseFlow:
 
     Args:
         first_step (FlowStep): The first step of the flow.
+        recording (Union[str, None]): Optional recording level of the execution info
+            of the flow steps, "minimal", "standard" or "full". Flow steps with their
+            own recording level use it instead. Defaults to "full".
 
     Attributes:
         steps (list): All steps in the flow.
         output_keys (set): Set of output keys for all steps in the flow.
         input_keys (set): Set of input keys for all steps in the flow.
         names (set): Set of names of all steps in the flow.
+        recording (Union[str, None]): The recording level of the execution info of
+            the flow steps.
     """
 
-    def __init__(self, first_step: BaseFlowStep):
+    def __init__(self, first_step: BaseFlowStep, recording: Union[str, None] = None):
         self._first_step = first_step
+        self.recording = validate_recording(recording)
         self.steps = self._get_all_steps()
         self.output_keys = set()
         self.input_keys = set()
@@ -85,7 +93,10 @@ class BaseFlow:
             self.names.add(step.name)
 
             flowstep_class = step.__class__.__name__
-            if flowstep_class == "FlowStep":
+            if flowstep_class == "FlowAsStep":
+                self.output_keys.update(step.output_mapping.values())
+
+            if flowstep_class in ("FlowStep", "VectorStoreFlowStep"):
                 self.input_keys.update(step.prompt_template.variables)
             elif flowstep_class == "ChatFlowStep":
                 self.input_keys.update({step.message_key})
@@ -93,7 +104,13 @@ class BaseFlow:
                 if step.message_prompt_template:
                     self.input_keys.update(step.message_prompt_template.variables)
 
-            elif flowstep_class == "FunctionalFlowStep":
+            elif flowstep_class in (
+                "FunctionalFlowStep",
+                "RouterFlowStep",
+                "LoopFlowStep",
+                "MapFlowStep",
+                "FlowAsStep",
+            ):
                 self.input_keys.update(step.required_keys)
 
     def _check_all_input_keys_available(self, user_inputs):
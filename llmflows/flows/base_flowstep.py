@@ -1,4 +1,4 @@
-# pylint: disable=R0801, R0913
+# pylint: disable=R0801, R0902, R0913, W0613
 
 """
 This module contains the BaseFlowStep used as a base class by all non-async
@@ -6,11 +6,22 @@ FlowStep classes. Each FlowStep can execute a task, record
 execution times, and optionally invoke callbacks on the results.
 """
 
+import copy
 import time
 import datetime
 from abc import ABC, abstractmethod
 from typing import Any, Union
 from llmflows.callbacks.base_callback import BaseCallback
+from llmflows.callbacks.callback_dispatcher import CallbackDispatcher
+from llmflows.caches.step_cache import BaseStepCache, get_cache_key
+from llmflows.llms.llm_utils import get_token_usage
+from llmflows.tracing.tracer import start_span, get_tracer
+from llmflows.metrics.registry import get_registry
+from llmflows.flows.recording import (
+    DEFAULT_RECORDING,
+    record_execution_info,
+    validate_recording,
+)
 
 
 class BaseFlowStep(ABC):
@@ -22,6 +33,13 @@ class BaseFlowStep(ABC):
         output_key (str): The dict key for the output of the flow step.
         callbacks (Union[list[AsyncBaseCallback]): Optional functions to be invoked with
             the results.
+        cache (Union[BaseStepCache, None]): Optional cache used to memoize the results
+            of the flow step based on its inputs. Raises a ValueError for flow steps
+            that are not cacheable.
+        recording (Union[str, None]): Optional recording level of the execution info,
+            "minimal", "standard" or "full". Overrides the recording level of the flow.
+        callback_dispatcher (Union[CallbackDispatcher, None]): Optional dispatcher that
+            runs the callbacks in the background instead of waiting for them.
 
     Attributes:
         name (str): The name of the flow step.
@@ -30,16 +48,36 @@ class BaseFlowStep(ABC):
         parents (list[BaseFlowStep]): The preceding steps that connect to this step.
         callbacks (Union[list[BaseCallback]): Optional callbacks to be invoked with
             the results.
+        cache (Union[BaseStepCache, None]): Optional cache used to memoize the results
+            of the flow step.
+        recording (Union[str, None]): The recording level of the execution info.
+        callback_dispatcher (Union[CallbackDispatcher, None]): Optional dispatcher that
+            runs the callbacks in the background.
+        cacheable (bool): Whether the results of the flow step only depend on its
+            inputs, so they can be cached.
     """
 
+    cacheable = True
+
     def __init__(
-        self, name: str, output_key: str, callbacks: Union[list[BaseCallback], None]
+        self,
+        name: str,
+        output_key: str,
+        callbacks: Union[list[BaseCallback], None],
+        cache: Union[BaseStepCache, None] = None,
+        recording: Union[str, None] = None,
+        callback_dispatcher: Union[CallbackDispatcher, None] = None,
     ):
         self.name = name
         self.output_key = output_key
         self.next_steps: list[BaseFlowStep] = []
         self.parents: list[BaseFlowStep] = []
         self.callbacks = callbacks if callbacks else []
+        if cache is not None and not self.cacheable:
+            raise ValueError(f"{self.__class__.__name__} doesn't support a cache")
+        self.cache = cache
+        self.recording = validate_recording(recording)
+        self.callback_dispatcher = callback_dispatcher
 
     def connect(self, *steps: "BaseFlowStep") -> None:
         """
@@ -77,6 +115,19 @@ class BaseFlowStep(ABC):
             to_visit.extend(current_step.next_steps)
         return False
 
+    def get_next_steps(self, outputs: dict[str, Any]) -> list["BaseFlowStep"]:
+        """
+        Returns the subsequent flow steps that are activated after this flow step ran.
+        All subsequent flow steps are activated unless a subclass routes the flow.
+
+        Args:
+            outputs (dict[str, Any]): The inputs and outputs available in the flow.
+
+        Returns:
+            list[BaseFlowStep]: The subsequent flow steps to run.
+        """
+        return self.next_steps
+
     def _check_unique_keys(self, *steps: "BaseFlowStep") -> None:
         """
         Checks that all connected flow steps have unique output keys.
@@ -104,40 +155,125 @@ class BaseFlowStep(ABC):
             tuple: result, call data and model configuration.
         """
 
-    def run(self, inputs: dict[str, str], verbose: bool = False) -> dict[str, str]:
+    def run(
+        self,
+        inputs: dict[str, str],
+        verbose: bool = False,
+        recording: Union[str, None] = None,
+    ) -> dict[str, str]:
         """
         Executes the flow step with the provided inputs and returns a dictionary with
         execution details.
 
         This includes the start and end times, the prompts and the input to the
         language model, the output from the language model, details about the model
-        configuration and the result of the step. Callback functions can be executed
-        with the result as well.
+        configuration and the result of the step. If the step has a cache and was
+        already run with the same inputs, the cached results are used instead of
+        calling `generate` and `cache_hit` is set to True. Callback functions can be
+        executed with the result as well.
+
+        If a metrics registry is installed, the latency, token usage, retries and
+        errors of the run are recorded in it.
+
+        The recording level controls which details are kept in the returned execution
+        info, see `llmflows.flows.recording`. Callbacks always receive the complete
+        execution info.
+
+        If the flow step has a callback dispatcher, the callbacks are queued and run in
+        the background instead.
 
         Args:
             inputs (dict[str, str]): The inputs to the flow step.
             verbose (bool, optional): If true, the output of the step
                 and callback executions are printed.
+            recording (Union[str, None], optional): The recording level of the flow,
+                used if the flow step doesn't have its own recording level.
 
         Returns:
             dict[str, str]: A dictionary with various runtime details and results.
         """
+        registry = get_registry()
+        if registry is not None:
+            registry.steps_in_flight.inc((self.name,))
+
+        try:
+            with start_span(
+                self.name, "step", step_class=self.__class__.__name__
+            ) as span:
+                execution_info = self._run(inputs, verbose)
+
+                if get_tracer() is not None:
+                    span.set_attribute("cache_hit", execution_info["cache_hit"])
+                    model_config = execution_info["config"]
+                    if isinstance(model_config, dict) and "model_name" in model_config:
+                        span.set_attribute("model", model_config["model_name"])
+                    span.set_attributes(get_token_usage(execution_info["call_data"]))
+        except Exception as error:
+            if registry is not None:
+                registry.record_error(self.name, error)
+            raise
+        finally:
+            if registry is not None:
+                registry.steps_in_flight.dec((self.name,))
+
+        if registry is not None:
+            registry.record_step(self.name, execution_info)
+
+        return record_execution_info(
+            execution_info, self.recording or recording or DEFAULT_RECORDING
+        )
+
+    def _invoke_callbacks(self, event: str, payload: Any) -> None:
+        """
+        Invokes a callback method of all callbacks, or queues the calls if the flow
+        step has a callback dispatcher.
+
+        Args:
+            event (str): The callback method, e.g. "on_end".
+            payload (Any): The argument of the callback method.
+        """
+        for callback in self.callbacks:
+            if self.callback_dispatcher is not None:
+                self.callback_dispatcher.dispatch(callback, event, payload)
+                continue
+            with start_span(event, "callback", callback=callback.__class__.__name__):
+                getattr(callback, event)(payload)
+
+    def _run(self, inputs: dict[str, str], verbose: bool) -> dict[str, str]:
+        """
+        Runs the flow step and its callbacks. See `run` for details.
+        """
         execution_info = {}
         start_time = datetime.datetime.now().isoformat()
         start_perf_time = time.perf_counter()
         execution_info["start_time"] = start_time
         execution_info["prompt_inputs"] = inputs
 
-        for callback in self.callbacks:
-            callback.on_start(inputs)
+        self._invoke_callbacks("on_start", inputs)
+
+        cache_key = None
+        if self.cache is not None and self.cacheable:
+            cache_key = get_cache_key(self, inputs)
+        cached = self.cache.get(cache_key) if cache_key is not None else None
 
-        result, call_data, model_config = self.generate(inputs)
+        # The cache keeps its own copies, so the returned execution info can be
+        # modified without changing the cached entries.
+        if cached is not None:
+            result, call_data, model_config = cached
+            call_data, model_config = copy.deepcopy((call_data, model_config))
+        else:
+            result, call_data, model_config = self.generate(inputs)
+            if cache_key is not None:
+                self.cache.set(
+                    cache_key, (result, *copy.deepcopy((call_data, model_config)))
+                )
+
+        execution_info["cache_hit"] = cached is not None
         execution_info["generated"] = result
         execution_info["call_data"] = call_data
         execution_info["config"] = model_config
 
-        for callback in self.callbacks:
-            callback.on_results(result)
+        self._invoke_callbacks("on_results", result)
 
         if verbose:
             print(f"{self.name}:\n{result}\n")
@@ -149,7 +285,6 @@ class BaseFlowStep(ABC):
         execution_info["execution_time"] = end_perf_time - start_perf_time
         execution_info["result"] = {self.output_key: result}
 
-        for callback in self.callbacks:
-            callback.on_end(execution_info)
+        self._invoke_callbacks("on_end", execution_info)
 
         return execution_info
@@ -0,0 +1,153 @@
+# pylint: disable=R0801, R0902, R0913
+"""
+LLMFlow module for the `FlowAsStep` class that embeds a flow as a single step of
+another flow, e.g. a reusable retrieval and answer pipeline.
+
+The steps of the embedded flow are not run by a nested `start` call. The parent flow
+runs them with its own scheduler, so they run in parallel with the other steps of the
+parent flow, and their spans, caches and recording levels are the ones of the parent
+flow.
+"""
+
+import time
+import datetime
+from typing import Any, Union
+from llmflows.flows.flowstep import BaseFlowStep
+
+
+class FlowAsStep(BaseFlowStep):
+    """
+    Represents a flow embedded as a step of another flow.
+
+    The input mapping maps keys of the embedded flow to keys of the parent flow, e.g.
+    `{"question": "user_question"}` passes the `user_question` of the parent flow as
+    the `question` of the embedded flow. Unmapped keys are passed with the same name.
+    The output of the step is the value of the result key of the embedded flow. The
+    output mapping adds other outputs of the embedded flow to the parent flow.
+
+    The execution info of the step contains the results of the steps of the embedded
+    flow under "steps".
+
+    A Flow can only embed a Flow, while an AsyncFlow can embed a Flow or an AsyncFlow.
+
+    Args:
+        name (str): The name of the flow step.
+        flow (Union[Flow, AsyncFlow]): The flow to embed.
+        result_key (str): The output key of the embedded flow used as the output of the
+            step.
+        output_key (str): The key to use for the output.
+        input_mapping (Union[dict[str, str], None]): Optional mapping of keys of the
+            embedded flow to keys of the parent flow.
+        output_mapping (Union[dict[str, str], None]): Optional mapping of other output
+            keys of the embedded flow to keys of the parent flow.
+
+    Attributes:
+        required_keys (list[str]): The keys required for the flow step to run.
+        flow (Union[Flow, AsyncFlow]): The embedded flow.
+        result_key (str): The output key of the embedded flow used as the output of the
+            step.
+        input_mapping (dict[str, str]): The mapping of keys of the embedded flow to keys
+            of the parent flow.
+        output_mapping (dict[str, str]): The mapping of output keys of the embedded
+            flow to keys of the parent flow.
+
+    Raises:
+        ValueError: If the result key or a key of the output mapping is not an output
+            key of the embedded flow.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        flow: Any,
+        result_key: str,
+        output_key: str,
+        input_mapping: Union[dict[str, str], None] = None,
+        output_mapping: Union[dict[str, str], None] = None,
+    ):
+        super().__init__(name, output_key, None)
+        self.flow = flow
+        self.result_key = result_key
+        self.input_mapping = dict(input_mapping) if input_mapping else {}
+        self.output_mapping = dict(output_mapping) if output_mapping else {}
+
+        for key in [result_key, *self.output_mapping]:
+            if key not in flow.output_keys:
+                raise ValueError(f"'{key}' is not an output key of the embedded flow.")
+
+        flow_keys = set()
+        for step in flow.steps:
+            flow_keys.update(step.required_keys)
+        self.required_keys = sorted(
+            {
+                self.input_mapping.get(key, key)
+                for key in flow_keys - flow.output_keys
+            }
+        )
+
+    @property
+    def first_step(self) -> Any:
+        """The first step of the embedded flow."""
+        return self.flow.steps[0]
+
+    def get_flow_inputs(self, inputs: dict[str, Any]) -> dict[str, Any]:
+        """
+        Returns the inputs of the embedded flow.
+
+        Args:
+            inputs (dict[str, Any]): The required inputs of the step in the parent flow.
+
+        Returns:
+            dict[str, Any]: The inputs with the keys of the embedded flow.
+        """
+        parent_keys = {parent: child for child, parent in self.input_mapping.items()}
+        return {parent_keys.get(key, key): value for key, value in inputs.items()}
+
+    def get_execution_info(
+        self,
+        inputs: dict[str, Any],
+        flow_outputs: dict[str, Any],
+        flow_results: dict,
+        start_time: str,
+        start_perf_time: float,
+    ) -> dict:
+        """
+        Returns the execution info of the step after the embedded flow ran.
+
+        Args:
+            inputs (dict[str, Any]): The required inputs of the step in the parent flow.
+            flow_outputs (dict[str, Any]): The inputs and outputs of the embedded flow.
+            flow_results (dict): The results of the steps of the embedded flow.
+            start_time (str): The start time of the step.
+            start_perf_time (float): The performance counter at the start of the step.
+
+        Returns:
+            dict: The execution info of the step.
+        """
+        result = {self.output_key: flow_outputs.get(self.result_key)}
+        for child_key, parent_key in self.output_mapping.items():
+            result[parent_key] = flow_outputs.get(child_key)
+
+        return {
+            "start_time": start_time,
+            "end_time": datetime.datetime.now().isoformat(),
+            "execution_time": time.perf_counter() - start_perf_time,
+            "prompt_inputs": inputs,
+            "result": result,
+            "steps": flow_results,
+        }
+
+    def generate(
+        self, inputs: dict[str, Any]
+    ) -> tuple[Any, Union[dict, None], Union[dict, None]]:
+        """
+        The embedded flow is run by the scheduler of the parent flow, the step can't
+        run on its own.
+
+        Raises:
+            RuntimeError: Always.
+        """
+        raise RuntimeError(
+            f"The embedded flow '{self.name}' can only run as part of a Flow or "
+            "an AsyncFlow."
+        )
@@ -9,6 +9,8 @@ from typing import Any, Union
 from llmflows.llms.llm import BaseLLM
 from llmflows.prompts.prompt_template import PromptTemplate
 from llmflows.callbacks.base_callback import BaseCallback
+from llmflows.callbacks.callback_dispatcher import CallbackDispatcher
+from llmflows.caches.step_cache import BaseStepCache
 from llmflows.flows.base_flowstep import BaseFlowStep
 
 
@@ -25,6 +27,12 @@ class FlowStep(BaseFlowStep):
         prompt_template (PromptTemplate): Template for the prompt to be used with the 
             language model.
         callbacks (list[BaseCallback]): Callbacks to be invoked within the flowstep
+        cache (Union[BaseStepCache, None]): Optional cache used to memoize the
+            results of the flow step.
+        recording (Union[str, None]): Optional recording level of the execution
+            info, "minimal", "standard" or "full".
+        callback_dispatcher (Union[CallbackDispatcher, None]): Optional dispatcher
+            that runs the callbacks in the background.
 
     Attributes:
         llm (BaseLLM): The language model to be used in the flow step.
@@ -40,8 +48,13 @@ class FlowStep(BaseFlowStep):
         prompt_template: PromptTemplate,
         output_key: str,
         callbacks:  Union[list[BaseCallback], None] = None,
+        cache: Union[BaseStepCache, None] = None,
+        recording: Union[str, None] = None,
+        callback_dispatcher: Union[CallbackDispatcher, None] = None,
     ):
-        super().__init__(name, output_key, callbacks)
+        super().__init__(
+            name, output_key, callbacks, cache, recording, callback_dispatcher
+        )
         self.llm = llm
         self.prompt_template = prompt_template
         self.required_keys = prompt_template.variables
@@ -1,12 +1,20 @@
+# pylint: disable=R0913
 """
 LLMFlow module for the `FunctionalFlowstep` class that can be used to run a given
 function within a flow.
+
+By default the function runs on the thread of the flow. CPU-bound functions can run in
+an executor instead, e.g. a `ProcessPoolExecutor`, which doesn't hold the GIL of the
+flow while the function runs.
 """
 
 import inspect
+from concurrent.futures import Executor
 from typing import Callable, Any, Union
 from llmflows.flows.flowstep import BaseFlowStep
 from llmflows.callbacks.base_callback import BaseCallback
+from llmflows.callbacks.callback_dispatcher import CallbackDispatcher
+from llmflows.caches.step_cache import BaseStepCache
 
 
 class FunctionalFlowStep(BaseFlowStep):
@@ -21,10 +29,21 @@ class FunctionalFlowStep(BaseFlowStep):
         output_key (str): The key to use for the output.
         callbacks (list[Callback], optional): List of callback instances. Defaults to
             None.
+        cache (Union[BaseStepCache, None]): Optional cache used to memoize the
+            results of the flow step.
+        recording (Union[str, None]): Optional recording level of the execution
+            info, "minimal", "standard" or "full".
+        callback_dispatcher (Union[CallbackDispatcher, None]): Optional dispatcher
+            that runs the callbacks in the background.
+        executor (Union[Executor, None]): Optional executor, e.g. a
+            `ThreadPoolExecutor` or a `ProcessPoolExecutor`, used to run the function.
+            Functions run in a process pool must be picklable, i.e. defined at the top
+            level of a module. The executor is not shut down by the flow step.
 
     Attributes:
-        required_keys (set[str]): The keys required for the flow step to run.
+        required_keys (list[str]): The keys required for the flow step to run.
         fn (Callable[[dict[str, str]], str]): The function to be run.
+        executor (Union[Executor, None]): The executor used to run the function.
     """
 
     def __init__(
@@ -33,10 +52,18 @@ class FunctionalFlowStep(BaseFlowStep):
         flowstep_fn: Callable[..., str],
         output_key: str,
         callbacks: Union[list[BaseCallback], None] = None,
+        cache: Union[BaseStepCache, None] = None,
+        recording: Union[str, None] = None,
+        callback_dispatcher: Union[CallbackDispatcher, None] = None,
+        executor: Union[Executor, None] = None,
     ):
-        super().__init__(name, output_key, callbacks)
+        super().__init__(
+            name, output_key, callbacks, cache, recording, callback_dispatcher
+        )
         self.flowstep_fn = flowstep_fn
+        self.executor = executor
         self.required_keys = inspect.getfullargspec(self.flowstep_fn).args
+        self._fn_args = frozenset(self.required_keys)
 
     def generate(
         self, inputs: dict[str, Any]
@@ -51,19 +78,46 @@ class FunctionalFlowStep(BaseFlowStep):
             The result of the function call, followed by two None values (for call
                 data and config, which are not applicable in this case).
         """
-        # Get the argument names of fn
-        fn_args = inspect.getfullargspec(self.flowstep_fn).args
+        filtered_inputs = filter_inputs(inputs, self._fn_args)
+
+        if self.executor is None:
+            result = self.flowstep_fn(**filtered_inputs)
+        else:
+            result = self.executor.submit(self.flowstep_fn, **filtered_inputs).result()
+
+        return check_result(result), None, None
+
+
+def filter_inputs(inputs: dict[str, Any], fn_args: frozenset) -> dict[str, Any]:
+    """
+    Returns a new dictionary from inputs containing only the keys that the function
+    of a functional flow step requires.
+
+    Args:
+        inputs (dict[str, Any]): Input parameters as a dictionary.
+        fn_args (frozenset): The argument names of the function.
 
-        # Create a new dictionary from inputs containing only the keys that fn requires
-        filtered_inputs = {
-            key: value for key, value in inputs.items() if key in fn_args
-        }
+    Returns:
+        dict[str, Any]: The inputs of the function.
+    """
+    return {key: value for key, value in inputs.items() if key in fn_args}
 
-        result = self.flowstep_fn(**filtered_inputs)
 
-        if not isinstance(result, str):
-            raise TypeError(
-                f"Return value must be of type str, but got {type(result).__name__}"
-            )
+def check_result(result: Any) -> str:
+    """
+    Checks that the function of a functional flow step returned a string.
 
-        return result, None, None
+    Args:
+        result (Any): The return value of the function.
+
+    Returns:
+        str: The return value of the function.
+
+    Raises:
+        TypeError: If the return value is not a string.
+    """
+    if not isinstance(result, str):
+        raise TypeError(
+            f"Return value must be of type str, but got {type(result).__name__}"
+        )
+    return result
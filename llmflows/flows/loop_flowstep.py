@@ -0,0 +1,196 @@
+# pylint: disable=R0801, R0902, R0913
+"""
+LLMFlow module for the `LoopFlowStep` class that runs a flow repeatedly within another
+flow, e.g. the thought, action and observation steps of an agent.
+
+The flow of the loop is validated and traversed once. Each iteration runs its steps on
+a single state dictionary that is carried over to the next iteration, and all
+iterations are recorded within the span of the loop step.
+"""
+
+import inspect
+import contextvars
+from typing import Callable, Any, Union
+from llmflows.flows.flow import Flow
+from llmflows.flows.flowstep import BaseFlowStep
+from llmflows.flows.functional_flowstep import filter_inputs
+from llmflows.callbacks.base_callback import BaseCallback
+from llmflows.callbacks.callback_dispatcher import CallbackDispatcher
+from llmflows.caches.step_cache import BaseStepCache
+from llmflows.tracing.tracer import start_span
+
+# The verbose flag and recording level of the loop step run in progress.
+_run_options = contextvars.ContextVar("loop_run_options", default=(False, None))
+
+
+def get_fn_args(fn: Union[Callable, None]) -> frozenset:
+    """
+    Returns the argument names of an optional function.
+
+    Args:
+        fn (Union[Callable, None]): The function.
+
+    Returns:
+        frozenset: The argument names, empty if there is no function.
+    """
+    if fn is None:
+        return frozenset()
+    return frozenset(inspect.getfullargspec(fn).args)
+
+
+def get_loop_required_keys(
+    flow: Any, initial_state: dict, fn_args: frozenset
+) -> list[str]:
+    """
+    Returns the keys a loop step requires from its parent flow, i.e. the required keys
+    of the flow steps of the loop and the arguments of the loop functions that are
+    neither produced by the flow nor part of the initial state.
+
+    Args:
+        flow (Union[Flow, AsyncFlow]): The flow of the loop.
+        initial_state (dict): The initial values of the carried state.
+        fn_args (frozenset): The argument names of the loop functions.
+
+    Returns:
+        list[str]: The required keys.
+    """
+    keys = set(fn_args)
+    for step in flow.steps:
+        keys.update(step.required_keys)
+    return sorted(keys - flow.output_keys - set(initial_state))
+
+
+class LoopFlowStep(BaseFlowStep):
+    """
+    Represents a flow step that runs a flow repeatedly until a stop condition is met or
+        the maximum number of iterations is reached.
+
+    The stop and carry functions take the inputs of the loop step, the carried state
+    and the outputs of the last iteration as arguments, like the function of a
+    `FunctionalFlowStep`. The stop function returns True to stop the loop. The carry
+    function returns a dictionary with the updated state for the next iteration, e.g.
+    the history of an agent.
+
+    The result of the loop step is the value of the result key after the last
+    iteration. The call data contains the results of all iterations. The flow of the
+    loop prints its outputs if the loop step runs verbosely, and records the execution
+    info of its steps at the recording level of the loop step, unless the flow has its
+    own recording level.
+
+    Args:
+        name (str): The name of the flow step.
+        flow (Flow): The flow that runs in every iteration.
+        result_key (str): The output key of the flow used as the result of the loop.
+        output_key (str): The key to use for the output.
+        stop_fn (Callable[..., bool]): The function that decides if the loop stops.
+        carry_fn (Union[Callable[..., dict], None]): Optional function that updates
+            the carried state after each iteration.
+        initial_state (Union[dict, None]): Optional initial values of the carried state.
+        max_iterations (int): The maximum number of iterations. Defaults to 10.
+        callbacks (list[Callback], optional): List of callback instances. Defaults to
+            None.
+        cache (Union[BaseStepCache, None]): Optional cache used to memoize the
+            results of the flow step.
+        recording (Union[str, None]): Optional recording level of the execution
+            info, "minimal", "standard" or "full".
+        callback_dispatcher (Union[CallbackDispatcher, None]): Optional dispatcher
+            that runs the callbacks in the background.
+
+    Attributes:
+        required_keys (list[str]): The keys required for the flow step to run.
+        flow (Flow): The flow that runs in every iteration.
+        result_key (str): The output key of the flow used as the result of the loop.
+        stop_fn (Callable[..., bool]): The function that decides if the loop stops.
+        carry_fn (Union[Callable[..., dict], None]): The function that updates the
+            carried state.
+        initial_state (dict): The initial values of the carried state.
+        max_iterations (int): The maximum number of iterations.
+
+    Raises:
+        ValueError: If the result key is not an output key of the flow.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        flow: Flow,
+        result_key: str,
+        output_key: str,
+        stop_fn: Callable[..., bool],
+        carry_fn: Union[Callable[..., dict], None] = None,
+        initial_state: Union[dict, None] = None,
+        max_iterations: int = 10,
+        callbacks: Union[list[BaseCallback], None] = None,
+        cache: Union[BaseStepCache, None] = None,
+        recording: Union[str, None] = None,
+        callback_dispatcher: Union[CallbackDispatcher, None] = None,
+    ):
+        super().__init__(
+            name, output_key, callbacks, cache, recording, callback_dispatcher
+        )
+        if result_key not in flow.output_keys:
+            raise ValueError(f"'{result_key}' is not an output key of the loop flow.")
+
+        self.flow = flow
+        self.result_key = result_key
+        self.stop_fn = stop_fn
+        self.carry_fn = carry_fn
+        self.initial_state = dict(initial_state) if initial_state else {}
+        self.max_iterations = max_iterations
+        self._stop_args = get_fn_args(stop_fn)
+        self._carry_args = get_fn_args(carry_fn)
+        self.required_keys = get_loop_required_keys(
+            flow, self.initial_state, self._stop_args | self._carry_args
+        )
+
+    def run(
+        self,
+        inputs: dict[str, str],
+        verbose: bool = False,
+        recording: Union[str, None] = None,
+    ) -> dict[str, str]:
+        """
+        Runs the loop step, see `BaseFlowStep.run`. The verbose flag and the recording
+        level are passed on to the flow of the loop.
+        """
+        token = _run_options.set((verbose, self.recording or recording))
+        try:
+            return super().run(inputs, verbose, recording)
+        finally:
+            _run_options.reset(token)
+
+    def generate(
+        self, inputs: dict[str, Any]
+    ) -> tuple[Any, Union[dict, None], Union[dict, None]]:
+        """
+        Runs the flow of the loop until it stops.
+
+        Args:
+            inputs (dict[str, Any]): Input parameters as a dictionary.
+
+        Returns:
+            The value of the result key after the last iteration, the results of all
+                iterations as call data, and None for the config.
+        """
+        verbose, recording = _run_options.get()
+        state = {**self.initial_state, **inputs}
+        iterations = []
+        stopped = False
+
+        for index in range(self.max_iterations):
+            # Steps wait for the outputs of the current iteration, not the last one.
+            for key in self.flow.output_keys:
+                state.pop(key, None)
+
+            with start_span("iteration", "internal", loop=self.name, index=index):
+                iterations.append(self.flow.execute(state, verbose, recording))
+
+            if self.stop_fn(**filter_inputs(state, self._stop_args)):
+                stopped = True
+                break
+
+            if self.carry_fn is not None:
+                state.update(self.carry_fn(**filter_inputs(state, self._carry_args)))
+
+        call_data = {"iterations": iterations, "stopped": stopped}
+        return state.get(self.result_key), call_data, None
@@ -0,0 +1,200 @@
+# pylint: disable=R0801, R0902, R0913
+"""
+LLMFlow module for the `MapFlowStep` class that runs a flow step over every element of
+a list, e.g. to summarize every passage retrieved from a vector store.
+
+The flow step runs for the elements in parallel in a bounded thread pool, and the
+results are gathered in the order of the elements, so a following flow step can reduce
+them.
+"""
+
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Union
+from llmflows.flows.flowstep import BaseFlowStep
+from llmflows.callbacks.base_callback import BaseCallback
+from llmflows.callbacks.callback_dispatcher import CallbackDispatcher
+from llmflows.caches.step_cache import BaseStepCache
+
+# The verbose flag and recording level of the map step run in progress.
+_run_options = contextvars.ContextVar("map_run_options", default=(False, None))
+
+
+def get_map_required_keys(step: Any, items_key: str, item_key: str) -> set[str]:
+    """
+    Returns the keys a map step requires, i.e. the list of elements and the required
+    keys of the mapped flow step except the element.
+
+    The mapped flow step runs for several elements at the same time, so it can't be a
+    flow step with state shared between runs, e.g. a chat flow step with its message
+    history.
+
+    Args:
+        step (Union[BaseFlowStep, AsyncBaseFlowStep]): The mapped flow step.
+        items_key (str): The key of the list of elements.
+        item_key (str): The key the mapped flow step receives an element with.
+
+    Returns:
+        set[str]: The required keys.
+
+    Raises:
+        ValueError: If the mapped flow step doesn't require the item key or isn't
+            cacheable.
+    """
+    if not step.cacheable:
+        raise ValueError(
+            f"The flow step '{step.name}' can't be mapped, since its runs share state."
+        )
+    if item_key not in step.required_keys:
+        raise ValueError(f"The mapped flow step doesn't require '{item_key}'.")
+    return (set(step.required_keys) - {item_key}) | {items_key}
+
+
+def get_item_inputs(
+    inputs: dict[str, Any], items_key: str, item_key: str
+) -> list[dict[str, Any]]:
+    """
+    Returns the inputs of the mapped flow step for every element of the list.
+
+    Args:
+        inputs (dict[str, Any]): The inputs of the map step.
+        items_key (str): The key of the list of elements.
+        item_key (str): The key the mapped flow step receives an element with.
+
+    Returns:
+        list[dict[str, Any]]: The inputs for every element.
+
+    Raises:
+        TypeError: If the elements are not a list or a tuple.
+    """
+    items = inputs[items_key]
+    if not isinstance(items, (list, tuple)):
+        raise TypeError(
+            f"'{items_key}' must be a list or a tuple, but got {type(items).__name__}"
+        )
+    shared_inputs = {key: value for key, value in inputs.items() if key != items_key}
+    return [{**shared_inputs, item_key: item} for item in items]
+
+
+class MapFlowStep(BaseFlowStep):
+    """
+    Represents a flow step that runs another flow step over every element of a list.
+
+    The mapped flow step receives each element with the item key, together with its
+    other required keys. It isn't connected to any flow, it's only used as a template.
+    The result of the map step is the list of the results of the mapped flow step, in
+    the order of the elements. The call data contains the execution info of every run
+    of the mapped flow step.
+
+    The list of elements can be an input of the flow, the output of a vector store
+    flow step with `list_output` set to True or the output of another map step. Every
+    run of the map step uses a new thread pool that is shut down when the runs finish.
+    The mapped flow step prints its outputs if the map step runs verbosely, and records
+    its execution info at the recording level of the map step, unless it has its own
+    recording level. Flow steps that aren't cacheable, e.g. chat flow steps, can't be
+    mapped, since their runs would share state.
+
+    Args:
+        name (str): The name of the flow step.
+        flowstep (BaseFlowStep): The flow step to run for every element.
+        items_key (str): The key of the list of elements.
+        item_key (str): The key the mapped flow step receives an element with.
+        output_key (str): The key to use for the list of results.
+        max_concurrency (int): The maximum number of elements processed in parallel.
+            Defaults to 8.
+        callbacks (list[Callback], optional): List of callback instances. Defaults to
+            None.
+        cache (Union[BaseStepCache, None]): Optional cache used to memoize the
+            results of the flow step.
+        recording (Union[str, None]): Optional recording level of the execution
+            info, "minimal", "standard" or "full".
+        callback_dispatcher (Union[CallbackDispatcher, None]): Optional dispatcher
+            that runs the callbacks in the background.
+
+    Attributes:
+        required_keys (set[str]): The keys required for the flow step to run.
+        flowstep (BaseFlowStep): The flow step to run for every element.
+        items_key (str): The key of the list of elements.
+        item_key (str): The key the mapped flow step receives an element with.
+        max_concurrency (int): The maximum number of elements processed in parallel.
+
+    Raises:
+        ValueError: If the mapped flow step doesn't require the item key or isn't
+            cacheable.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        flowstep: BaseFlowStep,
+        items_key: str,
+        item_key: str,
+        output_key: str,
+        max_concurrency: int = 8,
+        callbacks: Union[list[BaseCallback], None] = None,
+        cache: Union[BaseStepCache, None] = None,
+        recording: Union[str, None] = None,
+        callback_dispatcher: Union[CallbackDispatcher, None] = None,
+    ):
+        super().__init__(
+            name, output_key, callbacks, cache, recording, callback_dispatcher
+        )
+        self.flowstep = flowstep
+        self.items_key = items_key
+        self.item_key = item_key
+        self.max_concurrency = max_concurrency
+        self.required_keys = get_map_required_keys(flowstep, items_key, item_key)
+
+    def run(
+        self,
+        inputs: dict[str, str],
+        verbose: bool = False,
+        recording: Union[str, None] = None,
+    ) -> dict[str, str]:
+        """
+        Runs the map step, see `BaseFlowStep.run`. The verbose flag and the recording
+        level are passed on to the mapped flow step.
+        """
+        token = _run_options.set((verbose, self.recording or recording))
+        try:
+            return super().run(inputs, verbose, recording)
+        finally:
+            _run_options.reset(token)
+
+    def generate(
+        self, inputs: dict[str, Any]
+    ) -> tuple[Any, Union[dict, None], Union[dict, None]]:
+        """
+        Runs the mapped flow step for every element of the list.
+
+        Args:
+            inputs (dict[str, Any]): Input parameters as a dictionary.
+
+        Returns:
+            The list of results, the execution info of every run as call data, and
+                None for the config.
+
+        Raises:
+            TypeError: If the elements are not a list or a tuple.
+        """
+        verbose, recording = _run_options.get()
+        item_inputs = get_item_inputs(inputs, self.items_key, self.item_key)
+
+        with ThreadPoolExecutor(
+            max_workers=self.max_concurrency, thread_name_prefix="llmflows-map"
+        ) as executor:
+            # Every run gets a copy of the current context to keep the active span.
+            futures = [
+                executor.submit(
+                    contextvars.copy_context().run,
+                    self.flowstep.run,
+                    item,
+                    verbose,
+                    recording,
+                )
+                for item in item_inputs
+            ]
+            runs = [future.result() for future in futures]
+
+        results = [run["result"][self.flowstep.output_key] for run in runs]
+        return results, {"runs": runs}, None
@@ -0,0 +1,137 @@
+"""
+This module contains the recording levels that control which details flow steps keep
+in their execution info.
+
+- "full" keeps everything, including the raw provider responses.
+- "standard" replaces the raw provider responses with the token usage they report and
+  drops the copy of the messages in the model configuration of chat steps.
+- "minimal" only keeps the results, timings, cache hits, retries, token usage and the
+  model name. Flow runs recorded at this level can't be reused by `rerun`, because
+  they don't record the inputs of the steps.
+"""
+
+from typing import Any, Union
+from llmflows.llms.llm_utils import get_token_usage
+
+MINIMAL = "minimal"
+STANDARD = "standard"
+FULL = "full"
+RECORDING_LEVELS = (MINIMAL, STANDARD, FULL)
+DEFAULT_RECORDING = FULL
+
+
+def validate_recording(recording: Union[str, None]) -> Union[str, None]:
+    """
+    Validates a recording level.
+
+    Args:
+        recording (Union[str, None]): The recording level or None to use the default.
+
+    Returns:
+        Union[str, None]: The validated recording level.
+
+    Raises:
+        ValueError: If the recording level is not one of "minimal", "standard" or
+            "full".
+    """
+    if recording is not None and recording not in RECORDING_LEVELS:
+        raise ValueError(
+            f"Invalid recording level '{recording}'. Valid levels are "
+            f"{', '.join(RECORDING_LEVELS)}."
+        )
+    return recording
+
+
+def _strip_call_data(call_data: Any, keep_details: bool) -> Any:
+    if not isinstance(call_data, dict):
+        return call_data if keep_details else None
+
+    usage = get_token_usage(call_data)
+    if keep_details:
+        stripped = {
+            key: value for key, value in call_data.items() if key != "raw_outputs"
+        }
+    else:
+        stripped = {"retries": call_data["retries"]} if "retries" in call_data else {}
+    if usage:
+        stripped["usage"] = usage
+    return stripped
+
+
+def _strip_model_config(model_config: Any, keep_details: bool) -> Any:
+    if not isinstance(model_config, dict):
+        return model_config if keep_details else None
+    if keep_details:
+        return {key: value for key, value in model_config.items() if key != "messages"}
+    if "model_name" in model_config:
+        return {"model_name": model_config["model_name"]}
+    return {}
+
+
+def record_execution_info(
+    execution_info: dict[str, Any], recording: str
+) -> dict[str, Any]:
+    """
+    Reduces the execution info of a flow step run to the given recording level.
+
+    The call data and model configuration are copied before they are reduced, so
+    cached step results are not modified.
+
+    Args:
+        execution_info (dict[str, Any]): The execution info of the flow step run.
+        recording (str): The recording level.
+
+    Returns:
+        dict[str, Any]: The execution info to keep.
+    """
+    if recording == FULL:
+        return execution_info
+
+    keep_details = recording == STANDARD
+    config_key = "config" if "config" in execution_info else "model_config"
+    recorded = {
+        key: value
+        for key, value in execution_info.items()
+        if keep_details or key != "prompt_inputs"
+    }
+    recorded["call_data"] = _strip_call_data(
+        execution_info.get("call_data"), keep_details
+    )
+    recorded[config_key] = _strip_model_config(
+        execution_info.get(config_key), keep_details
+    )
+    return recorded
+
+
+def get_reusable_results(
+    step: Any, required_inputs: dict[str, Any], previous_results: Union[dict, None]
+) -> Union[dict[str, Any], None]:
+    """
+    Returns the recorded results of a step from a previous run if the step received
+    exactly the same inputs in that run.
+
+    Steps that are not cacheable, like chat flow steps whose results depend on their
+    message history, are always executed again.
+
+    Args:
+        step (Any): The step to look up.
+        required_inputs (dict[str, Any]): The inputs the step would receive in this
+            run.
+        previous_results (Union[dict, None]): The results of a previous run.
+
+    Returns:
+        Union[dict[str, Any], None]: A copy of the previous execution info of the step
+            marked as reused, or None if the step has to be executed again.
+    """
+    if not previous_results or not getattr(step, "cacheable", True):
+        return None
+
+    previous = previous_results.get(step.name)
+    if (
+        not previous
+        or "result" not in previous
+        or previous.get("prompt_inputs") != required_inputs
+    ):
+        return None
+
+    return {**previous, "reused": True}
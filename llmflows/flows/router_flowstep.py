@@ -0,0 +1,115 @@
+# pylint: disable=R0913
+"""
+LLMFlow module for the `RouterFlowStep` class that can be used to route a flow to some
+of its branches.
+
+The router function picks the subsequent flow steps that run. The flow skips all other
+subsequent flow steps and the flow steps that depend on them, so skipped branches don't
+call any language model.
+"""
+
+import inspect
+from typing import Callable, Any, Union
+from llmflows.flows.flowstep import BaseFlowStep
+from llmflows.flows.functional_flowstep import filter_inputs
+from llmflows.callbacks.base_callback import BaseCallback
+from llmflows.callbacks.callback_dispatcher import CallbackDispatcher
+from llmflows.caches.step_cache import BaseStepCache
+
+
+class RouterFlowStep(BaseFlowStep):
+    """
+    Represents a flow step that routes the flow. The router function takes the
+        required inputs as arguments and returns the name of the subsequent flow step
+        to run, or a list of names. The result of the flow step is the returned route.
+
+    A flow step that is skipped doesn't produce its output key, so flow steps that
+    depend on a skipped flow step are skipped as well. The router can be used in a
+    Flow and in an AsyncFlow.
+
+    Flow steps only run once all of their parents have run, so a flow step connected
+    to several mutually exclusive branches never runs. Give every branch its own final
+    flow step instead of joining the branches.
+
+    Args:
+        name (str): The name of the flow step.
+        router_fn (Callable): The function that picks the route.
+        output_key (str): The key to use for the route.
+        callbacks (list[Callback], optional): List of callback instances. Defaults to
+            None.
+        cache (Union[BaseStepCache, None]): Optional cache used to memoize the
+            results of the flow step.
+        recording (Union[str, None]): Optional recording level of the execution
+            info, "minimal", "standard" or "full".
+        callback_dispatcher (Union[CallbackDispatcher, None]): Optional dispatcher
+            that runs the callbacks in the background.
+
+    Attributes:
+        required_keys (list[str]): The keys required for the flow step to run.
+        router_fn (Callable[..., Union[str, list[str]]]): The function that picks
+            the route.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        router_fn: Callable[..., Union[str, list[str]]],
+        output_key: str,
+        callbacks: Union[list[BaseCallback], None] = None,
+        cache: Union[BaseStepCache, None] = None,
+        recording: Union[str, None] = None,
+        callback_dispatcher: Union[CallbackDispatcher, None] = None,
+    ):
+        super().__init__(
+            name, output_key, callbacks, cache, recording, callback_dispatcher
+        )
+        self.router_fn = router_fn
+        self.required_keys = inspect.getfullargspec(self.router_fn).args
+        self._fn_args = frozenset(self.required_keys)
+
+    def generate(
+        self, inputs: dict[str, Any]
+    ) -> tuple[Any, Union[dict, None], Union[dict, None]]:
+        """
+        Runs the router function with the provided inputs.
+
+        Args:
+            inputs (dict[str, Any]): Input parameters as a dictionary.
+
+        Returns:
+            The route, followed by two None values (for call data and config, which
+                are not applicable in this case).
+
+        Raises:
+            ValueError: If the route contains names of steps that are not connected to
+                the router.
+        """
+        route = self.router_fn(**filter_inputs(inputs, self._fn_args))
+        names = [route] if isinstance(route, str) else list(route)
+
+        next_step_names = {step.name for step in self.next_steps}
+        unknown_names = [name for name in names if name not in next_step_names]
+        if unknown_names:
+            raise ValueError(
+                f"The router '{self.name}' returned steps that are not connected to "
+                f"it: {', '.join(unknown_names)}"
+            )
+
+        return route, None, None
+
+    def get_next_steps(self, outputs: dict[str, Any]) -> list[BaseFlowStep]:
+        """
+        Returns the subsequent flow steps picked by the router.
+
+        Args:
+            outputs (dict[str, Any]): The inputs and outputs available in the flow.
+
+        Returns:
+            list[BaseFlowStep]: The subsequent flow steps to run.
+        """
+        route = outputs.get(self.output_key)
+        if route is None:
+            return []
+
+        names = {route} if isinstance(route, str) else set(route)
+        return [step for step in self.next_steps if step.name in names]
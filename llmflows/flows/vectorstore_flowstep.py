@@ -13,6 +13,8 @@ from llmflows.prompts.prompt_template import PromptTemplate
 from llmflows.llms.llm import BaseLLM
 from llmflows.flows.flowstep import BaseFlowStep
 from llmflows.callbacks.base_callback import BaseCallback
+from llmflows.callbacks.callback_dispatcher import CallbackDispatcher
+from llmflows.caches.step_cache import BaseStepCache
 from llmflows.vectorstores.vector_store import VectorStore
 from llmflows.vectorstores.vector_doc import VectorDoc
 
@@ -25,8 +27,14 @@ class VectorStoreFlowStep(BaseFlowStep):
     then uses the embeddings model to embed the prompt, and finally uses the vector
     store to search for similar vectors.
 
+    Flow steps that run concurrently, e.g. in the runs of a `MapFlowStep` or of
+    concurrent flows, can share an `OpenAIEmbeddings` model created with a `batch_size`
+    larger than 1 to embed their queries in batched requests.
+
     If the `append_top_k` attribute is set to True, the top_k results will be appended
-    in the final result
+    in the final result. If the `list_output` attribute is set to True, the result is
+    the list of the texts of the top_k results instead, e.g. to run a flow step for
+    every result with a map flow step.
 
     Args:
         name (str): The name of the flow step.
@@ -40,6 +48,14 @@ class VectorStoreFlowStep(BaseFlowStep):
             False.
         callbacks (Union[list[BaseCallback], None]): Callbacks to be invoked during 
             while the flow is running.
+        cache (Union[BaseStepCache, None]): Optional cache used to memoize the
+            results of the flow step.
+        recording (Union[str, None]): Optional recording level of the execution
+            info, "minimal", "standard" or "full".
+        callback_dispatcher (Union[CallbackDispatcher, None]): Optional dispatcher
+            that runs the callbacks in the background.
+        list_output (bool, optional): Whether the result is the list of the texts of
+            the top_k results. Defaults to False.
 
     Attributes:
         embeddings_model (BaseLLM): The embeddings model instance to use.
@@ -49,6 +65,8 @@ class VectorStoreFlowStep(BaseFlowStep):
         vector_store (VectorStore): The vector store instance to use.
         top_k (int): The number of top results to return.
         append_top_k (bool): Whether to append top_k results.
+        list_output (bool): Whether the result is the list of the texts of the top_k
+            results.
     """
 
     def __init__(
@@ -61,14 +79,21 @@ class VectorStoreFlowStep(BaseFlowStep):
         top_k: int = 1,
         append_top_k: bool = False,
         callbacks: Union[list[BaseCallback], None] = None,
+        cache: Union[BaseStepCache, None] = None,
+        recording: Union[str, None] = None,
+        callback_dispatcher: Union[CallbackDispatcher, None] = None,
+        list_output: bool = False,
     ):
-        super().__init__(name, output_key, callbacks)
+        super().__init__(
+            name, output_key, callbacks, cache, recording, callback_dispatcher
+        )
         self.embeddings_model = embeddings_model
         self.prompt_template = prompt_template
         self.required_keys = prompt_template.variables
         self.vector_store = vector_store
         self.top_k = top_k
         self.append_top_k = append_top_k
+        self.list_output = list_output
 
     def generate(
         self, inputs: dict[str, Any]
@@ -79,6 +104,10 @@ class VectorStoreFlowStep(BaseFlowStep):
             embedded_question, top_k=self.top_k
         )
 
+        if self.list_output:
+            texts = [match["metadata"]["text"] for match in search_results]
+            return texts[: self.top_k], call_data, config
+
         result = search_results[0]["metadata"]["text"]
 
         if self.append_top_k:
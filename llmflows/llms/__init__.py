@@ -1,10 +1,46 @@
-# pylint: disable=missing-module-docstring
-from .openai import OpenAI
-from .openai_chat import OpenAIChat
-from .azure_openai import AzureOpenAI
-from .azure_openai_chat import AzureOpenAIChat
-from .claude_chat import ClaudeChat
-from .palm import PaLM
-from .palm_chat import PaLMChat
-from .openai_embeddings import OpenAIEmbeddings
+# pylint: disable=missing-module-docstring, R0801
+# Provider classes are imported on first access, so that importing llmflows only
+# imports the SDKs of the providers that are actually used.
+import importlib
+from typing import TYPE_CHECKING
 from .message_history import MessageHistory
+from .message_store import (
+    BaseMessageStore,
+    SQLiteMessageStore,
+    FileMessageStore,
+    MessageHistoryCache,
+)
+from .compaction import SummaryCompaction
+
+_LAZY_IMPORTS = {
+    "OpenAI": ".openai",
+    "OpenAIChat": ".openai_chat",
+    "AzureOpenAI": ".azure_openai",
+    "AzureOpenAIChat": ".azure_openai_chat",
+    "ClaudeChat": ".claude_chat",
+    "PaLM": ".palm",
+    "PaLMChat": ".palm_chat",
+    "OpenAIEmbeddings": ".openai_embeddings",
+}
+
+if TYPE_CHECKING:
+    from .openai import OpenAI
+    from .openai_chat import OpenAIChat
+    from .azure_openai import AzureOpenAI
+    from .azure_openai_chat import AzureOpenAIChat
+    from .claude_chat import ClaudeChat
+    from .palm import PaLM
+    from .palm_chat import PaLMChat
+    from .openai_embeddings import OpenAIEmbeddings
+
+
+def __getattr__(name):
+    if name in _LAZY_IMPORTS:
+        value = getattr(importlib.import_module(_LAZY_IMPORTS[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_IMPORTS))
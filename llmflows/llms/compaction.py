@@ -0,0 +1,332 @@
+# pylint: disable=R0913, R0902
+"""
+This module contains the SummaryCompaction class, which keeps long conversations short
+by replacing the oldest messages of a MessageHistory with a summary generated by a
+(usually cheaper) LLM.
+"""
+
+import asyncio
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Union
+from llmflows.llms.llm import BaseLLM
+from llmflows.llms.chat_llm import BaseChatLLM
+from llmflows.llms.message_history import MessageHistory
+from llmflows.prompts.prompt_template import PromptTemplate
+
+DEFAULT_SUMMARY_PROMPT = PromptTemplate(
+    "Summarize the following conversation. Keep all facts, names, decisions and open "
+    "questions that may be needed to continue the conversation.\n\n{conversation}"
+)
+
+
+def approximate_token_count(text: str) -> int:
+    """
+    Approximates the number of tokens in a text using four characters per token.
+
+    Args:
+        text (str): The text to count the tokens of.
+
+    Returns:
+        int: The approximate number of tokens.
+    """
+    return len(text) // 4 + 1
+
+
+class SummaryCompaction:
+    """
+    Compaction policy that summarizes the oldest part of a conversation once the
+    conversation grows above a token threshold.
+
+    The oldest messages, excluding the leading system prompt and the `keep_last` most
+    recent messages, are sent to the summarization LLM and replaced by a single summary
+    message. Previous summaries are part of the summarized span, so the summary rolls
+    forward as the conversation grows.
+
+    The `schedule` and `schedule_async` methods run the compaction in the background
+    so it doesn't add latency to the request that triggered it. The summary replaces
+    the span while the lock of the history is held, so messages added or removed by
+    other threads in the meantime are kept. Await `wait_async` before the event loop of
+    `schedule_async` closes, otherwise pending compactions are cancelled.
+
+    The summary is added as an assistant message by default, since a system message
+    in the middle of a conversation is not supported by every chat model.
+
+    Args:
+        llm (Union[BaseLLM, BaseChatLLM]): The LLM used to generate the summaries.
+        max_tokens (int): The token threshold above which a conversation is compacted.
+        keep_last (int): The number of most recent messages that are never summarized.
+        summary_prompt (PromptTemplate): The prompt used for the summarization. Must
+            contain a `conversation` variable.
+        summary_role (str): The role of the summary message in the history. Defaults
+            to "assistant".
+        token_counter (Callable[[str], int]): Function used to count the tokens of a
+            message. Defaults to an approximation of four characters per token.
+
+    Attributes:
+        llm (Union[BaseLLM, BaseChatLLM]): The LLM used to generate the summaries.
+        max_tokens (int): The token threshold above which a conversation is compacted.
+        keep_last (int): The number of most recent messages that are never summarized.
+        summary_prompt (PromptTemplate): The prompt used for the summarization.
+        summary_role (str): The role of the summary message in the history.
+        token_counter (Callable[[str], int]): Function used to count tokens.
+    """
+
+    def __init__(
+        self,
+        llm: Union[BaseLLM, BaseChatLLM],
+        max_tokens: int = 3000,
+        keep_last: int = 4,
+        summary_prompt: PromptTemplate = DEFAULT_SUMMARY_PROMPT,
+        summary_role: str = "assistant",
+        token_counter: Union[Callable[[str], int], None] = None,
+    ):
+        if summary_prompt.variables != {"conversation"}:
+            raise ValueError(
+                "The summary prompt must contain only the 'conversation' variable."
+            )
+
+        self.llm = llm
+        self.max_tokens = max_tokens
+        self.keep_last = keep_last
+        self.summary_prompt = summary_prompt
+        self.summary_role = MessageHistory.validate_role(summary_role)
+        self.token_counter = token_counter if token_counter else approximate_token_count
+        self._executor: Union[ThreadPoolExecutor, None] = None
+        # Keyed by the history itself, so it can't be collected while pending.
+        self._pending: dict[MessageHistory, Union[Future, asyncio.Task]] = {}
+        self._lock = threading.Lock()
+
+    def count_tokens(self, message_history: MessageHistory) -> int:
+        """
+        Counts the tokens of all messages in a message history.
+
+        Args:
+            message_history (MessageHistory): The message history.
+
+        Returns:
+            int: The number of tokens in the message history.
+        """
+        return sum(
+            self.token_counter(message["content"])
+            for message in message_history.messages
+        )
+
+    def needs_compaction(self, message_history: MessageHistory) -> bool:
+        """
+        Checks if a message history is above the token threshold and has messages that
+        can be summarized.
+
+        Args:
+            message_history (MessageHistory): The message history to check.
+
+        Returns:
+            bool: True if the message history should be compacted.
+        """
+        start, end = self._get_span(message_history)
+        if end - start < 2:
+            return False
+        return self.count_tokens(message_history) > self.max_tokens
+
+    def _get_span(self, message_history: MessageHistory) -> tuple[int, int]:
+        messages = message_history.messages
+        start = 1 if messages and messages[0]["role"] == "system" else 0
+        end = max(start, len(messages) - self.keep_last)
+        return start, end
+
+    def _build_prompt(self, span: list[dict[str, str]]) -> str:
+        conversation = "\n".join(
+            f"{message['role']}: {message['content']}" for message in span
+        )
+        return self.summary_prompt.get_prompt(conversation=conversation)
+
+    def _summary_history(self, prompt: str) -> MessageHistory:
+        summary_history = MessageHistory()
+        summary_history.add_user_message(prompt)
+        return summary_history
+
+    def _apply_summary(
+        self,
+        message_history: MessageHistory,
+        start: int,
+        span: list[dict[str, str]],
+        summary: str,
+    ) -> bool:
+        """
+        Replaces the summarized span with the summary message, unless the span was
+        modified while the summary was being generated. The span is looked up again
+        while the history is locked, since messages before it may have been added or
+        removed in the meantime.
+        """
+        with message_history.lock:
+            messages = message_history.messages
+            if start >= len(messages) or messages[start] is not span[0]:
+                start = next(
+                    (i for i, message in enumerate(messages) if message is span[0]),
+                    None,
+                )
+            current = [] if start is None else messages[start : start + len(span)]
+            if len(current) != len(span) or any(
+                old is not new for old, new in zip(span, current)
+            ):
+                logging.warning("Message history changed during compaction. Skipping.")
+                return False
+
+            summary_message = {
+                "role": self.summary_role,
+                "content": f"Summary of the earlier conversation:\n{summary}",
+            }
+            message_history.replace_range(start, start + len(span), [summary_message])
+            return True
+
+    def compact(self, message_history: MessageHistory) -> bool:
+        """
+        Summarizes the oldest span of a message history if it is above the token
+        threshold.
+
+        Args:
+            message_history (MessageHistory): The message history to compact.
+
+        Returns:
+            bool: True if the message history was compacted.
+        """
+        if not self.needs_compaction(message_history):
+            return False
+
+        start, end = self._get_span(message_history)
+        span = message_history.messages[start:end]
+        prompt = self._build_prompt(span)
+
+        if isinstance(self.llm, BaseChatLLM):
+            summary, _, _ = self.llm.generate(self._summary_history(prompt))
+        else:
+            summary, _, _ = self.llm.generate(prompt)
+
+        return self._apply_summary(message_history, start, span, summary)
+
+    async def compact_async(self, message_history: MessageHistory) -> bool:
+        """
+        Async version of `compact`.
+
+        Args:
+            message_history (MessageHistory): The message history to compact.
+
+        Returns:
+            bool: True if the message history was compacted.
+        """
+        if not self.needs_compaction(message_history):
+            return False
+
+        start, end = self._get_span(message_history)
+        span = message_history.messages[start:end]
+        prompt = self._build_prompt(span)
+
+        if isinstance(self.llm, BaseChatLLM):
+            summary, _, _ = await self.llm.generate_async(self._summary_history(prompt))
+        else:
+            summary, _, _ = await self.llm.generate_async(prompt)
+
+        return self._apply_summary(message_history, start, span, summary)
+
+    def _compact_safely(self, message_history: MessageHistory) -> bool:
+        try:
+            return self.compact(message_history)
+        except Exception as error:  # pylint: disable=broad-except
+            logging.warning("Compaction of message history failed: %s", str(error))
+            return False
+        finally:
+            with self._lock:
+                self._pending.pop(message_history, None)
+
+    async def _compact_async_safely(self, message_history: MessageHistory) -> bool:
+        try:
+            return await self.compact_async(message_history)
+        except Exception as error:  # pylint: disable=broad-except
+            logging.warning("Compaction of message history failed: %s", str(error))
+            return False
+        finally:
+            with self._lock:
+                self._pending.pop(message_history, None)
+
+    def schedule(self, message_history: MessageHistory) -> Union[Future, None]:
+        """
+        Compacts a message history in a background thread if it needs compaction and
+        no compaction of the same history is already running.
+
+        Args:
+            message_history (MessageHistory): The message history to compact.
+
+        Returns:
+            Union[Future, None]: The future of the background compaction or None if no
+                compaction was scheduled.
+        """
+        if not self.needs_compaction(message_history):
+            return None
+
+        with self._lock:
+            if message_history in self._pending:
+                return None
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=1, thread_name_prefix="llmflows-compaction"
+                )
+            future = self._executor.submit(self._compact_safely, message_history)
+            if not future.done():
+                self._pending[message_history] = future
+
+        return future
+
+    def schedule_async(
+        self, message_history: MessageHistory
+    ) -> Union[asyncio.Task, None]:
+        """
+        Compacts a message history in a background task on the running event loop if
+        it needs compaction and no compaction of the same history is already running.
+
+        Args:
+            message_history (MessageHistory): The message history to compact.
+
+        Returns:
+            Union[asyncio.Task, None]: The background task or None if no compaction was
+                scheduled.
+        """
+        if not self.needs_compaction(message_history):
+            return None
+
+        with self._lock:
+            if message_history in self._pending:
+                return None
+            task = asyncio.get_running_loop().create_task(
+                self._compact_async_safely(message_history)
+            )
+            self._pending[message_history] = task
+
+        return task
+
+    async def wait_async(self) -> None:
+        """
+        Waits for the compactions scheduled with `schedule_async` on the running event
+        loop to finish.
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            tasks = [
+                task
+                for task in self._pending.values()
+                if isinstance(task, asyncio.Task) and task.get_loop() is loop
+            ]
+        if tasks:
+            await asyncio.gather(*tasks)
+
+    def shutdown(self, wait: bool = True) -> None:
+        """
+        Stops the background thread used by `schedule`.
+
+        Args:
+            wait (bool): Whether to wait for running compactions to finish.
+        """
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
@@ -1,15 +1,19 @@
-# pylint: disable=R1710, W0719
+# pylint: disable=R1710, W0719, too-few-public-methods
 
 """Module containing helper functions for the LLM classes."""
 
+import json
 import time
 import asyncio
 import logging
+import threading
+from typing import Any, Awaitable, Callable, Hashable, Union
+from llmflows.tracing.tracer import start_span
 
 
 def call_with_retry(func, exceptions_to_retry, max_retries, *args, **kwargs):
     """
-    Repeatedly invokes the provided function up to the specified maximum number of 
+    Repeatedly invokes the provided function up to the specified maximum number of
     retries.
 
     Args:
@@ -35,14 +39,21 @@ def call_with_retry(func, exceptions_to_retry, max_retries, *args, **kwargs):
 
     while num_retries <= max_retries:
         try:
-            response = func(*args, **kwargs)
+            with start_span(
+                "request_attempt",
+                "llm",
+                function=getattr(func, "__qualname__", str(func)),
+                attempt=num_retries + 1,
+            ):
+                response = func(*args, **kwargs)
             return response, num_retries
 
         except exceptions_to_retry as error:
             num_retries += 1
             exceptions_encountered.append(error)
             logging.warning("Retrying: Attempt %s. Error: %s", num_retries, str(error))
-            time.sleep(min(delay, max_delay))
+            with start_span("retry_backoff", "internal", delay=min(delay, max_delay)):
+                time.sleep(min(delay, max_delay))
             delay *= delay_multiplier
 
         except Exception as error:
@@ -63,7 +74,7 @@ async def async_call_with_retry(
     async_func, exceptions_to_retry, max_retries, *args, **kwargs
 ):
     """
-    Repeatedly invokes the provided async function up to the specified maximum number 
+    Repeatedly invokes the provided async function up to the specified maximum number
     of retries.
 
     Args:
@@ -89,14 +100,21 @@ async def async_call_with_retry(
 
     while num_retries <= max_retries:
         try:
-            response = await async_func(*args, **kwargs)
+            with start_span(
+                "request_attempt",
+                "llm",
+                function=getattr(async_func, "__qualname__", str(async_func)),
+                attempt=num_retries + 1,
+            ):
+                response = await async_func(*args, **kwargs)
             return response, num_retries
 
         except exceptions_to_retry as error:
             num_retries += 1
             exceptions_encountered.append(error)
             logging.warning("Retrying: Attempt %s. Error: %s", num_retries, str(error))
-            await asyncio.sleep(min(delay, max_delay))
+            with start_span("retry_backoff", "internal", delay=min(delay, max_delay)):
+                await asyncio.sleep(min(delay, max_delay))
             delay *= delay_multiplier
 
         except Exception as error:
@@ -111,3 +129,323 @@ async def async_call_with_retry(
         raise Exception(
             f"All retries exhausted. Encountered exceptions:\n{error_messages}"
         )
+
+
+class SingleFlight:
+    """
+    Shares a single call between identical async calls that are in flight at the same
+    time. The first caller of a key starts the call, every other caller of the key
+    waits for it and receives the same result or exception. The key is forgotten as
+    soon as the call finishes, so later calls start a new one.
+
+    Calls are kept per event loop, since their results can only be awaited on the loop
+    that started them.
+    """
+
+    def __init__(self):
+        self._calls = {}
+
+    def in_flight(self) -> int:
+        """
+        Returns the number of calls that are currently in flight.
+
+        Returns:
+            int: The number of calls in flight.
+        """
+        return len(self._calls)
+
+    async def call(
+        self, key: Hashable, async_func: Callable[[], Awaitable[Any]]
+    ) -> tuple[Any, bool]:
+        """
+        Awaits the call of the given key, or starts it if none is in flight.
+
+        Args:
+            key (Hashable): The key identifying identical calls.
+            async_func (Callable[[], Awaitable]): Starts the call.
+
+        Returns:
+            tuple[Any, bool]: The result of the call, and whether the call was started
+                by another caller.
+        """
+        call_key = (asyncio.get_running_loop(), key)
+        task = self._calls.get(call_key)
+        shared = task is not None
+        if task is None:
+            task = asyncio.ensure_future(async_func())
+            self._calls[call_key] = task
+            task.add_done_callback(lambda _: self._calls.pop(call_key, None))
+
+        # A cancelled caller must not cancel the call for the other callers.
+        return await asyncio.shield(task), shared
+
+
+_single_flight = SingleFlight()
+
+
+async def single_flight_call_with_retry(
+    async_func, exceptions_to_retry, max_retries, **kwargs
+):
+    """
+    Calls `async_call_with_retry`, sharing the request between identical calls that are
+    in flight at the same time. Calls are identical if they use the same function and
+    keyword arguments, i.e. the same model parameters and payload.
+
+    Args:
+        async_func: The async function to be awaited.
+        exceptions_to_retry: A tuple of exception types to retry on.
+        max_retries: The maximum number of retry attempts.
+        **kwargs: Arbitrary keyword arguments for the function. Must be JSON
+            serializable.
+
+    Returns:
+        A tuple containing the response from the function, the number of retries, and
+        whether the response was coalesced, i.e. shared from a call started by another
+        caller. The response is shared by all identical calls and must not be modified.
+    """
+    key = (async_func, json.dumps(kwargs, sort_keys=True, default=str))
+    (response, retries), coalesced = await _single_flight.call(
+        key,
+        lambda: async_call_with_retry(
+            async_func, exceptions_to_retry, max_retries, **kwargs
+        ),
+    )
+    return response, retries, coalesced
+
+
+class _Batch:
+    """
+    The requests of a micro-batch that is being collected.
+    """
+
+    __slots__ = ("items", "futures", "timer")
+
+    def __init__(self):
+        self.items = []
+        self.futures = []
+        self.timer = None
+
+
+class MicroBatcher:
+    """
+    Collects concurrent async requests with the same key and sends them as a single
+    batch. A batch is sent when it reaches the maximum batch size, or when the maximum
+    wait time has passed since its first request. The results of the batch are returned
+    to the callers by position, and an error of the batch is raised for every caller.
+
+    Args:
+        batch_func (Callable): An async function that receives the key and the list of
+            requests of a batch and returns the list of their results in the same
+            order.
+        max_batch_size (int): The maximum number of requests in a batch.
+        max_wait (float): The maximum time in seconds a request waits for other
+            requests to join its batch.
+
+    Attributes:
+        max_batch_size (int): The maximum number of requests in a batch.
+        max_wait (float): The maximum time in seconds a request waits for other
+            requests to join its batch.
+    """
+
+    def __init__(
+        self,
+        batch_func: Callable[[Hashable, list], Awaitable[list]],
+        max_batch_size: int,
+        max_wait: float,
+    ):
+        if max_batch_size < 1:
+            raise ValueError("The maximum batch size must be at least 1.")
+        self.batch_func = batch_func
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._batches = {}
+        self._tasks = set()
+
+    async def submit(self, key: Hashable, item: Any) -> Any:
+        """
+        Adds a request to the batch of its key and waits for its result.
+
+        Args:
+            key (Hashable): The key of the batch, e.g. the model parameters.
+            item (Any): The request.
+
+        Returns:
+            Any: The result of the request.
+        """
+        loop = asyncio.get_running_loop()
+        batch_key = (loop, key)
+        batch = self._batches.get(batch_key)
+        if batch is None:
+            batch = self._batches[batch_key] = _Batch()
+            batch.timer = loop.call_later(self.max_wait, self._flush, batch_key)
+
+        future = loop.create_future()
+        batch.items.append(item)
+        batch.futures.append(future)
+        if len(batch.items) >= self.max_batch_size:
+            batch.timer.cancel()
+            self._flush(batch_key)
+
+        return await future
+
+    def _flush(self, batch_key: tuple) -> None:
+        batch = self._batches.pop(batch_key, None)
+        if batch is None:
+            return
+        task = asyncio.ensure_future(self._send(batch_key[1], batch))
+        # Keep a reference, the event loop only keeps weak references to tasks.
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _send(self, key: Hashable, batch: _Batch) -> None:
+        try:
+            results = await self.batch_func(key, batch.items)
+            if len(results) != len(batch.items):
+                raise ValueError(
+                    f"Expected {len(batch.items)} results for the batch, "
+                    f"got {len(results)}."
+                )
+        except Exception as error:  # pylint: disable=broad-exception-caught
+            for future in batch.futures:
+                if not future.done():
+                    future.set_exception(error)
+            return
+
+        for future, result in zip(batch.futures, results):
+            if not future.done():
+                future.set_result(result)
+
+
+class _ThreadBatch:
+    """
+    The requests of a micro-batch of concurrent threads that is being collected.
+    """
+
+    __slots__ = ("items", "results", "error", "full", "done")
+
+    def __init__(self):
+        self.items = []
+        self.results = None
+        self.error = None
+        self.full = threading.Event()
+        self.done = threading.Event()
+
+
+class ThreadMicroBatcher:
+    """
+    The blocking counterpart of MicroBatcher for requests made by concurrent threads,
+    e.g. the flow steps that run in the thread pool of a flow. The thread that makes
+    the first request of a batch waits for other requests and sends the batch, the
+    other threads wait for its results.
+
+    Args:
+        batch_func (Callable): A function that receives the key and the list of
+            requests of a batch and returns the list of their results in the same
+            order.
+        max_batch_size (int): The maximum number of requests in a batch.
+        max_wait (float): The maximum time in seconds a request waits for other
+            requests to join its batch.
+
+    Attributes:
+        max_batch_size (int): The maximum number of requests in a batch.
+        max_wait (float): The maximum time in seconds a request waits for other
+            requests to join its batch.
+    """
+
+    def __init__(
+        self,
+        batch_func: Callable[[Hashable, list], list],
+        max_batch_size: int,
+        max_wait: float,
+    ):
+        if max_batch_size < 1:
+            raise ValueError("The maximum batch size must be at least 1.")
+        self.batch_func = batch_func
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._batches = {}
+        self._lock = threading.Lock()
+
+    def submit(self, key: Hashable, item: Any) -> Any:
+        """
+        Adds a request to the batch of its key and waits for its result.
+
+        Args:
+            key (Hashable): The key of the batch, e.g. the model parameters.
+            item (Any): The request.
+
+        Returns:
+            Any: The result of the request.
+        """
+        with self._lock:
+            batch = self._batches.get(key)
+            is_sender = batch is None
+            if is_sender:
+                batch = self._batches[key] = _ThreadBatch()
+            index = len(batch.items)
+            batch.items.append(item)
+            if len(batch.items) >= self.max_batch_size:
+                del self._batches[key]
+                batch.full.set()
+
+        if is_sender:
+            batch.full.wait(self.max_wait)
+            with self._lock:
+                if self._batches.get(key) is batch:
+                    del self._batches[key]
+            self._send(key, batch)
+        else:
+            batch.done.wait()
+
+        if batch.error is not None:
+            raise batch.error
+        return batch.results[index]
+
+    def _send(self, key: Hashable, batch: _ThreadBatch) -> None:
+        try:
+            batch.results = self.batch_func(key, batch.items)
+            if len(batch.results) != len(batch.items):
+                raise ValueError(
+                    f"Expected {len(batch.items)} results for the batch, "
+                    f"got {len(batch.results)}."
+                )
+        except Exception as error:  # pylint: disable=broad-exception-caught
+            batch.error = error
+        finally:
+            batch.done.set()
+
+
+def get_token_usage(call_data: Union[dict, None]) -> dict[str, int]:
+    """
+    Extracts the token usage reported by the provider from the call data of a flow
+    step or LLM call.
+
+    Args:
+        call_data (Union[dict, None]): The call data returned by an LLM.
+
+    Returns:
+        dict[str, int]: The prompt, completion and total token counts that were reported
+            by the provider. Missing counts are omitted.
+    """
+    if not call_data:
+        return {}
+
+    raw_outputs: Any = call_data.get("raw_outputs")
+    try:
+        usage = raw_outputs["usage"]
+    except (KeyError, TypeError, IndexError, AttributeError):
+        # Call data recorded without the raw outputs keeps the usage on its own.
+        usage = call_data.get("usage")
+        if not isinstance(usage, dict):
+            return {}
+
+    token_usage = {}
+    for key in ("prompt_tokens", "completion_tokens", "total_tokens"):
+        try:
+            value = usage[key]
+        except (KeyError, TypeError, IndexError, AttributeError):
+            continue
+        if isinstance(value, int):
+            token_usage[key] = value
+
+    return token_usage
@@ -4,6 +4,10 @@ This module contains the MessageHistory class, which is used to store the conver
 history and the system prompt sent to OpenAI's chat API.
 """
 
+import sys
+import threading
+from typing import Union
+
 
 class MessageHistory:
     """
@@ -17,20 +21,47 @@ class MessageHistory:
     set of methods for managing the messages and system prompt. MessageHistory is used
     by the ChatLLM generate and generate_async methods.
 
+    A MessageHistory can optionally be backed by a message store. In that case the
+    messages are loaded lazily from the store on first access and written back with
+    `save()`. New messages are appended to the store, and the oldest messages removed
+    because of `max_messages` are removed from the store, while any other modification
+    (e.g. replacing or removing a message) rewrites the stored session.
+
     Args:
         max_messages (int): The maximum number of messages to store in the history.
+        session_id (Union[str, None]): The id of the session in the message store.
+        store (Union[BaseMessageStore, None]): Optional message store used to load and
+            persist the conversation history.
 
     Attributes:
         max_messages (int): The maximum number of messages to store in the history.
         messages (list[dict[str, str]]): The conversation history.
+        session_id (Union[str, None]): The id of the session in the message store.
+        store (Union[BaseMessageStore, None]): The message store backing the history.
+        lock (threading.RLock): Lock held by the methods that modify the history. Code
+            that reads and then modifies the history from several threads, e.g. a
+            background compaction, holds it for the whole operation.
     """
 
     def __init__(
         self,
         max_messages: int = 0,
+        session_id: Union[str, None] = None,
+        store=None,
     ):
+        if store is not None and session_id is None:
+            raise ValueError("A session_id is required when using a message store.")
+
         self.max_messages = max_messages
-        self.messages = []
+        self.session_id = session_id
+        self.store = store
+        self._loaded = store is None
+        self._persisted_count = 0
+        self._needs_rewrite = False
+        # Number of the oldest persisted messages removed because of max_messages.
+        self._trimmed = 0
+        self._messages = []
+        self.lock = threading.RLock()
 
     @property
     def system_prompt(self) -> str:
@@ -52,10 +83,14 @@ class MessageHistory:
         Args:
             new_prompt (str): The new system prompt.
         """
-        if not self.messages or self.messages[0]["role"] != "system":
-            self.messages.insert(0, {"role": "system", "content": new_prompt})
-        else:
-            self.update_system_prompt(new_prompt)
+        with self.lock:
+            if not self.messages or self.messages[0]["role"] != "system":
+                self.messages.insert(
+                    0, {"role": "system", "content": sys.intern(new_prompt)}
+                )
+                self._needs_rewrite = True
+            else:
+                self.update_system_prompt(new_prompt)
 
     def update_system_prompt(self, new_prompt: str):
         """
@@ -64,7 +99,12 @@ class MessageHistory:
         Args:
             new_prompt (str): The new system prompt.
         """
-        self.messages[0] = {"role": "system", "content": new_prompt}
+        with self.lock:
+            self.messages[0] = {
+                "role": "system",
+                "content": sys.intern(new_prompt),
+            }
+            self._needs_rewrite = True
 
     def get_conversation_string(self):
         """
@@ -78,7 +118,14 @@ class MessageHistory:
     def messages(self):
         """
         Returns the conversation history.
+
+        If the history is backed by a message store, the messages are loaded from the
+        store on first access.
         """
+        if not self._loaded:
+            with self.lock:
+                if not self._loaded:
+                    self._load()
         return self._messages
 
     @messages.setter
@@ -100,7 +147,82 @@ class MessageHistory:
             raise ValueError("messages must be a list of dicts")
         for item in value:
             self.validate_message(item)
-        self._messages = value
+        with self.lock:
+            self._messages = value
+            self._loaded = True
+            self._needs_rewrite = True
+            self._trimmed = 0
+
+    def _load(self) -> None:
+        """
+        Loads the conversation history from the message store. System prompts are
+        interned so that sessions sharing the same system prompt share one string.
+        """
+        messages = self.store.load(self.session_id)
+        for message in messages:
+            if message["role"] == "system":
+                message["content"] = sys.intern(message["content"])
+        self._messages = messages
+        self._loaded = True
+        self._persisted_count = len(messages)
+        self._needs_rewrite = False
+        self._trimmed = 0
+
+    def snapshot(self) -> list[dict[str, str]]:
+        """
+        Returns a copy of the current message list. The messages themselves are
+        shared with the history, so the copy only costs a reference per message.
+
+        Returns:
+            list[dict[str, str]]: The messages at the time of the call.
+        """
+        with self.lock:
+            return list(self.messages)
+
+    @property
+    def is_dirty(self) -> bool:
+        """
+        Returns True if the history has changes that are not yet saved in the store.
+        """
+        if not self._loaded:
+            return False
+        return (
+            self._needs_rewrite
+            or self._trimmed > 0
+            or self._persisted_count != len(self._messages)
+        )
+
+    def save(self) -> None:
+        """
+        Writes unsaved changes back to the message store.
+
+        Messages added since the last save are appended to the stored session, and the
+        oldest messages removed because of `max_messages` are then removed from it. If
+        a message was replaced or removed otherwise since the last save, the whole
+        session is rewritten instead. Does nothing if the history has no message store.
+        """
+        with self.lock:
+            if self.store is None or not self.is_dirty:
+                return
+
+            # The persisted messages that are still in the history.
+            kept = self._persisted_count - self._trimmed
+            if (
+                self._needs_rewrite
+                # The first message is kept, the removed ones must all be persisted.
+                or self._trimmed >= self._persisted_count
+                or kept > len(self._messages)
+            ):
+                self.store.replace(self.session_id, self._messages)
+            else:
+                if len(self._messages) > kept:
+                    self.store.append(self.session_id, self._messages[kept:])
+                if self._trimmed:
+                    self.store.remove_range(self.session_id, 1, self._trimmed)
+
+            self._persisted_count = len(self._messages)
+            self._needs_rewrite = False
+            self._trimmed = 0
 
     def add_user_message(self, message: str) -> None:
         """Adds a new user message to the conversation history."""
@@ -124,10 +246,16 @@ class MessageHistory:
         """
         role = self.validate_role(role)
 
-        if self.max_messages and (len(self.messages) >= self.max_messages):
-            self.remove_message(idx=1)
+        with self.lock:
+            if self.max_messages and (len(self.messages) >= self.max_messages):
+                if self._needs_rewrite:
+                    self.remove_message(idx=1)
+                else:
+                    # Removing the oldest message doesn't need a rewrite of the store.
+                    self.messages.pop(1)
+                    self._trimmed += 1
 
-        self.messages.append({"role": role, "content": message_str})
+            self.messages.append({"role": role, "content": message_str})
 
     @staticmethod
     def validate_role(role: str) -> str:
@@ -183,7 +311,24 @@ class MessageHistory:
         """
         message = {"role": new_role, "content": new_message}
         self.validate_message(message)
-        self.messages[idx] = message
+        with self.lock:
+            self.messages[idx] = message
+            self._needs_rewrite = True
+
+    def replace_range(self, start: int, end: int, new_messages: list[dict[str, str]]):
+        """
+        Replaces the messages between two indexes with a list of new messages.
+
+        Args:
+            start (int): The index of the first message to replace.
+            end (int): The index after the last message to replace.
+            new_messages (list[dict[str, str]]): The messages to insert instead.
+        """
+        for message in new_messages:
+            self.validate_message(message)
+        with self.lock:
+            self.messages[start:end] = new_messages
+            self._needs_rewrite = True
 
     def remove_message(self, idx=-1):
         """
@@ -192,4 +337,6 @@ class MessageHistory:
         Args:
             idx (int): The index of the message to remove.
         """
-        self.messages.pop(idx)
+        with self.lock:
+            self.messages.pop(idx)
+            self._needs_rewrite = True
@@ -0,0 +1,308 @@
+# pylint: disable=R0913
+"""
+This module contains the message stores used to persist MessageHistory objects across
+sessions and worker processes, and the MessageHistoryCache which keeps a bounded
+number of recently used histories in memory.
+"""
+
+import os
+import json
+import sqlite3
+import hashlib
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from llmflows.llms.message_history import MessageHistory
+
+
+class BaseMessageStore(ABC):
+    """
+    Base class for all message stores. A message store persists the messages of
+    many conversation sessions, each identified by a session id.
+    """
+
+    @abstractmethod
+    def load(self, session_id: str) -> list[dict[str, str]]:
+        """
+        Loads all messages of a session.
+
+        Args:
+            session_id (str): The id of the session.
+
+        Returns:
+            list[dict[str, str]]: The messages of the session or an empty list if the
+                session does not exist.
+        """
+
+    @abstractmethod
+    def append(self, session_id: str, messages: list[dict[str, str]]) -> None:
+        """
+        Appends messages to the end of a session.
+
+        Args:
+            session_id (str): The id of the session.
+            messages (list[dict[str, str]]): The messages to append.
+        """
+
+    @abstractmethod
+    def replace(self, session_id: str, messages: list[dict[str, str]]) -> None:
+        """
+        Replaces all messages of a session.
+
+        Args:
+            session_id (str): The id of the session.
+            messages (list[dict[str, str]]): The new messages of the session.
+        """
+
+    @abstractmethod
+    def delete(self, session_id: str) -> None:
+        """
+        Deletes a session and all of its messages.
+
+        Args:
+            session_id (str): The id of the session.
+        """
+
+    def remove_range(self, session_id: str, start: int, count: int) -> None:
+        """
+        Removes consecutive messages of a session, e.g. the oldest messages of a
+        history with a maximum number of messages. Stores that can remove messages
+        without rewriting the session should override this method.
+
+        Args:
+            session_id (str): The id of the session.
+            start (int): The index of the first message to remove.
+            count (int): The number of messages to remove.
+        """
+        messages = self.load(session_id)
+        del messages[start : start + count]
+        self.replace(session_id, messages)
+
+
+class SQLiteMessageStore(BaseMessageStore):
+    """
+    A message store that keeps all sessions in a single SQLite database.
+
+    Each message is stored as a separate row, so saving new messages only inserts the
+    new rows and removing the oldest messages only deletes their rows.
+
+    Args:
+        path (str): Path to the SQLite database file. Use ":memory:" for an in-memory
+            database.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS messages ("
+            "session_id TEXT NOT NULL, "
+            "position INTEGER NOT NULL, "
+            "role TEXT NOT NULL, "
+            "content TEXT NOT NULL, "
+            "PRIMARY KEY (session_id, position))"
+        )
+        self._connection.commit()
+
+    def load(self, session_id: str) -> list[dict[str, str]]:
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT role, content FROM messages WHERE session_id = ? "
+                "ORDER BY position",
+                (session_id,),
+            ).fetchall()
+        return [{"role": role, "content": content} for role, content in rows]
+
+    def append(self, session_id: str, messages: list[dict[str, str]]) -> None:
+        with self._lock:
+            # Positions only keep the order, removed messages leave gaps.
+            start = self._connection.execute(
+                "SELECT COALESCE(MAX(position) + 1, 0) FROM messages "
+                "WHERE session_id = ?",
+                (session_id,),
+            ).fetchone()[0]
+            self._insert(session_id, messages, start)
+            self._connection.commit()
+
+    def replace(self, session_id: str, messages: list[dict[str, str]]) -> None:
+        with self._lock:
+            self._connection.execute(
+                "DELETE FROM messages WHERE session_id = ?", (session_id,)
+            )
+            self._insert(session_id, messages, 0)
+            self._connection.commit()
+
+    def delete(self, session_id: str) -> None:
+        with self._lock:
+            self._connection.execute(
+                "DELETE FROM messages WHERE session_id = ?", (session_id,)
+            )
+            self._connection.commit()
+
+    def remove_range(self, session_id: str, start: int, count: int) -> None:
+        with self._lock:
+            self._connection.execute(
+                "DELETE FROM messages WHERE session_id = ? AND position IN ("
+                "SELECT position FROM messages WHERE session_id = ? "
+                "ORDER BY position LIMIT ? OFFSET ?)",
+                (session_id, session_id, count, start),
+            )
+            self._connection.commit()
+
+    def _insert(self, session_id: str, messages: list[dict[str, str]], start: int):
+        self._connection.executemany(
+            "INSERT INTO messages (session_id, position, role, content) "
+            "VALUES (?, ?, ?, ?)",
+            [
+                (session_id, start + i, message["role"], message["content"])
+                for i, message in enumerate(messages)
+            ],
+        )
+
+    def close(self) -> None:
+        """Closes the database connection."""
+        with self._lock:
+            self._connection.close()
+
+
+class FileMessageStore(BaseMessageStore):
+    """
+    A message store that keeps every session in a separate JSON Lines file.
+
+    New messages are appended to the end of the session file. The file names are
+    derived from a hash of the session id, so any string can be used as a session id.
+
+    Args:
+        directory (str): The directory where the session files are stored. It is
+            created if it doesn't exist.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _session_path(self, session_id: str) -> str:
+        file_name = hashlib.sha256(session_id.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, f"{file_name}.jsonl")
+
+    def load(self, session_id: str) -> list[dict[str, str]]:
+        path = self._session_path(session_id)
+        if not os.path.exists(path):
+            return []
+        with open(path, "r", encoding="utf-8") as session_file:
+            return [json.loads(line) for line in session_file if line.strip()]
+
+    def append(self, session_id: str, messages: list[dict[str, str]]) -> None:
+        with open(
+            self._session_path(session_id), "a", encoding="utf-8"
+        ) as session_file:
+            session_file.writelines(json.dumps(message) + "\n" for message in messages)
+
+    def replace(self, session_id: str, messages: list[dict[str, str]]) -> None:
+        path = self._session_path(session_id)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as session_file:
+            session_file.writelines(json.dumps(message) + "\n" for message in messages)
+        os.replace(tmp_path, path)
+
+    def delete(self, session_id: str) -> None:
+        path = self._session_path(session_id)
+        if os.path.exists(path):
+            os.remove(path)
+
+
+class MessageHistoryCache:
+    """
+    An in-memory LRU cache of MessageHistory objects in front of a message store.
+
+    Histories returned by the cache load their messages lazily from the store. When the
+    cache is full, the least recently used history is saved to the store and evicted,
+    which keeps memory usage bounded regardless of the number of sessions.
+
+    Histories are saved while the cache is locked, so a history that is being evicted
+    is completely saved before its session can be loaded again.
+
+    Args:
+        store (BaseMessageStore): The message store used to persist the histories.
+        max_sessions (int): The maximum number of histories kept in memory.
+        max_messages (int): The max_messages value for newly created histories.
+
+    Attributes:
+        store (BaseMessageStore): The message store used to persist the histories.
+        max_sessions (int): The maximum number of histories kept in memory.
+        max_messages (int): The max_messages value for newly created histories.
+    """
+
+    def __init__(
+        self, store: BaseMessageStore, max_sessions: int = 1000, max_messages: int = 0
+    ):
+        if max_sessions < 1:
+            raise ValueError("max_sessions must be at least 1")
+
+        self.store = store
+        self.max_sessions = max_sessions
+        self.max_messages = max_messages
+        self._histories: OrderedDict[str, MessageHistory] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._histories)
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self._histories
+
+    def get(self, session_id: str) -> MessageHistory:
+        """
+        Returns the history of a session, creating it if it is not in memory.
+
+        Args:
+            session_id (str): The id of the session.
+
+        Returns:
+            MessageHistory: The message history of the session.
+        """
+        with self._lock:
+            history = self._histories.get(session_id)
+            if history is not None:
+                self._histories.move_to_end(session_id)
+                return history
+
+            history = MessageHistory(
+                max_messages=self.max_messages, session_id=session_id, store=self.store
+            )
+            self._histories[session_id] = history
+            while len(self._histories) > self.max_sessions:
+                self._histories.popitem(last=False)[1].save()
+
+        return history
+
+    def save(self, session_id: str) -> None:
+        """
+        Saves the history of a session if it is in memory.
+
+        Args:
+            session_id (str): The id of the session.
+        """
+        with self._lock:
+            history = self._histories.get(session_id)
+            if history is not None:
+                history.save()
+
+    def flush(self) -> None:
+        """Saves all histories that are currently in memory."""
+        with self._lock:
+            for history in self._histories.values():
+                history.save()
+
+    def evict(self, session_id: str) -> None:
+        """
+        Saves the history of a session and removes it from memory.
+
+        Args:
+            session_id (str): The id of the session.
+        """
+        with self._lock:
+            history = self._histories.pop(session_id, None)
+            if history is not None:
+                history.save()
@@ -1,4 +1,4 @@
-# pylint: disable=too-few-public-methods, R0913, W0221
+# pylint: disable=too-few-public-methods, R0902, R0913, R0914, W0221
 
 """
 This module implements a wrapper for OpenAI completion models, using BaseLLM as a 
@@ -13,8 +13,14 @@ from openai.error import (
     APIConnectionError,
     ServiceUnavailableError,
 )
+from llmflows.tracing.tracer import start_span
 from .llm import BaseLLM
-from .llm_utils import call_with_retry, async_call_with_retry
+from .llm_utils import (
+    MicroBatcher,
+    call_with_retry,
+    async_call_with_retry,
+    single_flight_call_with_retry,
+)
 
 
 class OpenAI(BaseLLM):
@@ -31,11 +37,28 @@ class OpenAI(BaseLLM):
         max_tokens (int): The maximum number of tokens to generate.
         max_retries (int): The maximum number of retries for generating tokens.
         api_key (str): The API key to use for interacting with the OpenAI API.
+        single_flight (bool): Whether identical async requests that are in flight at
+            the same time share one API call. Defaults to False. The call data of a
+            request that received the response of another request's call has
+            "coalesced" set to True, and its retries and token usage are not counted
+            again by the metrics registry.
+        batch_size (int): The maximum number of concurrent async prompts sent in a
+            single multi-prompt request. Defaults to 1, which disables micro-batching.
+            The call data of a batched prompt differs from an unbatched one: its
+            "raw_outputs" is only the choice of that prompt instead of the whole
+            response, and the token usage of the request is attached to the call data
+            of the first prompt of the batch only.
+        batch_wait (float): The maximum time in seconds an async prompt waits for
+            other prompts to join its request. Defaults to 0.01.
 
     Attributes:
         temperature (float): The temperature to use for text generation.
         max_tokens (int): The maximum number of tokens to generate.
         max_retries (int): The maximum number of retries for generating tokens.
+        single_flight (bool): Whether identical async requests share one API call.
+        batch_size (int): The maximum number of async prompts in a single request.
+        batch_wait (float): The maximum time in seconds an async prompt waits for
+            other prompts to join its request.
     """
 
     def __init__(
@@ -45,11 +68,20 @@ class OpenAI(BaseLLM):
         temperature: float = 0.7,
         max_tokens: int = 500,
         max_retries: int = 3,
+        single_flight: bool = False,
+        batch_size: int = 1,
+        batch_wait: float = 0.01,
     ):
         super().__init__(model)
         self.temperature = temperature
         self.max_tokens = max_tokens
         self.max_retries = max_retries
+        self.single_flight = single_flight
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self._batcher = None
+        if batch_size > 1:
+            self._batcher = MicroBatcher(self._generate_batch, batch_size, batch_wait)
         self._api_key = api_key
         if not self._api_key:
             raise ValueError("You must provide OpenAI API key")
@@ -119,6 +151,9 @@ class OpenAI(BaseLLM):
         """
         Generates text from a given prompt using OpenAI API asynchronously.
 
+        If micro-batching is enabled, the raw response data of the prompt is its choice
+        of the batched response, see `batch_size`.
+
         Args:
             prompt (str): Text prompt for generation.
 
@@ -130,20 +165,99 @@ class OpenAI(BaseLLM):
         if not isinstance(prompt, str):
             raise TypeError("Prompt must be a string")
 
-        completion, retries = await async_call_with_retry(
-            async_func=openai.Completion.acreate,
-            exceptions_to_retry=(
+        if self._batcher is not None:
+            return await self._batcher.submit(
+                (self.model, self.max_tokens, self.temperature), prompt
+            )
+
+        request = {
+            "async_func": openai.Completion.acreate,
+            "exceptions_to_retry": (
                 APIError,
                 Timeout,
                 RateLimitError,
                 APIConnectionError,
                 ServiceUnavailableError,
             ),
-            max_retries=self.max_retries,
-            model=self.model,
-            prompt=prompt,
-            max_tokens=self.max_tokens,
-            temperature=self.temperature,
-        )
+            "max_retries": self.max_retries,
+            "model": self.model,
+            "prompt": prompt,
+            "max_tokens": self.max_tokens,
+            "temperature": self.temperature,
+        }
+        if self.single_flight:
+            completion, retries, coalesced = await single_flight_call_with_retry(
+                **request
+            )
+        else:
+            completion, retries = await async_call_with_retry(**request)
+            coalesced = False
 
-        return self._format_results(completion, retries)
+        text_result, call_data, model_config = self._format_results(completion, retries)
+        if coalesced:
+            call_data["coalesced"] = True
+        return text_result, call_data, model_config
+
+    async def _generate_batch(
+        self, params: tuple[str, int, float], prompts: list[str]
+    ) -> list[tuple[str, dict, dict]]:
+        """
+        Generates text for a micro-batch of prompts with a single multi-prompt request.
+
+        The raw outputs of every prompt are its choice of the response, not the whole
+        response, and the token usage of the request is reported in the call data of
+        the first prompt only, so the token counts of a batch are not counted more than
+        once.
+
+        Args:
+            params (tuple[str, int, float]): The model, max tokens and temperature.
+            prompts (list[str]): The prompts of the batch.
+
+        Returns:
+            list[tuple[str, dict, dict]]: The generated text, the raw response data,
+                and the model configuration of every prompt.
+        """
+        model, max_tokens, temperature = params
+        # With single flight, identical prompts in a batch are only sent once.
+        unique_prompts = list(dict.fromkeys(prompts)) if self.single_flight else prompts
+
+        with start_span(
+            "completion_batch", "llm", model=model, prompts=len(unique_prompts)
+        ):
+            completion, retries = await async_call_with_retry(
+                async_func=openai.Completion.acreate,
+                exceptions_to_retry=(
+                    APIError,
+                    Timeout,
+                    RateLimitError,
+                    APIConnectionError,
+                    ServiceUnavailableError,
+                ),
+                max_retries=self.max_retries,
+                model=model,
+                prompt=unique_prompts,
+                max_tokens=max_tokens,
+                temperature=temperature,
+            )
+
+        choices = sorted(completion["choices"], key=lambda choice: choice["index"])
+        positions = {prompt: i for i, prompt in enumerate(unique_prompts)}
+        model_config = {
+            "model_name": model,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+        }
+
+        results = []
+        for i, prompt in enumerate(prompts):
+            choice = choices[positions[prompt] if self.single_flight else i]
+            call_data = {
+                "raw_outputs": choice,
+                "retries": retries,
+                "batch_size": len(unique_prompts),
+            }
+            if i == 0 and completion.get("usage"):
+                call_data["usage"] = completion["usage"]
+            results.append((choice["text"], call_data, dict(model_config)))
+
+        return results
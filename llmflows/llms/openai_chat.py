@@ -13,7 +13,11 @@ from openai.error import (
     ServiceUnavailableError,
 )
 from llmflows.llms.chat_llm import BaseChatLLM
-from llmflows.llms.llm_utils import call_with_retry, async_call_with_retry
+from llmflows.llms.llm_utils import (
+    call_with_retry,
+    async_call_with_retry,
+    single_flight_call_with_retry,
+)
 from llmflows.llms.message_history import MessageHistory
 
 
@@ -35,12 +39,18 @@ class OpenAIChat(BaseChatLLM):
         max_retries (int): The maximum number of retries for generating tokens.
         verbose (bool): Whether to print debug information.
         api_key (str): The API key to use for interacting with the OpenAI API.
+        single_flight (bool): Whether identical async requests that are in flight at
+            the same time share one API call. Defaults to False. The call data of a
+            request that received the response of another request's call has
+            "coalesced" set to True, and its retries and token usage are not counted
+            again by the metrics registry.
 
     Attributes:
         temperature (float): The temperature to use for text generation.
         max_tokens (int): The maximum number of tokens to generate.
         max_retries (int): The maximum number of retries for generating tokens.
         verbose (bool): Whether to print debug information.
+        single_flight (bool): Whether identical async requests share one API call.
     """
 
     def __init__(
@@ -51,12 +61,14 @@ class OpenAIChat(BaseChatLLM):
         max_tokens: int = 250,
         max_retries: int = 3,
         verbose: bool = False,
+        single_flight: bool = False,
     ):
         super().__init__(model)
         self.temperature = temperature
         self.max_tokens = max_tokens
         self.max_retries = max_retries
         self.verbose = verbose
+        self.single_flight = single_flight
         self._api_key = api_key
         if not self._api_key:
             raise ValueError("You must provide OpenAI API key")
@@ -136,24 +148,33 @@ class OpenAIChat(BaseChatLLM):
                 configuration.
         """
 
-        completion, retries = await async_call_with_retry(
-            async_func=openai.ChatCompletion.acreate,
-            exceptions_to_retry=(
+        request = {
+            "async_func": openai.ChatCompletion.acreate,
+            "exceptions_to_retry": (
                 APIError,
                 Timeout,
                 RateLimitError,
                 APIConnectionError,
                 ServiceUnavailableError,
             ),
-            max_retries=self.max_retries,
-            model=self.model,
-            messages=message_history.messages,
-            max_tokens=self.max_tokens,
-            temperature=self.temperature,
-        )
+            "max_retries": self.max_retries,
+            "model": self.model,
+            "messages": message_history.messages,
+            "max_tokens": self.max_tokens,
+            "temperature": self.temperature,
+        }
+        if self.single_flight:
+            completion, retries, coalesced = await single_flight_call_with_retry(
+                **request
+            )
+        else:
+            completion, retries = await async_call_with_retry(**request)
+            coalesced = False
 
         str_message, call_data, model_config = self._format_results(
             model_outputs=completion, retries=retries, message_history=message_history
         )
+        if coalesced:
+            call_data["coalesced"] = True
 
         return str_message, call_data, model_config
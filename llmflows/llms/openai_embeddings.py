@@ -1,4 +1,4 @@
-# pylint: disable=too-few-public-methods, W0221, R0801
+# pylint: disable=too-few-public-methods, W0221, R0801, R0913
 
 """
 This module helps with creating embeddings form OpenAIs API.
@@ -14,8 +14,15 @@ from openai.error import (
     ServiceUnavailableError,
 )
 from llmflows.vectorstores.vector_doc import VectorDoc
-from llmflows.llms.llm_utils import call_with_retry, async_call_with_retry
+from llmflows.llms.llm_utils import (
+    MicroBatcher,
+    ThreadMicroBatcher,
+    call_with_retry,
+    async_call_with_retry,
+    single_flight_call_with_retry,
+)
 from llmflows.llms.embeddings import BaseEmbeddings
+from llmflows.tracing.tracer import start_span
 
 
 class OpenAIEmbeddings(BaseEmbeddings):
@@ -32,10 +39,20 @@ class OpenAIEmbeddings(BaseEmbeddings):
         model (str): The name of the OpenAI model to use.
         api_key (str): The API key to use for authentication.
         max_retries (int): The maximum number of retries for generating embeddings.
+        single_flight (bool): Whether identical async requests that are in flight at
+            the same time share one API call. Defaults to False.
+        batch_size (int): The maximum number of concurrent single VectorDoc requests
+            embedded in a single request. Defaults to 1, which disables batching.
+        batch_wait (float): The maximum time in seconds a single VectorDoc request
+            waits for other requests to join its batch. Defaults to 0.005.
 
     Attributes:
         _api_key (str): The API key to use for authentication.
         max_retries (int): The maximum number of retries for generating embeddings.
+        single_flight (bool): Whether identical async requests share one API call.
+        batch_size (int): The maximum number of single VectorDoc requests in a batch.
+        batch_wait (float): The maximum time in seconds a single VectorDoc request
+            waits for other requests to join its batch.
     """
 
     def __init__(
@@ -43,9 +60,24 @@ class OpenAIEmbeddings(BaseEmbeddings):
         api_key: str,
         model: str = "text-embedding-ada-002",
         max_retries: int = 3,
+        single_flight: bool = False,
+        batch_size: int = 1,
+        batch_wait: float = 0.005,
     ):
         super().__init__(model)
         self.max_retries = max_retries
+        self.single_flight = single_flight
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self._batcher = None
+        self._async_batcher = None
+        if batch_size > 1:
+            self._batcher = ThreadMicroBatcher(
+                self._embed_batch, batch_size, batch_wait
+            )
+            self._async_batcher = MicroBatcher(
+                self._embed_batch_async, batch_size, batch_wait
+            )
         self._api_key = api_key
         if not self._api_key:
             raise ValueError("You must provide OpenAI API key")
@@ -65,6 +97,10 @@ class OpenAIEmbeddings(BaseEmbeddings):
                 updated. If a list of VectorDocs was passed, returns the list with the
                 embedding field of each VectorDoc updated.
         """
+        if self._batcher is not None and not isinstance(docs, list):
+            docs.embedding = self._batcher.submit(self.model, docs.doc)
+            return docs
+
         single_item = False
 
         if not isinstance(docs, list):
@@ -73,19 +109,20 @@ class OpenAIEmbeddings(BaseEmbeddings):
 
         texts = [doc.doc for doc in docs]
 
-        result, _ = call_with_retry(
-            func=openai.Embedding.create,
-            exceptions_to_retry=(
-                APIError,
-                Timeout,
-                RateLimitError,
-                APIConnectionError,
-                ServiceUnavailableError,
-            ),
-            engine=self.model,
-            input=texts,
-            max_retries=self.max_retries,
-        )
+        with start_span("embeddings", "embedding", model=self.model, docs=len(texts)):
+            result, _ = call_with_retry(
+                func=openai.Embedding.create,
+                exceptions_to_retry=(
+                    APIError,
+                    Timeout,
+                    RateLimitError,
+                    APIConnectionError,
+                    ServiceUnavailableError,
+                ),
+                engine=self.model,
+                input=texts,
+                max_retries=self.max_retries,
+            )
 
         for i, doc in enumerate(docs):
             doc.embedding = result["data"][i]["embedding"]
@@ -106,6 +143,10 @@ class OpenAIEmbeddings(BaseEmbeddings):
                 updated. If a list of VectorDocs was passed, returns the list with the
                 embedding field of each VectorDoc updated.
         """
+        if self._async_batcher is not None and not isinstance(docs, list):
+            docs.embedding = await self._async_batcher.submit(self.model, docs.doc)
+            return docs
+
         single_item = False
 
         if not isinstance(docs, list):  # if a single item was passed
@@ -114,21 +155,97 @@ class OpenAIEmbeddings(BaseEmbeddings):
 
         texts = [doc.doc for doc in docs]
 
-        result, _ = await async_call_with_retry(
-            async_func=openai.Embedding.acreate,
-            exceptions_to_retry=(
-                APIError,
-                Timeout,
-                RateLimitError,
-                APIConnectionError,
-                ServiceUnavailableError,
-            ),
-            engine=self.model,
-            input=texts,
-            max_retries=self.max_retries,
-        )
+        with start_span("embeddings", "embedding", model=self.model, docs=len(texts)):
+            call = (
+                single_flight_call_with_retry
+                if self.single_flight
+                else async_call_with_retry
+            )
+            result, *_ = await call(
+                async_func=openai.Embedding.acreate,
+                exceptions_to_retry=(
+                    APIError,
+                    Timeout,
+                    RateLimitError,
+                    APIConnectionError,
+                    ServiceUnavailableError,
+                ),
+                engine=self.model,
+                input=texts,
+                max_retries=self.max_retries,
+            )
 
         for i, doc in enumerate(docs):
             doc.embedding = result["data"][i]["embedding"]
 
         return docs[0] if single_item else docs
+
+    def _embed_batch(self, model: str, texts: list[str]) -> list[list[float]]:
+        """
+        Embeds the texts of a batch of single VectorDoc requests with one request.
+        Identical texts are only embedded once.
+
+        Args:
+            model (str): The embeddings model.
+            texts (list[str]): The texts of the batch.
+
+        Returns:
+            list[list[float]]: The embedding of every text.
+        """
+        unique_texts = list(dict.fromkeys(texts))
+        with start_span("embeddings", "embedding", model=model, docs=len(unique_texts)):
+            result, _ = call_with_retry(
+                func=openai.Embedding.create,
+                exceptions_to_retry=(
+                    APIError,
+                    Timeout,
+                    RateLimitError,
+                    APIConnectionError,
+                    ServiceUnavailableError,
+                ),
+                engine=model,
+                input=unique_texts,
+                max_retries=self.max_retries,
+            )
+
+        return self._scatter_embeddings(result, unique_texts, texts)
+
+    async def _embed_batch_async(
+        self, model: str, texts: list[str]
+    ) -> list[list[float]]:
+        """
+        Async version of `_embed_batch`.
+
+        Args:
+            model (str): The embeddings model.
+            texts (list[str]): The texts of the batch.
+
+        Returns:
+            list[list[float]]: The embedding of every text.
+        """
+        unique_texts = list(dict.fromkeys(texts))
+        with start_span("embeddings", "embedding", model=model, docs=len(unique_texts)):
+            result, _ = await async_call_with_retry(
+                async_func=openai.Embedding.acreate,
+                exceptions_to_retry=(
+                    APIError,
+                    Timeout,
+                    RateLimitError,
+                    APIConnectionError,
+                    ServiceUnavailableError,
+                ),
+                engine=model,
+                input=unique_texts,
+                max_retries=self.max_retries,
+            )
+
+        return self._scatter_embeddings(result, unique_texts, texts)
+
+    @staticmethod
+    def _scatter_embeddings(
+        result, unique_texts: list[str], texts: list[str]
+    ) -> list[list[float]]:
+        embeddings = {
+            text: result["data"][i]["embedding"] for i, text in enumerate(unique_texts)
+        }
+        return [embeddings[text] for text in texts]
@@ -0,0 +1,10 @@
+# pylint: disable=missing-module-docstring
+from .registry import (
+    Counter,
+    Gauge,
+    Histogram,
+    MetricsRegistry,
+    set_registry,
+    get_registry,
+    track_flow,
+)
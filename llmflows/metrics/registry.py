@@ -0,0 +1,468 @@
+# pylint: disable=R0902
+"""
+This module contains the MetricsRegistry used to aggregate metrics about flow runs.
+
+The registry tracks step latency histograms per step and model, prompt and completion
+token counters based on the usage reported by providers, retry and error counters and
+gauges of the flows and steps in flight. Metrics are disabled by default and enabled by
+installing a registry with `set_registry`. While no registry is installed, flows and
+flow steps skip recording entirely.
+
+Metrics can be exported in the Prometheus text exposition format with `to_prometheus`
+or read as plain Python data with `snapshot`.
+"""
+
+import math
+import time
+import threading
+import contextlib
+from bisect import bisect_left
+from typing import Union
+from llmflows.llms.llm_utils import get_token_usage
+
+DEFAULT_LATENCY_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+)
+
+Labels = tuple[str, ...]
+
+
+def _escape_label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(label_names: Labels, label_values: Labels, extra: str = "") -> str:
+    labels = [
+        f'{name}="{_escape_label_value(value)}"'
+        for name, value in zip(label_names, label_values)
+    ]
+    if extra:
+        labels.append(extra)
+    return "{" + ",".join(labels) + "}" if labels else ""
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    """
+    Base class for metrics with a fixed set of label names.
+
+    Args:
+        name (str): The name of the metric.
+        description (str): The help text of the metric.
+        label_names (tuple[str, ...]): The names of the labels of the metric.
+    """
+
+    metric_type = ""
+
+    def __init__(self, name: str, description: str, label_names: Labels = ()):
+        self.name = name
+        self.description = description
+        self.label_names = tuple(label_names)
+        self._values: dict = {}
+        self._lock = threading.Lock()
+
+    def _samples(self) -> list[str]:
+        raise NotImplementedError
+
+    def to_prometheus(self) -> str:
+        """
+        Returns the metric in the Prometheus text exposition format.
+
+        Returns:
+            str: The HELP and TYPE lines followed by the samples of the metric.
+        """
+        lines = [
+            f"# HELP {self.name} {self.description}",
+            f"# TYPE {self.name} {self.metric_type}",
+        ]
+        lines.extend(self._samples())
+        return "\n".join(lines)
+
+    def clear(self) -> None:
+        """Removes all recorded values."""
+        with self._lock:
+            self._values = {}
+
+
+class Counter(_Metric):
+    """
+    A monotonically increasing value, e.g. the number of retries.
+
+    Args:
+        name (str): The name of the metric.
+        description (str): The help text of the metric.
+        label_names (tuple[str, ...]): The names of the labels of the metric.
+    """
+
+    metric_type = "counter"
+
+    def inc(self, labels: Labels = (), amount: float = 1) -> None:
+        """
+        Increments the counter.
+
+        Args:
+            labels (tuple[str, ...]): The label values, in the order of the label names.
+            amount (float): The amount to add.
+        """
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def get(self, labels: Labels = ()) -> float:
+        """Returns the value of the counter for the given label values."""
+        return self._values.get(labels, 0)
+
+    def snapshot(self) -> dict[Labels, float]:
+        """Returns the values of the counter by label values."""
+        with self._lock:
+            return dict(self._values)
+
+    def _samples(self) -> list[str]:
+        return [
+            f"{self.name}{_format_labels(self.label_names, labels)} "
+            f"{_format_value(value)}"
+            for labels, value in sorted(self.snapshot().items())
+        ]
+
+
+class Gauge(Counter):
+    """
+    A value that can go up and down, e.g. the number of steps in flight.
+
+    Args:
+        name (str): The name of the metric.
+        description (str): The help text of the metric.
+        label_names (tuple[str, ...]): The names of the labels of the metric.
+    """
+
+    metric_type = "gauge"
+
+    def dec(self, labels: Labels = (), amount: float = 1) -> None:
+        """
+        Decrements the gauge.
+
+        Args:
+            labels (tuple[str, ...]): The label values, in the order of the label names.
+            amount (float): The amount to subtract.
+        """
+        self.inc(labels, -amount)
+
+    def set(self, labels: Labels, value: float) -> None:
+        """
+        Sets the gauge to a value.
+
+        Args:
+            labels (tuple[str, ...]): The label values, in the order of the label names.
+            value (float): The new value.
+        """
+        with self._lock:
+            self._values[labels] = value
+
+
+class Histogram(_Metric):
+    """
+    Counts observations, e.g. latencies, in cumulative buckets.
+
+    Args:
+        name (str): The name of the metric.
+        description (str): The help text of the metric.
+        label_names (tuple[str, ...]): The names of the labels of the metric.
+        buckets (tuple[float, ...]): The upper bounds of the buckets.
+    """
+
+    metric_type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        label_names: Labels = (),
+        buckets: tuple[float, ...] = DEFAULT_LATENCY_BUCKETS,
+    ):
+        super().__init__(name, description, label_names)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, labels: Labels, value: float) -> None:
+        """
+        Records an observation.
+
+        Args:
+            labels (tuple[str, ...]): The label values, in the order of the label names.
+            value (float): The observed value.
+        """
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                # Per-bucket counts (with a final +Inf bucket), the sum and the count.
+                state = [[0] * (len(self.buckets) + 1), 0.0, 0]
+                self._values[labels] = state
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def snapshot(self) -> dict[Labels, dict]:
+        """
+        Returns the state of the histogram by label values.
+
+        Returns:
+            dict[tuple[str, ...], dict]: The cumulative bucket counts keyed by upper
+                bound, the sum and the count of the observations.
+        """
+        with self._lock:
+            values = {
+                labels: (list(counts), total, count)
+                for labels, (counts, total, count) in self._values.items()
+            }
+
+        snapshot = {}
+        for labels, (counts, total, count) in values.items():
+            cumulative = 0
+            buckets = {}
+            for bound, bucket_count in zip(self.buckets + (math.inf,), counts):
+                cumulative += bucket_count
+                buckets[bound] = cumulative
+            snapshot[labels] = {"buckets": buckets, "sum": total, "count": count}
+        return snapshot
+
+    def _samples(self) -> list[str]:
+        lines = []
+        for labels, state in sorted(self.snapshot().items()):
+            for bound, count in state["buckets"].items():
+                bucket_labels = _format_labels(
+                    self.label_names, labels, f'le="{_format_value(bound)}"'
+                )
+                lines.append(f"{self.name}_bucket{bucket_labels} {count}")
+            label_string = _format_labels(self.label_names, labels)
+            lines.append(f"{self.name}_sum{label_string} {_format_value(state['sum'])}")
+            lines.append(f"{self.name}_count{label_string} {state['count']}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Aggregates metrics about flow and flow step runs.
+
+    Args:
+        latency_buckets (tuple[float, ...]): The upper bounds of the latency histogram
+            buckets in seconds.
+        prefix (str): The prefix of all metric names.
+
+    Attributes:
+        step_latency (Histogram): Step run times by step and model.
+        prompt_tokens (Counter): Prompt tokens reported by providers by step and model.
+        completion_tokens (Counter): Completion tokens reported by providers by step
+            and model.
+        step_runs (Counter): Finished step runs by step and model.
+        cache_hits (Counter): Step runs served from the step cache by step.
+        retries (Counter): LLM call retries by step and model.
+        errors (Counter): Failed step runs by step and error type.
+        steps_in_flight (Gauge): Steps currently running by step.
+        flows_in_flight (Gauge): Flows currently running by flow class.
+        flow_latency (Histogram): Flow run times by flow class.
+    """
+
+    def __init__(
+        self,
+        latency_buckets: tuple[float, ...] = DEFAULT_LATENCY_BUCKETS,
+        prefix: str = "llmflows",
+    ):
+        self.step_latency = Histogram(
+            f"{prefix}_step_latency_seconds",
+            "Run time of flow steps.",
+            ("step", "model"),
+            latency_buckets,
+        )
+        self.prompt_tokens = Counter(
+            f"{prefix}_prompt_tokens_total",
+            "Prompt tokens reported by the providers.",
+            ("step", "model"),
+        )
+        self.completion_tokens = Counter(
+            f"{prefix}_completion_tokens_total",
+            "Completion tokens reported by the providers.",
+            ("step", "model"),
+        )
+        self.step_runs = Counter(
+            f"{prefix}_step_runs_total", "Finished flow step runs.", ("step", "model")
+        )
+        self.cache_hits = Counter(
+            f"{prefix}_step_cache_hits_total",
+            "Flow step runs served from the step cache.",
+            ("step",),
+        )
+        self.retries = Counter(
+            f"{prefix}_retries_total", "Retried LLM calls.", ("step", "model")
+        )
+        self.errors = Counter(
+            f"{prefix}_step_errors_total", "Failed flow step runs.", ("step", "error")
+        )
+        self.steps_in_flight = Gauge(
+            f"{prefix}_steps_in_flight", "Flow steps currently running.", ("step",)
+        )
+        self.flows_in_flight = Gauge(
+            f"{prefix}_flows_in_flight", "Flows currently running.", ("flow",)
+        )
+        self.flow_latency = Histogram(
+            f"{prefix}_flow_latency_seconds",
+            "Run time of flows.",
+            ("flow",),
+            latency_buckets,
+        )
+
+    @property
+    def metrics(self) -> list[_Metric]:
+        """All metrics of the registry."""
+        return [value for value in vars(self).values() if isinstance(value, _Metric)]
+
+    def record_step(self, step_name: str, execution_info: dict) -> None:
+        """
+        Records a finished flow step run. The retries and token usage of coalesced
+        responses, which have "coalesced" set to True in their call data, are not
+        counted, since the request that made the call already counts them.
+
+        Args:
+            step_name (str): The name of the flow step.
+            execution_info (dict): The execution info returned by the flow step.
+        """
+        model_config = execution_info.get("model_config", execution_info.get("config"))
+        model = ""
+        if isinstance(model_config, dict):
+            model = str(model_config.get("model_name", ""))
+        labels = (step_name, model)
+
+        self.step_runs.inc(labels)
+        self.step_latency.observe(labels, execution_info.get("execution_time", 0.0))
+        if execution_info.get("cache_hit"):
+            self.cache_hits.inc((step_name,))
+            return
+
+        call_data = execution_info.get("call_data")
+        if not isinstance(call_data, dict):
+            return
+
+        # A coalesced response reports the call made for another request.
+        if call_data.get("coalesced"):
+            return
+
+        retries = call_data.get("retries")
+        if isinstance(retries, int) and retries:
+            self.retries.inc(labels, retries)
+
+        usage = get_token_usage(call_data)
+        if "prompt_tokens" in usage:
+            self.prompt_tokens.inc(labels, usage["prompt_tokens"])
+        if "completion_tokens" in usage:
+            self.completion_tokens.inc(labels, usage["completion_tokens"])
+
+    @contextlib.contextmanager
+    def track_flow(self, flow_name: str):
+        """
+        Context manager that tracks a flow run in the in-flight gauge and the flow
+        latency histogram.
+
+        Args:
+            flow_name (str): The name of the flow, e.g. its class name.
+        """
+        labels = (flow_name,)
+        self.flows_in_flight.inc(labels)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.flows_in_flight.dec(labels)
+            self.flow_latency.observe(labels, time.perf_counter() - start)
+
+    def record_error(self, step_name: str, error: BaseException) -> None:
+        """
+        Records a failed flow step run.
+
+        Args:
+            step_name (str): The name of the flow step.
+            error (BaseException): The error raised by the flow step.
+        """
+        self.errors.inc((step_name, error.__class__.__name__))
+
+    def snapshot(self) -> dict[str, dict]:
+        """
+        Returns the current values of all metrics.
+
+        Returns:
+            dict[str, dict]: The values of each metric keyed by metric name. Counter
+                and gauge values and histogram states are keyed by their label values.
+        """
+        return {metric.name: metric.snapshot() for metric in self.metrics}
+
+    def to_prometheus(self) -> str:
+        """
+        Returns all metrics in the Prometheus text exposition format.
+
+        Returns:
+            str: The metrics, ready to be served on a `/metrics` endpoint.
+        """
+        return "\n".join(metric.to_prometheus() for metric in self.metrics) + "\n"
+
+    def clear(self) -> None:
+        """Removes all recorded values."""
+        for metric in self.metrics:
+            metric.clear()
+
+
+_REGISTRY = None
+_NULL_CONTEXT = contextlib.nullcontext()
+
+
+def set_registry(registry: Union[MetricsRegistry, None]) -> None:
+    """
+    Installs the metrics registry used by all flows. Pass None to disable metrics.
+
+    Args:
+        registry (Union[MetricsRegistry, None]): The registry to install.
+    """
+    global _REGISTRY  # pylint: disable=global-statement
+    _REGISTRY = registry
+
+
+def get_registry() -> Union[MetricsRegistry, None]:
+    """
+    Returns the installed metrics registry.
+
+    Returns:
+        Union[MetricsRegistry, None]: The installed registry or None if metrics are
+            disabled.
+    """
+    return _REGISTRY
+
+
+def track_flow(flow_name: str):
+    """
+    Tracks a flow run with the installed registry.
+
+    Args:
+        flow_name (str): The name of the flow, e.g. its class name.
+
+    Returns:
+        ContextManager: A context manager wrapping the flow run, which does nothing if
+            metrics are disabled.
+    """
+    if _REGISTRY is None:
+        return _NULL_CONTEXT
+    return _REGISTRY.track_flow(flow_name)
@@ -1,30 +1,99 @@
 """
-This module defines the PromptTemplate class which is used for generating 
+This module defines the PromptTemplate class which is used for generating
 prompts with variable values.
 """
 
 # pylint: disable=too-few-public-methods
 
+from operator import itemgetter
 from string import Formatter
+from typing import Any
 
 
 class PromptTemplate:
     """
     A class for generating prompts with variables.
 
+    The prompt is compiled once when the template is created, so rendering a prompt
+    doesn't need to parse the prompt string again. Templates that only use plain
+    variables (e.g. `{name}`) are rendered with a single printf-style substitution.
+    Templates using format specs, conversions or attribute access (e.g. `{value:.2f}`)
+    fall back to `str.format`.
+
     Args:
         prompt (str): The prompt string with variables.
+        escape_values (bool): If True, curly braces in the variable values are doubled
+            so the rendered prompt can be safely used as another prompt template.
 
     Attributes:
         prompt (str): The prompt string with variables.
         variables (List[str]): A list of variable names in the prompt string.
+        escape_values (bool): Whether curly braces in the values are escaped.
     """
 
-    def __init__(self, prompt: str):
+    def __init__(self, prompt: str, escape_values: bool = False):
         self.prompt = prompt
-        self.variables = {
-            fn for _, fn, _, _ in Formatter().parse(self.prompt) if fn is not None
-        }
+        self.escape_values = escape_values
+        parsed = list(Formatter().parse(self.prompt))
+        self.variables = {fn for _, fn, _, _ in parsed if fn is not None}
+        self._fields: tuple[str, ...] = ()
+        self._format_string = None
+        self._getter = None
+        self._compile(parsed)
+
+    def _compile(self, parsed: list) -> None:
+        """
+        Compiles the parsed prompt into a printf-style format string and the ordered
+        list of fields used to fill it. Leaves the template uncompiled if any field
+        needs the full `str.format` machinery.
+        """
+        literals = []
+        fields = []
+        for literal_text, field_name, format_spec, conversion in parsed:
+            literals.append(literal_text.replace("%", "%%"))
+            if field_name is None:
+                continue
+            if format_spec or conversion or not field_name.isidentifier():
+                return
+            literals.append("%s")
+            fields.append(field_name)
+
+        self._fields = tuple(fields)
+        self._format_string = "".join(literals)
+        if len(fields) == 1:
+            field = fields[0]
+            self._getter = lambda values: (values[field],)
+        elif fields:
+            self._getter = itemgetter(*fields)
+
+    @staticmethod
+    def escape(value: Any) -> Any:
+        """
+        Doubles the curly braces in a string so it can be used as a literal part of a
+        prompt template. Values that are not strings are returned unchanged.
+
+        Args:
+            value (Any): The value to escape.
+
+        Returns:
+            Any: The escaped value.
+        """
+        if isinstance(value, str) and ("{" in value or "}" in value):
+            return value.replace("{", "{{").replace("}", "}}")
+        return value
+
+    def _validate(self, values: dict[str, Any]) -> None:
+        if values.keys() != self.variables:
+            raise ValueError("The provided variables do not match the defined ones.")
+
+    def _render(self, values: dict[str, Any]) -> str:
+        if self.escape_values:
+            values = {key: self.escape(value) for key, value in values.items()}
+
+        if self._format_string is None:
+            return self.prompt.format(**values)
+
+        return self._format_string % self._getter(values)
 
     def get_prompt(self, **kwargs: str) -> str:
         """
@@ -36,13 +105,86 @@ class PromptTemplate:
         Returns:
             The prompt string with variables replaced by the provided values.
 
+        Raises:
+            ValueError: If the provided variables do not match the defined ones.
+        """
+        return self.render(kwargs)
+
+    def render(self, values: dict[str, Any]) -> str:
+        """
+        Returns the prompt string with variables replaced by the values in a dict.
+
+        Args:
+            values (dict[str, Any]): A dictionary of variable names and their values.
+
+        Returns:
+            The prompt string with variables replaced by the provided values.
+
         Raises:
             ValueError: If the provided variables do not match the defined ones.
         """
         if not self.variables:
             return self.prompt
 
-        if set(kwargs.keys()) != self.variables:
-            raise ValueError("The provided variables do not match the defined ones.")
+        self._validate(values)
+        return self._render(values)
+
+    def render_many(self, values_list: list[dict[str, Any]]) -> list[str]:
+        """
+        Renders a prompt for each dict of values in a list.
+
+        Args:
+            values_list (list[dict[str, Any]]): A list of dictionaries with variable
+                names and their values.
+
+        Returns:
+            list[str]: The rendered prompts in the same order as the values.
+
+        Raises:
+            ValueError: If the variables in any of the dicts do not match the defined
+                ones.
+        """
+        if not self.variables:
+            return [self.prompt] * len(values_list)
+
+        for values in values_list:
+            self._validate(values)
+        return [self._render(values) for values in values_list]
+
+    def render_columns(self, columns: dict[str, list[Any]]) -> list[str]:
+        """
+        Renders prompts from columnar data, where each variable maps to a list of
+        values and the i-th prompt uses the i-th value of every list.
+
+        Args:
+            columns (dict[str, list[Any]]): A dictionary of variable names and lists of
+                values. All lists must have the same length.
+
+        Returns:
+            list[str]: The rendered prompts.
+
+        Raises:
+            ValueError: If the provided variables do not match the defined ones or if
+                the columns have different lengths.
+        """
+        if not self.variables:
+            raise ValueError("render_columns requires a template with variables.")
+
+        self._validate(columns)
+        lengths = {len(column) for column in columns.values()}
+        if len(lengths) != 1:
+            raise ValueError("All columns must have the same length.")
+
+        if self._format_string is None:
+            return self.render_many(
+                [dict(zip(columns.keys(), row)) for row in zip(*columns.values())]
+            )
+
+        ordered_columns = [columns[field] for field in self._fields]
+        if self.escape_values:
+            ordered_columns = [
+                [self.escape(value) for value in column] for column in ordered_columns
+            ]
 
-        return self.prompt.format(**kwargs)
+        format_string = self._format_string
+        return [format_string % row for row in zip(*ordered_columns)]
@@ -0,0 +1,3 @@
+# pylint: disable=missing-module-docstring
+from .tracer import Tracer, Span, set_tracer, get_tracer, start_span, get_current_span
+from .exporters import to_chrome_trace, to_otlp_json
@@ -0,0 +1,147 @@
+"""
+This module contains functions that convert recorded spans to the Chrome trace event
+format and to the OTLP JSON format used by OpenTelemetry.
+"""
+
+import os
+import json
+from typing import Any
+
+OTLP_SPAN_KINDS = {
+    "flow": 1,
+    "step": 1,
+    "callback": 1,
+    "internal": 1,
+    "llm": 3,
+    "embedding": 3,
+    "vectorstore": 3,
+}
+
+
+def _json_value(value: Any) -> Any:
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+    return str(value)
+
+
+def to_chrome_trace(spans: list) -> dict:
+    """
+    Converts spans to the Chrome trace event format.
+
+    Every span becomes a complete ("X") event. Spans started by different threads or
+    asyncio tasks are placed on different lanes.
+
+    Args:
+        spans (list[Span]): The spans to convert.
+
+    Returns:
+        dict: The trace in the Chrome trace event format.
+    """
+    pid = os.getpid()
+    lanes: dict[int, int] = {}
+    events = []
+
+    for span in sorted(spans, key=lambda s: s.start_time):
+        lane = lanes.setdefault(span.lane_id, len(lanes) + 1)
+        args = {key: _json_value(value) for key, value in span.attributes.items()}
+        args["span_id"] = span.span_id
+        args["parent_id"] = span.parent_id
+        if span.error:
+            args["error"] = span.error
+
+        events.append(
+            {
+                "name": span.name,
+                "cat": span.kind,
+                "ph": "X",
+                "ts": span.start_time / 1000,
+                "dur": ((span.end_time or span.start_time) - span.start_time) / 1000,
+                "pid": pid,
+                "tid": lane,
+                "args": args,
+            }
+        )
+
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+def _otlp_value(value: Any) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def to_otlp_json(spans: list, service_name: str = "llmflows") -> dict:
+    """
+    Converts spans to the OTLP JSON format.
+
+    Args:
+        spans (list[Span]): The spans to convert.
+        service_name (str): The service name reported in the resource attributes.
+
+    Returns:
+        dict: The trace as an OTLP JSON `ExportTraceServiceRequest`.
+    """
+    otlp_spans = []
+    for span in spans:
+        otlp_span = {
+            "traceId": span.trace_id,
+            "spanId": span.span_id,
+            "name": span.name,
+            "kind": OTLP_SPAN_KINDS.get(span.kind, 1),
+            "startTimeUnixNano": str(span.start_time),
+            "endTimeUnixNano": str(span.end_time or span.start_time),
+            "attributes": [
+                {"key": key, "value": _otlp_value(value)}
+                for key, value in {
+                    "llmflows.kind": span.kind,
+                    **span.attributes,
+                }.items()
+                if value is not None
+            ],
+            "status": {"code": 2, "message": span.error} if span.error else {"code": 1},
+        }
+        if span.parent_id:
+            otlp_span["parentSpanId"] = span.parent_id
+        otlp_spans.append(otlp_span)
+
+    return {
+        "resourceSpans": [
+            {
+                "resource": {
+                    "attributes": [
+                        {"key": "service.name", "value": {"stringValue": service_name}}
+                    ]
+                },
+                "scopeSpans": [{"scope": {"name": "llmflows"}, "spans": otlp_spans}],
+            }
+        ]
+    }
+
+
+def write_chrome_trace(spans: list, path: str) -> None:
+    """
+    Writes spans to a file in the Chrome trace event format.
+
+    Args:
+        spans (list[Span]): The spans to write.
+        path (str): The path of the output file.
+    """
+    with open(path, "w", encoding="utf-8") as trace_file:
+        json.dump(to_chrome_trace(spans), trace_file)
+
+
+def write_otlp_json(spans: list, path: str) -> None:
+    """
+    Writes spans to a file in the OTLP JSON format.
+
+    Args:
+        spans (list[Span]): The spans to write.
+        path (str): The path of the output file.
+    """
+    with open(path, "w", encoding="utf-8") as trace_file:
+        json.dump(to_otlp_json(spans), trace_file)
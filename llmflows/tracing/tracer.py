@@ -0,0 +1,271 @@
+# pylint: disable=R0902, R0913
+"""
+This module contains the Tracer and Span classes used to trace flow runs.
+
+A tracer records nested spans for flow runs, flow steps, LLM request attempts, retry
+backoffs, callbacks, embedding calls and vector searches. Tracing is disabled by
+default and enabled by installing a tracer with `set_tracer`. While no tracer is
+installed, `start_span` returns a shared no-op span, so instrumented code pays almost
+nothing for tracing.
+"""
+
+import time
+import random
+import asyncio
+import threading
+import contextvars
+from typing import Any, Union
+from llmflows.tracing.exporters import write_chrome_trace, write_otlp_json
+
+_current_span: contextvars.ContextVar = contextvars.ContextVar(
+    "llmflows_current_span", default=None
+)
+_TRACER = None
+
+
+def _get_lane_id() -> int:
+    """
+    Returns the id of the current asyncio task, or of the current thread if no task is
+    running. Spans that run concurrently on the same thread end up on separate lanes.
+    """
+    try:
+        task = asyncio.current_task()
+    except RuntimeError:
+        task = None
+    return id(task) if task is not None else threading.get_ident()
+
+
+class Span:
+    """
+    A timed operation in a trace. Spans are context managers: entering a span makes it
+    the parent of all spans started within it, exiting the span ends it.
+
+    Args:
+        tracer (Tracer): The tracer that records the span.
+        name (str): The name of the span.
+        kind (str): The kind of operation, e.g. "flow", "step" or "llm".
+        attributes (dict[str, Any]): Attributes describing the operation.
+        parent (Union[Span, None]): The parent span.
+
+    Attributes:
+        name (str): The name of the span.
+        kind (str): The kind of operation.
+        attributes (dict[str, Any]): Attributes describing the operation.
+        trace_id (str): The id of the trace the span belongs to.
+        span_id (str): The id of the span.
+        parent_id (Union[str, None]): The id of the parent span.
+        start_time (int): The start time in nanoseconds since the epoch.
+        end_time (Union[int, None]): The end time in nanoseconds since the epoch.
+        lane_id (int): The id of the thread or asyncio task that started the span.
+        error (Union[str, None]): The error that ended the span, if any.
+    """
+
+    def __init__(
+        self,
+        tracer: "Tracer",
+        name: str,
+        kind: str,
+        attributes: dict[str, Any],
+        parent: Union["Span", None],
+    ):
+        self._tracer = tracer
+        self.name = name
+        self.kind = kind
+        self.attributes = attributes
+        self.trace_id = parent.trace_id if parent else f"{random.getrandbits(128):032x}"
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent.span_id if parent else None
+        self.start_time = time.time_ns()
+        self.end_time = None
+        self.lane_id = _get_lane_id()
+        self.error = None
+        self._token = None
+
+    @property
+    def duration(self) -> Union[float, None]:
+        """The duration of the span in seconds or None if the span is not finished."""
+        if self.end_time is None:
+            return None
+        return (self.end_time - self.start_time) / 1e9
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        """
+        Sets an attribute of the span.
+
+        Args:
+            key (str): The name of the attribute.
+            value (Any): The value of the attribute.
+        """
+        self.attributes[key] = value
+
+    def set_attributes(self, attributes: dict[str, Any]) -> None:
+        """
+        Sets multiple attributes of the span.
+
+        Args:
+            attributes (dict[str, Any]): The attributes to set.
+        """
+        self.attributes.update(attributes)
+
+    def end(self) -> None:
+        """Ends the span and records it in the tracer."""
+        if self.end_time is None:
+            self.end_time = time.time_ns()
+            self._tracer.record(self)
+
+    def __enter__(self) -> "Span":
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> bool:
+        if exc_value is not None:
+            self.error = f"{exc_type.__name__}: {exc_value}"
+        self.end()
+        if self._token is not None:
+            try:
+                _current_span.reset(self._token)
+            except ValueError:
+                # The span was exited in a different context than it was entered in.
+                _current_span.set(None)
+        return False
+
+
+class _NoOpSpan:
+    """Span returned by `start_span` when tracing is disabled."""
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        """Ignores the attribute."""
+
+    def set_attributes(self, attributes: dict[str, Any]) -> None:
+        """Ignores the attributes."""
+
+    def end(self) -> None:
+        """Does nothing."""
+
+    def __enter__(self) -> "_NoOpSpan":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> bool:
+        return False
+
+
+NOOP_SPAN = _NoOpSpan()
+
+
+class Tracer:
+    """
+    Records the spans of traced flow runs in memory until they are exported.
+
+    Args:
+        max_spans (Union[int, None]): Optional maximum number of finished spans to
+            keep. When the limit is reached, the oldest spans are dropped.
+
+    Attributes:
+        spans (list[Span]): The finished spans.
+        max_spans (Union[int, None]): The maximum number of finished spans to keep.
+    """
+
+    def __init__(self, max_spans: Union[int, None] = None):
+        self.spans: list[Span] = []
+        self.max_spans = max_spans
+        self._lock = threading.Lock()
+
+    def start_span(self, name: str, kind: str = "internal", **attributes) -> Span:
+        """
+        Starts a new span as a child of the current span.
+
+        Args:
+            name (str): The name of the span.
+            kind (str): The kind of operation.
+            **attributes: Attributes describing the operation.
+
+        Returns:
+            Span: The new span. Use it as a context manager to make it the current
+                span.
+        """
+        return Span(self, name, kind, attributes, _current_span.get())
+
+    def record(self, span: Span) -> None:
+        """
+        Records a finished span.
+
+        Args:
+            span (Span): The finished span.
+        """
+        with self._lock:
+            self.spans.append(span)
+            if self.max_spans is not None and len(self.spans) > self.max_spans:
+                del self.spans[: len(self.spans) - self.max_spans]
+
+    def clear(self) -> None:
+        """Removes all recorded spans."""
+        with self._lock:
+            self.spans = []
+
+    def export_chrome_trace(self, path: str) -> None:
+        """
+        Writes the recorded spans to a file in the Chrome trace event format, which can
+        be opened in chrome://tracing or Perfetto.
+
+        Args:
+            path (str): The path of the output file.
+        """
+        write_chrome_trace(list(self.spans), path)
+
+    def export_otlp_json(self, path: str) -> None:
+        """
+        Writes the recorded spans to a file in the OTLP JSON format used by
+        OpenTelemetry collectors.
+
+        Args:
+            path (str): The path of the output file.
+        """
+        write_otlp_json(list(self.spans), path)
+
+
+def set_tracer(tracer: Union[Tracer, None]) -> None:
+    """
+    Installs the tracer used by all flows. Pass None to disable tracing.
+
+    Args:
+        tracer (Union[Tracer, None]): The tracer to install.
+    """
+    global _TRACER  # pylint: disable=global-statement
+    _TRACER = tracer
+
+
+def get_tracer() -> Union[Tracer, None]:
+    """
+    Returns the installed tracer.
+
+    Returns:
+        Union[Tracer, None]: The installed tracer or None if tracing is disabled.
+    """
+    return _TRACER
+
+
+def start_span(name: str, kind: str = "internal", **attributes):
+    """
+    Starts a span with the installed tracer.
+
+    Args:
+        name (str): The name of the span.
+        kind (str): The kind of operation.
+        **attributes: Attributes describing the operation.
+
+    Returns:
+        Union[Span, _NoOpSpan]: The new span, or a no-op span if tracing is disabled.
+    """
+    if _TRACER is None:
+        return NOOP_SPAN
+    return _TRACER.start_span(name, kind, **attributes)
+
+
+def get_current_span() -> Union[Span, None]:
+    """
+    Returns the current span.
+
+    Returns:
+        Union[Span, None]: The current span or None if there is no active span.
+    """
+    return _current_span.get()
@@ -1,3 +1,37 @@
-# pylint: disable=missing-module-docstring
+# pylint: disable=missing-module-docstring, R0801
+# Vector store providers are imported on first access, so that importing llmflows
+# only imports the SDKs of the providers that are actually used. The ingestion
+# pipeline is imported lazily too, since it depends on llmflows.llms, which imports
+# VectorDoc from this package.
+import importlib
+from typing import TYPE_CHECKING
 from .vector_doc import VectorDoc
-from .pinecone import Pinecone
+
+_LAZY_IMPORTS = {
+    "Pinecone": ".pinecone",
+    "read_text_files": ".ingestion",
+    "TokenChunker": ".ingestion",
+    "IngestionProgress": ".ingestion",
+    "IngestionPipeline": ".ingestion",
+}
+
+if TYPE_CHECKING:
+    from .pinecone import Pinecone
+    from .ingestion import (
+        read_text_files,
+        TokenChunker,
+        IngestionProgress,
+        IngestionPipeline,
+    )
+
+
+def __getattr__(name):
+    if name in _LAZY_IMPORTS:
+        value = getattr(importlib.import_module(_LAZY_IMPORTS[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_IMPORTS))
@@ -0,0 +1,483 @@
+# pylint: disable=R0902, R0913, too-few-public-methods
+"""
+This module contains a streaming ingestion pipeline that loads documents, splits them
+into chunks, embeds the chunks and upserts them into a vector store.
+
+The stages of the pipeline are connected by bounded queues, so they run at the same
+time: the next batch of chunks is embedded while the previous one is upserted, and
+reading the source pauses when the embeddings model or the vector store can't keep
+up. Only a few batches are in memory at any time, whatever the size of the corpus.
+"""
+
+import os
+import time
+import queue
+import asyncio
+import re
+import threading
+from typing import Any, AsyncIterable, Callable, Iterable, Iterator, Union
+from uuid import uuid4
+from llmflows.llms.compaction import approximate_token_count
+from llmflows.llms.embeddings import BaseEmbeddings
+from llmflows.vectorstores.vector_doc import VectorDoc
+from llmflows.vectorstores.vector_store import VectorStore
+from llmflows.tracing.tracer import start_span
+
+_DONE = object()
+_WORD = re.compile(r"\S+")
+
+
+def _split_words(blocks: Iterable[str]) -> Iterator[str]:
+    # A word at the end of a block may continue in the next one, so it is carried
+    # over instead of being yielded.
+    partial = ""
+    for block in blocks:
+        text = partial + block
+        partial = ""
+        for match in _WORD.finditer(text):
+            if match.end() == len(text):
+                partial = match.group()
+            else:
+                yield match.group()
+    if partial:
+        yield partial
+
+
+def read_text_files(
+    paths: Iterable[str],
+    encoding: str = "utf-8",
+    chunker: Union["TokenChunker", None] = None,
+    block_size: int = 65536,
+) -> Iterator[VectorDoc]:
+    """
+    Reads text files one at a time. Directories are read recursively.
+
+    Without a chunker, the whole text of each file is loaded into memory. With a
+    chunker, the files are read in blocks of `block_size` characters and split into
+    chunks as they are read, so large files are never loaded at once. The chunks
+    are yielded instead of the files, so the chunker should not be given to the
+    IngestionPipeline as well.
+
+    Args:
+        paths (Iterable[str]): The paths of the files or directories.
+        encoding (str): The encoding of the files. Defaults to "utf-8".
+        chunker (Union[TokenChunker, None]): Optional chunker that splits the files
+            while they are read. Defaults to None.
+        block_size (int): The number of characters read at once when a chunker is
+            given. Defaults to 65536.
+
+    Yields:
+        VectorDoc: A document with the text of a file, or a chunk of it if a chunker
+            is given, and the file path as the "source" metadata.
+    """
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, files in os.walk(path):
+                yield from read_text_files(
+                    (os.path.join(root, name) for name in sorted(files)),
+                    encoding,
+                    chunker,
+                    block_size,
+                )
+            continue
+
+        with open(path, encoding=encoding) as file:
+            if chunker is None:
+                yield VectorDoc(doc=file.read(), metadata={"source": path})
+                continue
+            yield from chunker.chunk_stream(
+                iter(lambda file=file: file.read(block_size), ""),
+                doc_id=str(uuid4()),
+                metadata={"source": path},
+            )
+
+
+class TokenChunker:
+    """
+    Splits documents into chunks of at most `max_tokens` tokens on word boundaries.
+    Consecutive chunks share up to `overlap` tokens, so a sentence cut by a chunk
+    boundary is still found by searches.
+
+    The words are read one at a time, so only the current chunk is kept in memory.
+    Each word is first estimated with the token counter, and the text of the chunk
+    is counted as a whole when the estimate reaches `max_tokens`, so the chunks are
+    filled up to the limit of the joined text.
+
+    Args:
+        max_tokens (int): The maximum number of tokens of a chunk. Defaults to 500.
+        overlap (int): The number of tokens shared by consecutive chunks. Defaults
+            to 50.
+        token_counter (Callable[[str], int]): Function used to count the tokens of a
+            text. Defaults to an approximation of four characters per token.
+
+    Attributes:
+        max_tokens (int): The maximum number of tokens of a chunk.
+        overlap (int): The number of tokens shared by consecutive chunks.
+        token_counter (Callable[[str], int]): Function used to count tokens.
+
+    Raises:
+        ValueError: If the overlap is not smaller than the maximum number of tokens.
+    """
+
+    def __init__(
+        self,
+        max_tokens: int = 500,
+        overlap: int = 50,
+        token_counter: Union[Callable[[str], int], None] = None,
+    ):
+        if not 0 <= overlap < max_tokens:
+            raise ValueError("The overlap must be smaller than the maximum tokens.")
+        self.max_tokens = max_tokens
+        self.overlap = overlap
+        self.token_counter = token_counter if token_counter else approximate_token_count
+
+    def _overlap(self, words: list) -> list:
+        # Keep the last words of the chunk as the start of the next one.
+        kept = []
+        for i in range(len(words) - 1, -1, -1):
+            if self.token_counter(" ".join(words[i:])) > self.overlap:
+                break
+            kept = words[i:]
+        return kept
+
+    def _chunk_texts(self, words: Iterable[str]) -> Iterator[str]:
+        chunk = []
+        tokens = 0
+        for word in words:
+            word_tokens = self.token_counter(word)
+            if chunk and tokens + word_tokens > self.max_tokens:
+                # The sum of the words overestimates the joined text, so count it.
+                text = " ".join(chunk + [word])
+                tokens = self.token_counter(text)
+                if tokens <= self.max_tokens:
+                    chunk.append(word)
+                    continue
+                yield " ".join(chunk)
+                chunk = self._overlap(chunk)
+                tokens = self.token_counter(" ".join(chunk + [word]))
+                if tokens > self.max_tokens:
+                    chunk = []
+                    tokens = word_tokens
+            else:
+                tokens += word_tokens
+            chunk.append(word)
+
+        if chunk:
+            yield " ".join(chunk)
+
+    def chunk_stream(
+        self,
+        blocks: Iterable[str],
+        doc_id: Union[str, None] = None,
+        metadata: Union[dict, None] = None,
+    ) -> Iterator[VectorDoc]:
+        """
+        Splits a text that is read in blocks into chunks. A word can be cut between
+        two blocks.
+
+        Args:
+            blocks (Iterable[str]): The blocks of the text, e.g. the reads of a file.
+            doc_id (Union[str, None]): The id of the document. A new UUID is
+                generated if not provided.
+            metadata (Union[dict, None]): The metadata of the document.
+
+        Yields:
+            VectorDoc: The chunks. Their ids are the document id followed by the
+                position of the chunk, and their metadata is the metadata of the
+                document with the "parent_id" and the "chunk" position.
+        """
+        doc_id = doc_id if doc_id is not None else str(uuid4())
+        metadata = metadata if metadata is not None else {}
+        for i, text in enumerate(self._chunk_texts(_split_words(blocks))):
+            yield VectorDoc(
+                doc=text,
+                doc_id=f"{doc_id}-{i}",
+                metadata={**metadata, "parent_id": doc_id, "chunk": i},
+            )
+
+    def chunk(self, doc: VectorDoc) -> Iterator[VectorDoc]:
+        """
+        Splits a document into chunks.
+
+        Args:
+            doc (VectorDoc): The document to split.
+
+        Yields:
+            VectorDoc: The chunks. Their ids are the document id followed by the
+                position of the chunk, and their metadata is the metadata of the
+                document with the "parent_id" and the "chunk" position.
+        """
+        yield from self.chunk_stream((doc.doc,), doc.doc_id, doc.metadata)
+
+
+class IngestionProgress:
+    """
+    The progress of an ingestion pipeline run.
+
+    Attributes:
+        docs (int): The number of documents read from the source.
+        chunks (int): The number of chunks created.
+        embedded (int): The number of chunks embedded.
+        upserted (int): The number of chunks upserted.
+        start_time (float): The performance counter at the start of the run.
+        end_time (Union[float, None]): The performance counter at the end of the run.
+    """
+
+    def __init__(self):
+        self.docs = 0
+        self.chunks = 0
+        self.embedded = 0
+        self.upserted = 0
+        self.start_time = time.perf_counter()
+        self.end_time = None
+
+    @property
+    def elapsed(self) -> float:
+        """The time since the start of the run in seconds."""
+        end_time = self.end_time if self.end_time is not None else time.perf_counter()
+        return end_time - self.start_time
+
+    @property
+    def throughput(self) -> float:
+        """The number of chunks upserted per second."""
+        elapsed = self.elapsed
+        return self.upserted / elapsed if elapsed > 0 else 0.0
+
+    def __repr__(self) -> str:
+        return (
+            f"IngestionProgress(docs={self.docs}, chunks={self.chunks}, "
+            f"embedded={self.embedded}, upserted={self.upserted}, "
+            f"throughput={self.throughput:.1f} chunks/s)"
+        )
+
+
+class IngestionPipeline:
+    """
+    Streams documents through a chunker, an embeddings model and a vector store.
+
+    The chunks are embedded in batches of `embed_batch_size` and upserted in batches of
+    `upsert_batch_size`. Every stage runs in its own thread, or task for `run_async`,
+    and passes its batches to the next stage through a queue of at most `queue_size`
+    batches. If a stage fails, the other stages stop and the error is raised.
+
+    Args:
+        embeddings (BaseEmbeddings): The embeddings model used to embed the chunks.
+        vector_store (VectorStore): The vector store the chunks are upserted into.
+        chunker (Union[TokenChunker, None]): Optional chunker that splits the
+            documents. Documents are embedded as they are if no chunker is given.
+        embed_batch_size (int): The number of chunks per embeddings request.
+            Defaults to 100.
+        upsert_batch_size (int): The number of chunks per upsert. Defaults to 100.
+        queue_size (int): The maximum number of batches waiting between two stages.
+            Defaults to 4.
+        on_progress (Union[Callable[[IngestionProgress], Any], None]): Optional
+            function called with the progress after every upsert.
+
+    Attributes:
+        embeddings (BaseEmbeddings): The embeddings model.
+        vector_store (VectorStore): The vector store.
+        chunker (Union[TokenChunker, None]): The chunker.
+        embed_batch_size (int): The number of chunks per embeddings request.
+        upsert_batch_size (int): The number of chunks per upsert.
+        queue_size (int): The maximum number of batches waiting between two stages.
+        on_progress (Union[Callable[[IngestionProgress], Any], None]): The progress
+            callback.
+    """
+
+    def __init__(
+        self,
+        embeddings: BaseEmbeddings,
+        vector_store: VectorStore,
+        chunker: Union[TokenChunker, None] = None,
+        embed_batch_size: int = 100,
+        upsert_batch_size: int = 100,
+        queue_size: int = 4,
+        on_progress: Union[Callable[[IngestionProgress], Any], None] = None,
+    ):
+        self.embeddings = embeddings
+        self.vector_store = vector_store
+        self.chunker = chunker
+        self.embed_batch_size = embed_batch_size
+        self.upsert_batch_size = upsert_batch_size
+        self.queue_size = queue_size
+        self.on_progress = on_progress
+
+    def _chunk(self, doc: VectorDoc) -> Iterable[VectorDoc]:
+        return self.chunker.chunk(doc) if self.chunker else (doc,)
+
+    def _upserted(self, progress: IngestionProgress, batch: list[VectorDoc]) -> None:
+        progress.upserted += len(batch)
+        if self.on_progress:
+            self.on_progress(progress)
+
+    def run(self, docs: Iterable[VectorDoc]) -> IngestionProgress:
+        """
+        Ingests the documents.
+
+        Args:
+            docs (Iterable[VectorDoc]): The documents, e.g. a generator that reads
+                them from files.
+
+        Returns:
+            IngestionProgress: The final progress of the run.
+        """
+        progress = IngestionProgress()
+        stop = threading.Event()
+        to_embed = queue.Queue(maxsize=self.queue_size)
+        to_upsert = queue.Queue(maxsize=self.queue_size)
+        errors = []
+
+        def put(target: queue.Queue, item: Any) -> None:
+            # Waits for space in the queue unless another stage failed.
+            while not stop.is_set():
+                try:
+                    target.put(item, timeout=0.1)
+                    return
+                except queue.Full:
+                    continue
+
+        def get(source: queue.Queue) -> Any:
+            while not stop.is_set():
+                try:
+                    return source.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+            return _DONE
+
+        def stage(func: Callable[[], None]) -> Callable[[], None]:
+            def run_stage():
+                try:
+                    func()
+                except Exception as error:  # pylint: disable=broad-exception-caught
+                    errors.append(error)
+                    stop.set()
+
+            return run_stage
+
+        def read():
+            batch = []
+            for doc in docs:
+                if stop.is_set():
+                    return
+                progress.docs += 1
+                for chunk in self._chunk(doc):
+                    progress.chunks += 1
+                    batch.append(chunk)
+                    if len(batch) >= self.embed_batch_size:
+                        put(to_embed, batch)
+                        batch = []
+            if batch:
+                put(to_embed, batch)
+            put(to_embed, _DONE)
+
+        def embed():
+            while (batch := get(to_embed)) is not _DONE:
+                self.embeddings.generate(batch)
+                progress.embedded += len(batch)
+                put(to_upsert, batch)
+            put(to_upsert, _DONE)
+
+        def upsert():
+            buffer = []
+            while (batch := get(to_upsert)) is not _DONE:
+                buffer.extend(batch)
+                while len(buffer) >= self.upsert_batch_size:
+                    batch, buffer = (
+                        buffer[: self.upsert_batch_size],
+                        buffer[self.upsert_batch_size :],
+                    )
+                    self.vector_store.upsert(batch)
+                    self._upserted(progress, batch)
+            if buffer and not stop.is_set():
+                self.vector_store.upsert(buffer)
+                self._upserted(progress, buffer)
+
+        with start_span("ingestion", "internal"):
+            threads = [
+                threading.Thread(target=stage(func), name=f"llmflows-ingestion-{name}")
+                for name, func in (("read", read), ("embed", embed))
+            ]
+            for thread in threads:
+                thread.start()
+            stage(upsert)()
+            stop.set()
+            for thread in threads:
+                thread.join()
+
+        progress.end_time = time.perf_counter()
+        if errors:
+            raise errors[0]
+        return progress
+
+    async def run_async(
+        self, docs: Union[Iterable[VectorDoc], AsyncIterable[VectorDoc]]
+    ) -> IngestionProgress:
+        """
+        Ingests the documents with the async methods of the embeddings model and the
+        vector store.
+
+        Args:
+            docs (Union[Iterable[VectorDoc], AsyncIterable[VectorDoc]]): The
+                documents, e.g. an async generator that reads them from a database.
+
+        Returns:
+            IngestionProgress: The final progress of the run.
+        """
+        progress = IngestionProgress()
+        to_embed = asyncio.Queue(maxsize=self.queue_size)
+        to_upsert = asyncio.Queue(maxsize=self.queue_size)
+
+        async def iterate_docs():
+            if hasattr(docs, "__aiter__"):
+                async for doc in docs:
+                    yield doc
+            else:
+                for doc in docs:
+                    yield doc
+
+        async def read():
+            batch = []
+            async for doc in iterate_docs():
+                progress.docs += 1
+                for chunk in self._chunk(doc):
+                    progress.chunks += 1
+                    batch.append(chunk)
+                    if len(batch) >= self.embed_batch_size:
+                        await to_embed.put(batch)
+                        batch = []
+            if batch:
+                await to_embed.put(batch)
+            await to_embed.put(_DONE)
+
+        async def embed():
+            while (batch := await to_embed.get()) is not _DONE:
+                await self.embeddings.generate_async(batch)
+                progress.embedded += len(batch)
+                await to_upsert.put(batch)
+            await to_upsert.put(_DONE)
+
+        async def upsert():
+            buffer = []
+            while (batch := await to_upsert.get()) is not _DONE:
+                buffer.extend(batch)
+                while len(buffer) >= self.upsert_batch_size:
+                    batch, buffer = (
+                        buffer[: self.upsert_batch_size],
+                        buffer[self.upsert_batch_size :],
+                    )
+                    await self.vector_store.upsert_async(batch)
+                    self._upserted(progress, batch)
+            if buffer:
+                await self.vector_store.upsert_async(buffer)
+                self._upserted(progress, buffer)
+
+        with start_span("ingestion", "internal"):
+            tasks = [asyncio.ensure_future(stage()) for stage in (read, embed, upsert)]
+            try:
+                await asyncio.gather(*tasks)
+            finally:
+                for task in tasks:
+                    task.cancel()
+
+        progress.end_time = time.perf_counter()
+        return progress
@@ -8,6 +8,7 @@ interact with the Pinecone vector database service.
 import pinecone  # pylint: disable=import-error
 from llmflows.vectorstores.vector_doc import VectorDoc
 from llmflows.vectorstores.vector_store import VectorStore
+from llmflows.tracing.tracer import start_span
 
 
 class Pinecone(VectorStore):
@@ -73,24 +74,31 @@ class Pinecone(VectorStore):
             top_k (int): The number of results to return.
 
         Returns:
-            list[dict]: A list of dictionaries representing the search results.
+            tuple[list, dict, dict]: The matches, the call data with the raw response
+                and the Pinecone configuration.
         """
         query_embedding = query.embedding
-        search_result = self.index.query(
-            query_embedding, top_k=top_k, include_metadata=True
-        )
+        with start_span(
+            "vector_search", "vectorstore", index=self.storage_entity, top_k=top_k
+        ):
+            search_result = self.index.query(
+                query_embedding, top_k=top_k, include_metadata=True
+            )
         return self._prepare_results(search_result)
 
-    def upsert(self, docs: list[VectorDoc]):
-        """Insert or update vectors in the index.
-
-        Args:
-            docs (list[VectorDoc]): VectorDoc objects to insert or update.
-        """
+    def _prepare_vectors(self, docs: list[VectorDoc]) -> list[tuple]:
         to_upsert = []
         for doc in docs:
             doc_id, doc_txt, embeddings, metadata = doc.values
             if "text" not in metadata.keys():
                 metadata["text"] = doc_txt
             to_upsert.append((doc_id, embeddings, metadata))
-        self.index.upsert(vectors=to_upsert)
+        return to_upsert
+
+    def upsert(self, docs: list[VectorDoc]):
+        """Insert or update vectors in the index.
+
+        Args:
+            docs (list[VectorDoc]): VectorDoc objects to insert or update.
+        """
+        self.index.upsert(vectors=self._prepare_vectors(docs))
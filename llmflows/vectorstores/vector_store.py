@@ -6,9 +6,12 @@ the methods that all vector store services must implement.
 
 Classes that represent specific vector store services (like Pinecone, for example)
 should inherit from VectorStore and provide their own implementations for
-each of the methods defined in VectorStore.
+each of the methods defined in VectorStore. The async methods run the blocking
+methods in a worker thread by default, so vector stores with a native async client
+only need to override them.
 """
 
+import asyncio
 from abc import ABC, abstractmethod
 from typing import List
 from llmflows.vectorstores.vector_doc import VectorDoc
@@ -31,7 +34,7 @@ class VectorStore(ABC):
         """Describe the index."""
 
     @abstractmethod
-    def search(self, query: VectorDoc, top_k: int) -> List[dict]:
+    def search(self, query: VectorDoc, top_k: int) -> tuple[list, dict, dict]:
         """
         Search the index for similar vectors.
 
@@ -40,7 +43,8 @@ class VectorStore(ABC):
             top_k (int): The number of results to return.
 
         Returns:
-            list[dict]: A list of dictionaries representing the search results.
+            tuple[list, dict, dict]: The search results, the call data and the
+                configuration of the vector store.
         """
 
     @abstractmethod
@@ -50,3 +54,27 @@ class VectorStore(ABC):
         Args:
             docs (list[VectorDoc]): VectorDoc objects to insert or update.
         """
+
+    async def search_async(
+        self, query: VectorDoc, top_k: int
+    ) -> tuple[list, dict, dict]:
+        """
+        Search the index for similar vectors without blocking the event loop.
+
+        Args:
+            query (VectorDoc): The query vector to search for.
+            top_k (int): The number of results to return.
+
+        Returns:
+            tuple[list, dict, dict]: The search results, the call data and the
+                configuration of the vector store.
+        """
+        return await asyncio.to_thread(self.search, query, top_k)
+
+    async def upsert_async(self, docs: List[VectorDoc]) -> None:
+        """Insert or update vectors in the index without blocking the event loop.
+
+        Args:
+            docs (list[VectorDoc]): VectorDoc objects to insert or update.
+        """
+        await asyncio.to_thread(self.upsert, docs)
@@ -0,0 +1,139 @@
+# pylint: skip-file
+
+import time
+import asyncio
+import unittest
+from unittest.mock import MagicMock, patch
+from llmflows.caches import InMemoryStepCache, get_cache_key
+from llmflows.flows import (
+    ChatFlowStep,
+    FlowStep,
+    FunctionalFlowStep,
+    VectorStoreFlowStep,
+)
+from llmflows.prompts import PromptTemplate
+from llmflows.flows.async_base_flowstep import AsyncBaseFlowStep
+
+
+def classify(category):
+    return category.upper()
+
+
+def shorten(category):
+    return category[:3]
+
+
+class TestInMemoryStepCache(unittest.TestCase):
+    def test_lru_eviction(self):
+        cache = InMemoryStepCache(max_size=2)
+        cache.set("a", (1, None, None))
+        cache.set("b", (2, None, None))
+        cache.get("a")
+        cache.set("c", (3, None, None))
+        self.assertIsNotNone(cache.get("a"))
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(len(cache), 2)
+
+    def test_ttl(self):
+        cache = InMemoryStepCache(ttl=10)
+        cache.set("a", (1, None, None))
+        with patch("time.monotonic", return_value=time.monotonic() + 20):
+            self.assertIsNone(cache.get("a"))
+
+    def test_cache_key(self):
+        step = FunctionalFlowStep("step", classify, "output")
+        other_step = FunctionalFlowStep("other step", classify, "output")
+        key = get_cache_key(step, {"category": "shoes"})
+        self.assertEqual(key, get_cache_key(step, {"category": "shoes"}))
+        self.assertNotEqual(key, get_cache_key(step, {"category": "hats"}))
+        self.assertNotEqual(key, get_cache_key(other_step, {"category": "shoes"}))
+
+    def test_cache_key_prompt_and_llm(self):
+        llm = MagicMock(model="model", temperature=0.7, max_tokens=100)
+        step = FlowStep("step", llm, PromptTemplate("About {topic}"), "output")
+        key = get_cache_key(step, {"topic": "shoes"})
+        step.prompt_template = PromptTemplate("Tell me about {topic}")
+        self.assertNotEqual(key, get_cache_key(step, {"topic": "shoes"}))
+        step.prompt_template = PromptTemplate("About {topic}")
+        llm.temperature = 0.0
+        self.assertNotEqual(key, get_cache_key(step, {"topic": "shoes"}))
+
+    def test_cache_key_function(self):
+        step = FunctionalFlowStep("step", classify, "output")
+        other_step = FunctionalFlowStep("step", shorten, "output")
+        self.assertNotEqual(
+            get_cache_key(step, {"category": "shoes"}),
+            get_cache_key(other_step, {"category": "shoes"}),
+        )
+
+    def test_cache_key_search(self):
+        step = VectorStoreFlowStep(
+            "step", MagicMock(), MagicMock(), PromptTemplate("{question}"), "output"
+        )
+        key = get_cache_key(step, {"question": "why"})
+        step.top_k = 10
+        self.assertNotEqual(key, get_cache_key(step, {"question": "why"}))
+        step.top_k = 1
+        step.list_output = True
+        self.assertNotEqual(key, get_cache_key(step, {"question": "why"}))
+
+    def test_shared_cache_with_different_functions(self):
+        cache = InMemoryStepCache()
+        step = FunctionalFlowStep("step", classify, "output", cache=cache)
+        other_step = FunctionalFlowStep("step", shorten, "output", cache=cache)
+        step.run({"category": "shoes"})
+        result = other_step.run({"category": "shoes"})
+        self.assertFalse(result["cache_hit"])
+        self.assertEqual(result["result"], {"output": "sho"})
+
+
+class TestStepMemoization(unittest.TestCase):
+    def test_flowstep_cache_hit(self):
+        cache = InMemoryStepCache()
+        step = FunctionalFlowStep("step", classify, "output", cache=cache)
+        first = step.run({"category": "shoes"})
+        with patch.object(step, "generate") as mock_generate:
+            second = step.run({"category": "shoes"})
+            mock_generate.assert_not_called()
+
+        self.assertFalse(first["cache_hit"])
+        self.assertTrue(second["cache_hit"])
+        self.assertEqual(second["result"], {"output": "SHOES"})
+
+    def test_cache_hit_returns_copies(self):
+        cache = InMemoryStepCache()
+        step = FunctionalFlowStep("step", classify, "output", cache=cache)
+        with patch.object(
+            step, "generate", return_value=("SHOES", {"a": [1]}, {"b": 1})
+        ):
+            first = step.run({"category": "shoes"})
+        first["call_data"]["a"].append(2)
+        second = step.run({"category": "shoes"})
+        second["config"]["b"] = 2
+        third = step.run({"category": "shoes"})
+        self.assertEqual(third["call_data"], {"a": [1]})
+        self.assertEqual(third["config"], {"b": 1})
+
+    def test_chat_flowstep_rejects_cache(self):
+        with self.assertRaises(ValueError):
+            ChatFlowStep(
+                "chat",
+                MagicMock(),
+                "output",
+                message_key="message",
+                cache=InMemoryStepCache(),
+            )
+
+    def test_async_flowstep_cache_hit(self):
+        class CountingStep(AsyncBaseFlowStep):
+            calls = 0
+
+            async def generate(self, inputs):
+                CountingStep.calls += 1
+                return inputs["text"], None, None
+
+        step = CountingStep("step", "output", None, cache=InMemoryStepCache())
+        asyncio.run(step.run({"text": "hello"}))
+        execution_info = asyncio.run(step.run({"text": "hello"}))
+        self.assertEqual(CountingStep.calls, 1)
+        self.assertTrue(execution_info["cache_hit"])
@@ -0,0 +1,200 @@
+# pylint: skip-file
+
+import time
+import asyncio
+import threading
+import unittest
+from llmflows.flows import Flow, AsyncFlow, FunctionalFlowStep
+from llmflows.flows.async_base_flowstep import AsyncBaseFlowStep
+from llmflows.callbacks import (
+    BaseCallback,
+    AsyncBaseCallback,
+    FunctionalCallback,
+    CallbackDispatcher,
+    AsyncCallbackDispatcher,
+)
+
+
+def upper(text):
+    return text.upper()
+
+
+class SlowCallback(BaseCallback):
+    def __init__(self, delay=0.2):
+        self.delay = delay
+        self.events = []
+        self.threads = set()
+
+    def on_start(self, inputs):
+        self.events.append("on_start")
+
+    def on_results(self, results):
+        self.events.append("on_results")
+
+    def on_end(self, execution_info):
+        time.sleep(self.delay)
+        self.threads.add(threading.get_ident())
+        self.events.append("on_end")
+
+
+class FailingCallback(BaseCallback):
+    def __init__(self):
+        self.errors = []
+
+    def on_end(self, execution_info):
+        raise RuntimeError("failed")
+
+    def on_error(self, error):
+        self.errors.append(error)
+
+
+class SlowAsyncCallback(AsyncBaseCallback):
+    def __init__(self):
+        self.ended = 0
+
+    async def on_end(self, execution_info):
+        await asyncio.sleep(0.1)
+        self.ended += 1
+
+
+class AsyncUpperStep(AsyncBaseFlowStep):
+    def __init__(self, callbacks, callback_dispatcher=None):
+        super().__init__(
+            "upper", "upper_text", callbacks, callback_dispatcher=callback_dispatcher
+        )
+        self.required_keys = {"text"}
+
+    async def generate(self, inputs):
+        return inputs["text"].upper(), None, None
+
+
+class TestCallbackDispatcher(unittest.TestCase):
+    def test_background_callbacks(self):
+        dispatcher = CallbackDispatcher()
+        callback = SlowCallback()
+        step = FunctionalFlowStep(
+            "upper",
+            upper,
+            "upper_text",
+            callbacks=[callback],
+            callback_dispatcher=dispatcher,
+        )
+
+        start = time.perf_counter()
+        results = Flow(step).start(text="hello")
+        self.assertLess(time.perf_counter() - start, 0.15)
+        self.assertEqual(results["upper"]["result"], {"upper_text": "HELLO"})
+
+        self.assertTrue(dispatcher.flush(timeout=5))
+        self.assertEqual(callback.events, ["on_start", "on_results", "on_end"])
+        self.assertNotIn(threading.get_ident(), callback.threads)
+        dispatcher.shutdown()
+
+    def test_drop_when_full(self):
+        dispatcher = CallbackDispatcher(max_queue_size=1, when_full="drop")
+        blocker = threading.Event()
+        calls = []
+        callback = FunctionalCallback(
+            on_end_fn=lambda info: (blocker.wait(5), calls.append(info))
+        )
+
+        self.assertTrue(dispatcher.dispatch(callback, "on_end", 1))
+        time.sleep(0.05)
+        self.assertTrue(dispatcher.dispatch(callback, "on_end", 2))
+        self.assertFalse(dispatcher.dispatch(callback, "on_end", 3))
+        self.assertEqual(dispatcher.dropped, 1)
+
+        blocker.set()
+        dispatcher.shutdown()
+        self.assertEqual(calls, [1, 2])
+
+    def test_callback_errors(self):
+        dispatcher = CallbackDispatcher()
+        callback = FailingCallback()
+        with self.assertLogs(level="ERROR"):
+            dispatcher.dispatch(callback, "on_end", {})
+            dispatcher.flush()
+        self.assertEqual(dispatcher.failed, 1)
+        self.assertIsInstance(callback.errors[0], RuntimeError)
+        dispatcher.shutdown()
+
+    def test_shutdown(self):
+        dispatcher = CallbackDispatcher()
+        dispatcher.dispatch(FunctionalCallback(), "on_end", {})
+        dispatcher.shutdown()
+        with self.assertRaises(RuntimeError):
+            dispatcher.dispatch(FunctionalCallback(), "on_end", {})
+
+    def test_shutdown_without_flush(self):
+        dispatcher = CallbackDispatcher()
+        blocker = threading.Event()
+        calls = []
+        callback = FunctionalCallback(
+            on_end_fn=lambda info: (blocker.wait(5), calls.append(info))
+        )
+        dispatcher.dispatch(callback, "on_end", 1)
+        time.sleep(0.05)
+        dispatcher.dispatch(callback, "on_end", 2)
+
+        threading.Timer(0.1, blocker.set).start()
+        dispatcher.shutdown(flush=False)
+
+        self.assertEqual(calls, [1])
+        self.assertEqual(dispatcher.dropped, 1)
+        self.assertEqual(dispatcher.pending, 0)
+
+    def test_invalid_policy(self):
+        with self.assertRaises(ValueError):
+            CallbackDispatcher(when_full="wait")
+
+
+class TestAsyncCallbackDispatcher(unittest.TestCase):
+    def test_inline_async_callbacks_run_concurrently(self):
+        callbacks = [SlowAsyncCallback() for _ in range(3)]
+
+        async def run():
+            start = time.perf_counter()
+            await AsyncFlow(AsyncUpperStep(callbacks)).start(text="hello")
+            return time.perf_counter() - start
+
+        self.assertLess(asyncio.run(run()), 0.25)
+        self.assertEqual([callback.ended for callback in callbacks], [1, 1, 1])
+
+    def test_background_async_callbacks(self):
+        dispatcher = AsyncCallbackDispatcher()
+        callbacks = [SlowAsyncCallback() for _ in range(3)]
+
+        async def run():
+            start = time.perf_counter()
+            await AsyncFlow(AsyncUpperStep(callbacks, dispatcher)).start(text="hello")
+            elapsed = time.perf_counter() - start
+            ended_before_flush = sum(callback.ended for callback in callbacks)
+            self.assertTrue(await dispatcher.flush(timeout=5))
+            await dispatcher.shutdown()
+            return elapsed, ended_before_flush
+
+        elapsed, ended_before_flush = asyncio.run(run())
+        self.assertLess(elapsed, 0.1)
+        self.assertEqual(ended_before_flush, 0)
+        self.assertEqual([callback.ended for callback in callbacks], [1, 1, 1])
+
+    def test_async_drop_when_full(self):
+        dispatcher = AsyncCallbackDispatcher(
+            max_queue_size=1, num_workers=1, when_full="drop"
+        )
+        callback = SlowAsyncCallback()
+
+        async def run():
+            results = [
+                await dispatcher.dispatch(callback, "on_end", {}) for _ in range(3)
+            ]
+            await dispatcher.shutdown()
+            return results
+
+        self.assertEqual(asyncio.run(run()), [True, False, False])
+        self.assertEqual(dispatcher.dropped, 2)
+        self.assertEqual(callback.ended, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
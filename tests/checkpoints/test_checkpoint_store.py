@@ -0,0 +1,176 @@
+# pylint: skip-file
+
+import os
+import asyncio
+import tempfile
+import unittest
+from llmflows.checkpoints import (
+    InMemoryCheckpointStore,
+    FileCheckpointStore,
+    SQLiteCheckpointStore,
+)
+from llmflows.flows import Flow, AsyncFlow, FunctionalFlowStep, AsyncFunctionalFlowStep
+
+
+class CheckpointStoreTests:
+    def make_store(self):
+        raise NotImplementedError
+
+    def setUp(self):
+        self.store = self.make_store()
+
+    def test_save_and_load(self):
+        self.store.start_run("run", {"topic": "rain"})
+        self.store.save_step("run", "title", {"result": {"song_title": "Rain"}})
+        self.store.save_step("run", "lyrics", {"result": {"lyrics": "la la"}})
+
+        inputs, steps = self.store.load_run("run")
+
+        self.assertEqual(inputs, {"topic": "rain"})
+        self.assertEqual(
+            steps,
+            {
+                "title": {"result": {"song_title": "Rain"}},
+                "lyrics": {"result": {"lyrics": "la la"}},
+            },
+        )
+
+    def test_runs_are_separate(self):
+        self.store.start_run("a", {"topic": "a"})
+        self.store.start_run("b", {"topic": "b"})
+        self.store.save_step("a", "title", {"result": {"song_title": "A"}})
+
+        self.assertEqual(self.store.load_run("b"), ({"topic": "b"}, {}))
+
+    def test_delete_run(self):
+        self.store.start_run("run", {"topic": "rain"})
+        self.store.delete_run("run")
+
+        with self.assertRaises(KeyError):
+            self.store.load_run("run")
+
+    def test_unknown_run(self):
+        with self.assertRaises(KeyError):
+            self.store.load_run("unknown")
+
+
+class TestInMemoryCheckpointStore(CheckpointStoreTests, unittest.TestCase):
+    def make_store(self):
+        return InMemoryCheckpointStore()
+
+
+class TestFileCheckpointStore(CheckpointStoreTests, unittest.TestCase):
+    def make_store(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        return FileCheckpointStore(self.directory.name)
+
+    def test_delete_removes_file(self):
+        self.store.start_run("run", {"topic": "rain"})
+        self.store.delete_run("run")
+        self.assertEqual(os.listdir(self.directory.name), [])
+
+    def test_rejects_non_json_values(self):
+        self.store.start_run("run", {"topic": "rain"})
+        with self.assertRaises(TypeError):
+            self.store.save_step("run", "title", {"result": {"title": object()}})
+
+
+class TestSQLiteCheckpointStore(CheckpointStoreTests, unittest.TestCase):
+    def make_store(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        store = SQLiteCheckpointStore(os.path.join(directory.name, "runs.db"))
+        self.addCleanup(store.close)
+        return store
+
+    def test_rejects_non_json_values(self):
+        self.store.start_run("run", {"topic": "rain"})
+        with self.assertRaises(TypeError):
+            self.store.save_step("run", "title", {"result": {"title": object()}})
+
+
+class TestFlowResume(unittest.TestCase):
+    def setUp(self):
+        self.calls = []
+        self.fail = True
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.store = FileCheckpointStore(self.directory.name)
+
+    def make_steps(self, step_class):
+        calls = self
+
+        def title(topic):
+            calls.calls.append("title")
+            return f"title about {topic}"
+
+        def lyrics(song_title):
+            calls.calls.append("lyrics")
+            if calls.fail:
+                raise ConnectionError("rate limited")
+            return f"lyrics for {song_title}"
+
+        title_step = step_class("title", title, "song_title")
+        lyrics_step = step_class("lyrics", lyrics, "lyrics")
+        title_step.connect(lyrics_step)
+        return title_step
+
+    def test_resume_skips_completed_steps(self):
+        flow = Flow(
+            self.make_steps(FunctionalFlowStep),
+            recording="minimal",
+            checkpoint_store=self.store,
+        )
+
+        with self.assertRaises(ConnectionError):
+            flow.start(topic="rain")
+        run_id = flow.run_id
+        self.assertEqual(self.calls, ["title", "lyrics"])
+
+        self.fail = False
+        results = flow.resume(run_id)
+
+        self.assertEqual(self.calls, ["title", "lyrics", "lyrics"])
+        self.assertTrue(results["title"]["reused"])
+        self.assertEqual(
+            results["lyrics"]["result"], {"lyrics": "lyrics for title about rain"}
+        )
+        with self.assertRaises(KeyError):
+            self.store.load_run(run_id)
+
+    def test_successful_run_deletes_checkpoints(self):
+        self.fail = False
+        flow = Flow(self.make_steps(FunctionalFlowStep), checkpoint_store=self.store)
+
+        flow.start(topic="rain")
+
+        with self.assertRaises(KeyError):
+            self.store.load_run(flow.run_id)
+
+    def test_resume_without_store(self):
+        flow = Flow(self.make_steps(FunctionalFlowStep))
+        with self.assertRaises(ValueError):
+            flow.resume("run")
+
+    def test_async_resume(self):
+        flow = AsyncFlow(
+            self.make_steps(AsyncFunctionalFlowStep),
+            checkpoint_store=InMemoryCheckpointStore(),
+        )
+
+        with self.assertRaises(ConnectionError):
+            asyncio.run(flow.start(topic="rain"))
+
+        self.fail = False
+        results = asyncio.run(flow.resume(flow.run_id))
+
+        self.assertEqual(self.calls, ["title", "lyrics", "lyrics"])
+        self.assertTrue(results["title"]["reused"])
+        self.assertEqual(
+            results["lyrics"]["result"], {"lyrics": "lyrics for title about rain"}
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
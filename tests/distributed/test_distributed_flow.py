@@ -0,0 +1,219 @@
+# pylint: skip-file
+
+import os
+import time
+import asyncio
+import tempfile
+import threading
+import unittest
+from llmflows.flows import Flow, FunctionalFlowStep, RouterFlowStep
+from llmflows.flows.async_base_flowstep import AsyncBaseFlowStep
+from llmflows.distributed import (
+    DistributedFlow,
+    LocalBroker,
+    SQLiteBroker,
+    Worker,
+    start_workers,
+    stop_workers,
+)
+
+
+def title(topic):
+    return f"title about {topic}"
+
+
+def lyrics(song_title):
+    return f"lyrics for {song_title}"
+
+
+def pid(song_title):
+    return str(os.getpid())
+
+
+def review(song_title, lyrics):
+    return f"review of {lyrics}"
+
+
+def fail(song_title):
+    raise ValueError("failed")
+
+
+def slow(song_title):
+    time.sleep(0.1)
+    return "slow"
+
+
+class StatefulStep(FunctionalFlowStep):
+    cacheable = False
+
+
+class AsyncUpperStep(AsyncBaseFlowStep):
+    def __init__(self):
+        super().__init__("upper", "upper_title", None)
+        self.required_keys = {"song_title"}
+
+    async def generate(self, inputs):
+        await asyncio.sleep(0)
+        return inputs["song_title"].upper(), None, None
+
+
+def build_flow():
+    title_step = FunctionalFlowStep("title", title, "song_title")
+    lyrics_step = FunctionalFlowStep("lyrics", lyrics, "lyrics")
+    pid_step = FunctionalFlowStep("pid", pid, "pid")
+    review_step = FunctionalFlowStep("review", review, "review")
+    title_step.connect(lyrics_step, pid_step, AsyncUpperStep())
+    lyrics_step.connect(review_step)
+    return Flow(title_step)
+
+
+def build_failing_flow():
+    title_step = FunctionalFlowStep("title", title, "song_title")
+    title_step.connect(FunctionalFlowStep("fail", fail, "failed"))
+    return Flow(title_step)
+
+
+def build_failing_parallel_flow():
+    title_step = FunctionalFlowStep("title", title, "song_title")
+    title_step.connect(
+        FunctionalFlowStep("fail", fail, "failed"),
+        FunctionalFlowStep("slow", slow, "slow"),
+    )
+    return Flow(title_step)
+
+
+def build_stateful_flow():
+    title_step = FunctionalFlowStep("title", title, "song_title")
+    title_step.connect(StatefulStep("lyrics", lyrics, "lyrics"))
+    return Flow(title_step)
+
+
+def build_routed_flow():
+    router = RouterFlowStep("router", lambda topic: "title", "route")
+    router.connect(
+        FunctionalFlowStep("title", title, "song_title"),
+        FunctionalFlowStep("lyrics", lyrics, "lyrics"),
+    )
+    return Flow(router)
+
+
+class TestDistributedFlow(unittest.TestCase):
+    def run_with_thread_worker(self, flow, **inputs):
+        worker = Worker(flow.broker)
+        thread = threading.Thread(target=worker.run, kwargs={"idle_timeout": 1})
+        thread.start()
+        try:
+            return flow.start(**inputs)
+        finally:
+            flow.broker.put_task({"type": "stop"})
+            thread.join()
+
+    def test_results(self):
+        flow = DistributedFlow(build_flow, LocalBroker(), timeout=5)
+        results = self.run_with_thread_worker(flow, topic="rain")
+
+        self.assertEqual(
+            set(results), {"title", "lyrics", "pid", "upper", "review"}
+        )
+        self.assertEqual(
+            results["review"]["result"]["review"],
+            "review of lyrics for title about rain",
+        )
+        self.assertEqual(results["upper"]["result"]["upper_title"], "TITLE ABOUT RAIN")
+
+    def test_missing_inputs(self):
+        flow = DistributedFlow(build_flow, LocalBroker())
+        with self.assertRaises(ValueError):
+            flow.start()
+
+    def test_step_error(self):
+        flow = DistributedFlow(build_failing_flow, LocalBroker(), timeout=5)
+        with self.assertRaises(RuntimeError) as context:
+            self.run_with_thread_worker(flow, topic="rain")
+        self.assertIn("ValueError: failed", str(context.exception))
+
+    def test_step_error_discards_pending_results(self):
+        broker = LocalBroker()
+        flow = DistributedFlow(build_failing_parallel_flow, broker, timeout=5)
+        with self.assertRaises(RuntimeError):
+            self.run_with_thread_worker(flow, topic="rain")
+
+        self.assertIsNone(broker.get_result("other", timeout=0.2))
+        self.assertEqual(dict(broker._received), {})
+        self.assertEqual(broker._discarded, {})
+
+    def test_sqlite_broker_finish_run(self):
+        with tempfile.TemporaryDirectory() as directory:
+            broker = SQLiteBroker(os.path.join(directory, "broker.db"))
+            try:
+                broker.put_task({"run_id": "a", "task_id": "1"})
+                broker.put_task({"run_id": "a", "task_id": "2"})
+                broker.put_task({"run_id": "b", "task_id": "3"})
+                self.assertEqual(broker.get_task(timeout=0)["task_id"], "1")
+
+                broker.finish_run("a", pending_tasks=2)
+                broker.put_result({"run_id": "a", "task_id": "1"})
+                self.assertEqual(broker.get_task(timeout=0)["task_id"], "3")
+                self.assertIsNone(broker.get_result("a", timeout=0))
+                rows = broker._connect().execute(
+                    "SELECT COUNT(*) FROM finished_runs"
+                ).fetchone()
+                self.assertEqual(rows[0], 0)
+            finally:
+                broker.close()
+
+    def test_worker_rebuilds_stateful_steps(self):
+        worker = Worker(LocalBroker())
+        factory = "tests.distributed.test_distributed_flow:build_stateful_flow"
+        self.assertIs(
+            worker._get_step(factory, "title"), worker._get_step(factory, "title")
+        )
+        self.assertIsNot(
+            worker._get_step(factory, "lyrics"), worker._get_step(factory, "lyrics")
+        )
+
+    def test_routing(self):
+        flow = DistributedFlow(build_routed_flow, LocalBroker(), timeout=5)
+        results = self.run_with_thread_worker(flow, topic="rain")
+        self.assertEqual(set(results), {"router", "title"})
+
+    def test_timeout(self):
+        flow = DistributedFlow(build_flow, LocalBroker(), timeout=0.1)
+        with self.assertRaises(TimeoutError):
+            flow.start(topic="rain")
+
+    def test_sqlite_broker_with_worker_processes(self):
+        with tempfile.TemporaryDirectory() as directory:
+            broker = SQLiteBroker(os.path.join(directory, "broker.db"))
+            processes = start_workers(broker, num_workers=2)
+            try:
+                flow = DistributedFlow(
+                    "tests.distributed.test_distributed_flow:build_flow",
+                    broker,
+                    timeout=10,
+                )
+                results = flow.start(topic="rain")
+            finally:
+                stop_workers(broker, processes, timeout=10)
+                broker.close()
+
+        self.assertNotEqual(results["pid"]["result"]["pid"], str(os.getpid()))
+        self.assertEqual(
+            results["review"]["result"]["review"],
+            "review of lyrics for title about rain",
+        )
+
+    def test_local_broker_with_worker_processes(self):
+        broker = LocalBroker()
+        processes = start_workers(broker, num_workers=2)
+        try:
+            flow = DistributedFlow(build_flow, broker, timeout=10)
+            results = flow.start(topic="rain")
+        finally:
+            stop_workers(broker, processes, timeout=10)
+
+        self.assertNotEqual(results["pid"]["result"]["pid"], str(os.getpid()))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+# pylint: skip-file
+
+import time
+import asyncio
+import unittest
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from llmflows.flows import AsyncFlow, AsyncFunctionalFlowStep
+
+
+def join_function(arg1, arg2):
+    return f"{arg1} {arg2}"
+
+
+def slow_function(text):
+    time.sleep(0.2)
+    return text.upper()
+
+
+def exclaim(lower_text):
+    return lower_text + "!"
+
+
+async def async_function(text):
+    await asyncio.sleep(0)
+    return text.lower()
+
+
+class TestAsyncFunctionalFlowStep(unittest.TestCase):
+    def test_init(self):
+        flowstep = AsyncFunctionalFlowStep("TestStep", join_function, "output_key")
+        self.assertEqual(flowstep.required_keys, ["arg1", "arg2"])
+        self.assertIsNone(flowstep.executor)
+
+    def test_generate_in_default_executor(self):
+        flowstep = AsyncFunctionalFlowStep("TestStep", join_function, "output_key")
+        output, call_data, config = asyncio.run(
+            flowstep.generate({"arg1": "a", "arg2": "b", "arg3": "c"})
+        )
+        self.assertEqual(output, "a b")
+        self.assertIsNone(call_data)
+        self.assertIsNone(config)
+
+    def test_generate_in_process_pool(self):
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            flowstep = AsyncFunctionalFlowStep(
+                "TestStep", join_function, "output_key", executor=executor
+            )
+            output, _, _ = asyncio.run(flowstep.generate({"arg1": "a", "arg2": "b"}))
+        self.assertEqual(output, "a b")
+
+    def test_coroutine_function(self):
+        flowstep = AsyncFunctionalFlowStep("TestStep", async_function, "output_key")
+        output, _, _ = asyncio.run(flowstep.generate({"text": "ABC"}))
+        self.assertEqual(output, "abc")
+
+        with self.assertRaises(ValueError):
+            AsyncFunctionalFlowStep(
+                "TestStep", async_function, "output_key", executor=ThreadPoolExecutor()
+            )
+
+    def test_non_string_output(self):
+        flowstep = AsyncFunctionalFlowStep("TestStep", lambda text: 1, "output_key")
+        with self.assertRaises(TypeError):
+            asyncio.run(flowstep.generate({"text": "a"}))
+
+    def test_event_loop_is_not_blocked(self):
+        flowstep = AsyncFunctionalFlowStep("slow", slow_function, "slow_text")
+
+        async def run():
+            ticks = 0
+            task = asyncio.create_task(flowstep.generate({"text": "a"}))
+            while not task.done():
+                ticks += 1
+                await asyncio.sleep(0.01)
+            return await task, ticks
+
+        (output, _, _), ticks = asyncio.run(run())
+        self.assertEqual(output, "A")
+        self.assertGreater(ticks, 5)
+
+    def test_async_flow(self):
+        first = AsyncFunctionalFlowStep("lower", async_function, "lower_text")
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            second = AsyncFunctionalFlowStep(
+                "exclaim", exclaim, "exclaimed", executor=executor
+            )
+            first.connect(second)
+            flow = AsyncFlow(first)
+            self.assertEqual(flow.input_keys, {"text", "lower_text"})
+
+            results = asyncio.run(flow.start(text="HI"))
+        self.assertEqual(results["exclaim"]["result"], {"exclaimed": "hi!"})
+
+
+if __name__ == "__main__":
+    unittest.main()
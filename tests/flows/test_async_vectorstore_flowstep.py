@@ -0,0 +1,95 @@
+# pylint: skip-file
+
+import asyncio
+import unittest
+from llmflows.flows import AsyncFlow, AsyncVectorStoreFlowStep
+from llmflows.llms.embeddings import BaseEmbeddings
+from llmflows.prompts import PromptTemplate
+from llmflows.vectorstores.vector_store import VectorStore
+
+
+class FakeEmbeddings(BaseEmbeddings):
+    def __init__(self):
+        super().__init__("fake-embeddings")
+        self.async_calls = 0
+
+    def generate(self, docs):
+        raise AssertionError("The async flow step must not use the blocking method.")
+
+    async def generate_async(self, docs):
+        self.async_calls += 1
+        docs.embedding = [float(len(docs.doc))]
+        return docs
+
+
+class FakeVectorStore(VectorStore):
+    def __init__(self):
+        super().__init__("fake-index", "key", "region")
+        self.queries = []
+
+    def describe(self):
+        return None
+
+    def search(self, query, top_k):
+        self.queries.append((query.doc, query.embedding, top_k))
+        matches = [{"metadata": {"text": f"doc {i}"}} for i in range(top_k)]
+        return matches, {"raw_outputs": {"matches": matches}}, {"index_name": "fake"}
+
+    def upsert(self, docs):
+        self.upserted = docs
+
+
+class TestAsyncVectorStoreFlowStep(unittest.TestCase):
+    def setUp(self):
+        self.embeddings = FakeEmbeddings()
+        self.vector_store = FakeVectorStore()
+
+    def create_step(self, **kwargs):
+        return AsyncVectorStoreFlowStep(
+            name="retrieval",
+            vector_store=self.vector_store,
+            embeddings_model=self.embeddings,
+            prompt_template=PromptTemplate("Question: {question}"),
+            output_key="context",
+            **kwargs,
+        )
+
+    def test_init(self):
+        step = self.create_step(top_k=3)
+        self.assertEqual(step.required_keys, {"question"})
+        self.assertEqual(step.top_k, 3)
+        self.assertFalse(step.append_top_k)
+
+    def test_generate(self):
+        step = self.create_step()
+        result, call_data, config = asyncio.run(step.generate({"question": "why"}))
+
+        self.assertEqual(result, "doc 0")
+        self.assertEqual(config, {"index_name": "fake"})
+        self.assertEqual(self.embeddings.async_calls, 1)
+        self.assertEqual(self.vector_store.queries, [("Question: why", [13.0], 1)])
+
+    def test_generate_append_top_k(self):
+        step = self.create_step(top_k=2, append_top_k=True)
+        result, _, _ = asyncio.run(step.generate({"question": "why"}))
+        self.assertEqual(result, "doc 0\ndoc 1\n")
+
+    def test_generate_list_output(self):
+        step = self.create_step(top_k=2, list_output=True)
+        result, _, _ = asyncio.run(step.generate({"question": "why"}))
+        self.assertEqual(result, ["doc 0", "doc 1"])
+
+    def test_upsert_async(self):
+        asyncio.run(self.vector_store.upsert_async(["doc"]))
+        self.assertEqual(self.vector_store.upserted, ["doc"])
+
+    def test_async_flow(self):
+        flow = AsyncFlow(self.create_step())
+        self.assertEqual(flow.input_keys, {"question"})
+
+        results = asyncio.run(flow.start(question="why"))
+        self.assertEqual(results["retrieval"]["result"], {"context": "doc 0"})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,182 @@
+# pylint: skip-file
+
+import time
+import asyncio
+import threading
+import unittest
+from llmflows.flows import Flow, AsyncFlow, FunctionalFlowStep
+from llmflows.flows.async_base_flowstep import AsyncBaseFlowStep
+from llmflows.tracing import Tracer, set_tracer
+
+
+class TestFlowRerun(unittest.TestCase):
+    def setUp(self):
+        self.calls = calls = []
+
+        def title(topic):
+            calls.append("title")
+            return f"title about {topic}"
+
+        def lyrics(song_title):
+            calls.append("lyrics")
+            return f"lyrics for {song_title}"
+
+        def review(song_title, tone):
+            calls.append("review")
+            return f"{tone} review of {song_title}"
+
+        title_step = FunctionalFlowStep("title", title, "song_title")
+        lyrics_step = FunctionalFlowStep("lyrics", lyrics, "lyrics")
+        review_step = FunctionalFlowStep("review", review, "review")
+        title_step.connect(lyrics_step, review_step)
+        self.flow = Flow(title_step)
+
+    def test_rerun_only_changed_steps(self):
+        results = self.flow.start(topic="love", tone="happy")
+        self.assertEqual(self.calls, ["title", "lyrics", "review"])
+
+        self.calls.clear()
+        rerun_results = self.flow.rerun(results, topic="love", tone="sad")
+        self.assertEqual(self.calls, ["review"])
+        self.assertTrue(rerun_results["title"]["reused"])
+        self.assertTrue(rerun_results["lyrics"]["reused"])
+        self.assertNotIn("reused", rerun_results["review"])
+        self.assertEqual(
+            rerun_results["review"]["result"]["review"],
+            "sad review of title about love",
+        )
+
+    def test_rerun_changed_root(self):
+        results = self.flow.start(topic="love", tone="happy")
+        self.calls.clear()
+        self.flow.rerun(results, topic="rain", tone="happy")
+        self.assertEqual(self.calls, ["title", "lyrics", "review"])
+
+    def test_rerun_executes_non_cacheable_steps(self):
+        lyrics_step = next(step for step in self.flow.steps if step.name == "lyrics")
+        lyrics_step.cacheable = False
+        results = self.flow.start(topic="love", tone="happy")
+        self.calls.clear()
+        self.flow.rerun(results, topic="love", tone="happy")
+        self.assertEqual(self.calls, ["lyrics"])
+
+    def test_failed_rerun_does_not_leak_into_next_run(self):
+        results = self.flow.start(topic="love", tone="happy")
+        self.calls.clear()
+        with self.assertRaises(ValueError):
+            self.flow.rerun(results, topic="love")
+
+        self.flow.start(topic="love", tone="happy")
+        self.assertEqual(self.calls, ["title", "lyrics", "review"])
+
+
+class TestAsyncFlowRerun(unittest.TestCase):
+    def test_rerun(self):
+        calls = []
+
+        class EchoStep(AsyncBaseFlowStep):
+            def __init__(self, name, output_key, required_keys):
+                super().__init__(name, output_key, None)
+                self.required_keys = required_keys
+
+            async def generate(self, inputs):
+                calls.append(self.name)
+                return "-".join(inputs.values()), None, None
+
+        first = EchoStep("first", "a", {"x"})
+        second = EchoStep("second", "b", {"a", "y"})
+        first.connect(second)
+        flow = AsyncFlow(first)
+
+        results = asyncio.run(flow.start(x="1", y="2"))
+        calls.clear()
+        asyncio.run(flow.rerun(results, x="1", y="3"))
+        self.assertEqual(calls, ["second"])
+
+    def test_failed_rerun_does_not_leak_into_next_run(self):
+        calls = []
+
+        def echo(x):
+            calls.append(x)
+            return x
+
+        flow = AsyncFlow(FunctionalFlowStep("echo", echo, "y"))
+        results = asyncio.run(flow.start(x="1"))
+        with self.assertRaises(ValueError):
+            asyncio.run(flow.rerun(results))
+
+        asyncio.run(flow.start(x="1"))
+        self.assertEqual(calls, ["1", "1"])
+
+
+class TestHybridAsyncFlow(unittest.TestCase):
+    def setUp(self):
+        self.threads = threads = {}
+
+        def title(topic):
+            threads["title"] = threading.get_ident()
+            time.sleep(0.2)
+            return f"title about {topic}"
+
+        class LyricsStep(AsyncBaseFlowStep):
+            def __init__(self):
+                super().__init__("lyrics", "lyrics", None)
+                self.required_keys = {"topic"}
+
+            async def generate(self, inputs):
+                threads["lyrics"] = threading.get_ident()
+                await asyncio.sleep(0.2)
+                return f"lyrics about {inputs['topic']}", None, None
+
+        def review(song_title, lyrics):
+            return f"review of {song_title} with {lyrics}"
+
+        self.topic_step = FunctionalFlowStep("topic", lambda text: text, "topic")
+        self.title_step = FunctionalFlowStep("title", title, "song_title")
+        self.lyrics_step = LyricsStep()
+        self.review_step = FunctionalFlowStep("review", review, "review")
+        self.topic_step.connect(self.title_step, self.lyrics_step)
+        self.title_step.connect(self.review_step)
+        self.lyrics_step.connect(self.review_step)
+
+    def tearDown(self):
+        set_tracer(None)
+
+    def test_input_keys_of_sync_steps(self):
+        flow = AsyncFlow(self.topic_step)
+        self.assertEqual(flow.input_keys, {"text", "topic", "song_title", "lyrics"})
+
+    def test_sync_and_async_steps_run_in_parallel(self):
+        flow = AsyncFlow(self.topic_step, max_workers=2)
+
+        start = time.perf_counter()
+        results = asyncio.run(flow.start(text="rain"))
+        elapsed = time.perf_counter() - start
+
+        self.assertEqual(
+            results["review"]["result"]["review"],
+            "review of title about rain with lyrics about rain",
+        )
+        self.assertLess(elapsed, 0.35)
+        self.assertNotEqual(self.threads["title"], self.threads["lyrics"])
+
+    def test_context_manager_closes_thread_pool(self):
+        async def run():
+            async with AsyncFlow(self.topic_step) as flow:
+                await flow.start(text="rain")
+                executor = flow._executor
+                self.assertIsNotNone(executor)
+            return flow, executor
+
+        flow, executor = asyncio.run(run())
+        self.assertIsNone(flow._executor)
+        with self.assertRaises(RuntimeError):
+            executor.submit(print)
+
+    def test_sync_steps_keep_the_flow_span(self):
+        tracer = Tracer()
+        set_tracer(tracer)
+        asyncio.run(AsyncFlow(self.topic_step).start(text="rain"))
+
+        spans = {span.name: span for span in tracer.spans}
+        self.assertEqual(spans["title"].parent_id, spans["AsyncFlow"].span_id)
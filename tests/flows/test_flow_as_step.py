@@ -0,0 +1,131 @@
+# pylint: skip-file
+
+import time
+import asyncio
+import unittest
+from llmflows.flows import Flow, AsyncFlow, FunctionalFlowStep, FlowAsStep
+from llmflows.tracing import Tracer, set_tracer
+
+
+def retrieve(question):
+    time.sleep(0.1)
+    return f"context for {question}"
+
+
+def answer(question, context):
+    return f"answer to {question} using {context}"
+
+
+def title(topic):
+    time.sleep(0.1)
+    return f"title about {topic}"
+
+
+def combine(rag_answer, song_title):
+    return f"{rag_answer} / {song_title}"
+
+
+class TestFlowAsStep(unittest.TestCase):
+    def tearDown(self):
+        set_tracer(None)
+
+    def create_rag_flow(self):
+        retrieve_step = FunctionalFlowStep("retrieve", retrieve, "context")
+        answer_step = FunctionalFlowStep("answer", answer, "answer")
+        retrieve_step.connect(answer_step)
+        return Flow(retrieve_step)
+
+    def create_parent(self, flow_class=Flow):
+        rag_step = FlowAsStep(
+            "rag",
+            self.create_rag_flow(),
+            result_key="answer",
+            output_key="rag_answer",
+            input_mapping={"question": "user_question"},
+            output_mapping={"context": "rag_context"},
+        )
+        title_step = FunctionalFlowStep("title", title, "song_title")
+        combine_step = FunctionalFlowStep("combine", combine, "combined")
+        start_step = FunctionalFlowStep("start", lambda topic: topic, "topic_copy")
+        start_step.connect(rag_step, title_step)
+        rag_step.connect(combine_step)
+        title_step.connect(combine_step)
+        return flow_class(start_step), rag_step
+
+    def test_keys(self):
+        flow, rag_step = self.create_parent()
+        self.assertEqual(rag_step.required_keys, ["user_question"])
+        self.assertIn("rag_context", flow.output_keys)
+        self.assertEqual(
+            flow.input_keys,
+            {"topic", "user_question", "rag_answer", "song_title"},
+        )
+
+    def test_invalid_result_key(self):
+        with self.assertRaises(ValueError):
+            FlowAsStep("rag", self.create_rag_flow(), "missing", "rag_answer")
+
+    def test_async_flow_in_flow(self):
+        retrieve_step = FunctionalFlowStep("retrieve", retrieve, "context")
+        rag_step = FlowAsStep("rag", AsyncFlow(retrieve_step), "context", "rag_answer")
+        with self.assertRaises(ValueError):
+            Flow(rag_step)
+
+    def test_results(self):
+        flow, _ = self.create_parent()
+        results = flow.start(topic="rain", user_question="why")
+
+        self.assertEqual(
+            results["rag"]["result"],
+            {
+                "rag_answer": "answer to why using context for why",
+                "rag_context": "context for why",
+            },
+        )
+        self.assertEqual(set(results["rag"]["steps"]), {"retrieve", "answer"})
+        self.assertNotIn("retrieve", results)
+        self.assertEqual(
+            results["combine"]["result"]["combined"],
+            "answer to why using context for why / title about rain",
+        )
+
+    def test_trace(self):
+        tracer = Tracer()
+        set_tracer(tracer)
+        flow, _ = self.create_parent()
+        flow.start(topic="rain", user_question="why")
+
+        spans = {span.name: span for span in tracer.spans}
+        self.assertEqual(spans["rag"].parent_id, spans["Flow"].span_id)
+        self.assertEqual(spans["retrieve"].parent_id, spans["rag"].span_id)
+
+    def test_rerun_reuses_embedded_flow(self):
+        flow, _ = self.create_parent()
+        results = flow.start(topic="rain", user_question="why")
+        rerun_results = flow.rerun(results, topic="sun", user_question="why")
+
+        self.assertTrue(rerun_results["rag"]["reused"])
+        self.assertNotIn("reused", rerun_results["title"])
+
+    def test_run_on_its_own(self):
+        _, rag_step = self.create_parent()
+        with self.assertRaises(RuntimeError):
+            rag_step.run({"user_question": "why"})
+
+    def test_shared_scheduler_in_async_flow(self):
+        flow, _ = self.create_parent(AsyncFlow)
+
+        start = time.perf_counter()
+        results = asyncio.run(flow.start(topic="rain", user_question="why"))
+        elapsed = time.perf_counter() - start
+
+        self.assertEqual(
+            results["combine"]["result"]["combined"],
+            "answer to why using context for why / title about rain",
+        )
+        # The embedded retrieval runs in parallel with the title step.
+        self.assertLess(elapsed, 0.18)
+
+
+if __name__ == "__main__":
+    unittest.main()
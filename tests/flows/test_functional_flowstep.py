@@ -1,6 +1,7 @@
 # pylint: skip-file
 
 import unittest
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 from llmflows.flows.functional_flowstep import FunctionalFlowStep
 from llmflows.callbacks.base_callback import BaseCallback
 
@@ -9,6 +10,10 @@ def flowstep_function(arg1, arg2):
     return "Test output"
 
 
+def join_function(arg1, arg2):
+    return f"{arg1} {arg2}"
+
+
 class TestFunctionalFlowStep(unittest.TestCase):
     def setUp(self):
         self.functional_flowstep = FunctionalFlowStep(
@@ -68,3 +73,19 @@ class TestFunctionalFlowStep(unittest.TestCase):
         self.assertEqual(
             str(context.exception), "Return value must be of type str, but got int"
         )
+
+    def test_generate_in_thread_pool(self):
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            flowstep = FunctionalFlowStep(
+                "TestStep", join_function, "output_key", executor=executor
+            )
+            output, _, _ = flowstep.generate({"arg1": "a", "arg2": "b", "arg3": "c"})
+        self.assertEqual(output, "a b")
+
+    def test_generate_in_process_pool(self):
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            flowstep = FunctionalFlowStep(
+                "TestStep", join_function, "output_key", executor=executor
+            )
+            output, _, _ = flowstep.generate({"arg1": "a", "arg2": "b"})
+        self.assertEqual(output, "a b")
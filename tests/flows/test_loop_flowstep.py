@@ -0,0 +1,152 @@
+# pylint: skip-file
+
+import io
+import asyncio
+import unittest
+from contextlib import redirect_stdout
+from llmflows.flows import (
+    Flow,
+    AsyncFlow,
+    FunctionalFlowStep,
+    LoopFlowStep,
+    AsyncLoopFlowStep,
+)
+from llmflows.flows.base_flowstep import BaseFlowStep
+from llmflows.flows.async_base_flowstep import AsyncBaseFlowStep
+from llmflows.tracing import Tracer, set_tracer
+
+
+def think(question, history):
+    return f"thought {history.count(';')}"
+
+
+def observe(thought):
+    return "<final_answer>" if thought == "thought 2" else f"observed {thought}"
+
+
+def is_final(observation):
+    return observation == "<final_answer>"
+
+
+def add_to_history(history, thought, observation):
+    return {"history": f"{history}{thought}:{observation};"}
+
+
+class TestLoopFlowStep(unittest.TestCase):
+    def create_flow(self):
+        thought_step = FunctionalFlowStep("think", think, "thought")
+        observation_step = FunctionalFlowStep("observe", observe, "observation")
+        thought_step.connect(observation_step)
+        return Flow(thought_step)
+
+    def create_loop(self, **kwargs):
+        return LoopFlowStep(
+            "agent",
+            self.create_flow(),
+            result_key="thought",
+            output_key="answer",
+            stop_fn=is_final,
+            carry_fn=add_to_history,
+            initial_state={"history": ""},
+            **kwargs,
+        )
+
+    def tearDown(self):
+        set_tracer(None)
+
+    def test_required_keys(self):
+        self.assertEqual(self.create_loop().required_keys, ["question"])
+
+    def test_invalid_result_key(self):
+        with self.assertRaises(ValueError):
+            LoopFlowStep("agent", self.create_flow(), "missing", "answer", is_final)
+
+    def test_loop_until_stop(self):
+        results = Flow(self.create_loop()).start(question="why")
+
+        agent = results["agent"]
+        self.assertEqual(agent["result"], {"answer": "thought 2"})
+        self.assertTrue(agent["call_data"]["stopped"])
+        iterations = agent["call_data"]["iterations"]
+        self.assertEqual(len(iterations), 3)
+        self.assertEqual(
+            iterations[1]["observe"]["result"], {"observation": "observed thought 1"}
+        )
+
+    def test_max_iterations(self):
+        results = Flow(self.create_loop(max_iterations=2)).start(question="why")
+
+        agent = results["agent"]
+        self.assertEqual(agent["result"], {"answer": "thought 1"})
+        self.assertFalse(agent["call_data"]["stopped"])
+        self.assertEqual(len(agent["call_data"]["iterations"]), 2)
+
+    def test_verbose(self):
+        output = io.StringIO()
+        with redirect_stdout(output):
+            Flow(self.create_loop()).start(verbose=True, question="why")
+        self.assertIn("observe:\nobserved thought 0", output.getvalue())
+
+    def test_iterations_use_recording_level(self):
+        class RawThinkStep(BaseFlowStep):
+            def __init__(self):
+                super().__init__("think", "thought", None)
+                self.required_keys = {"question", "history"}
+
+            def generate(self, inputs):
+                return think(**inputs), {"raw_outputs": "raw"}, None
+
+        thought_step = RawThinkStep()
+        thought_step.connect(FunctionalFlowStep("observe", observe, "observation"))
+        loop = LoopFlowStep(
+            "agent",
+            Flow(thought_step),
+            result_key="thought",
+            output_key="answer",
+            stop_fn=is_final,
+            carry_fn=add_to_history,
+            initial_state={"history": ""},
+        )
+
+        results = Flow(loop, recording="standard").start(question="why")
+        iterations = results["agent"]["call_data"]["iterations"]
+        self.assertEqual(iterations[0]["think"]["call_data"], {})
+
+    def test_single_trace(self):
+        tracer = Tracer()
+        set_tracer(tracer)
+        Flow(self.create_loop()).start(question="why")
+
+        trace_ids = {span.trace_id for span in tracer.spans}
+        self.assertEqual(len(trace_ids), 1)
+        iterations = [span for span in tracer.spans if span.name == "iteration"]
+        self.assertEqual(len(iterations), 3)
+
+    def test_async_loop(self):
+        class AsyncThinkStep(AsyncBaseFlowStep):
+            def __init__(self):
+                super().__init__("think", "thought", None)
+                self.required_keys = {"question", "history"}
+
+            async def generate(self, inputs):
+                return think(**inputs), None, None
+
+        thought_step = AsyncThinkStep()
+        thought_step.connect(FunctionalFlowStep("observe", observe, "observation"))
+        loop = AsyncLoopFlowStep(
+            "agent",
+            AsyncFlow(thought_step),
+            result_key="thought",
+            output_key="answer",
+            stop_fn=is_final,
+            carry_fn=add_to_history,
+            initial_state={"history": ""},
+        )
+
+        results = asyncio.run(AsyncFlow(loop).start(question="why"))
+        self.assertEqual(results["agent"]["result"], {"answer": "thought 2"})
+        self.assertEqual(len(results["agent"]["call_data"]["iterations"]), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
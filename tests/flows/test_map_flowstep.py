@@ -0,0 +1,155 @@
+# pylint: skip-file
+
+import io
+import time
+import asyncio
+import unittest
+from contextlib import redirect_stdout
+from llmflows.flows import (
+    Flow,
+    AsyncFlow,
+    FunctionalFlowStep,
+    MapFlowStep,
+    AsyncMapFlowStep,
+)
+from llmflows.flows.flowstep import BaseFlowStep
+from llmflows.flows.async_base_flowstep import AsyncBaseFlowStep
+
+
+def summarize(passage, style):
+    time.sleep(0.1)
+    return f"{style} summary of {passage}"
+
+
+def combine(summaries):
+    return " | ".join(summaries)
+
+
+class AsyncSummaryStep(AsyncBaseFlowStep):
+    def __init__(self):
+        super().__init__("summarize", "summary", None)
+        self.required_keys = {"passage"}
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def generate(self, inputs):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.05)
+        self.in_flight -= 1
+        return f"summary of {inputs['passage']}", None, None
+
+
+class RawSummaryStep(BaseFlowStep):
+    def __init__(self):
+        super().__init__("summarize", "summary", None)
+        self.required_keys = {"passage"}
+
+    def generate(self, inputs):
+        return f"summary of {inputs['passage']}", {"raw_outputs": "raw"}, None
+
+
+class AsyncRawSummaryStep(AsyncBaseFlowStep):
+    def __init__(self):
+        super().__init__("summarize", "summary", None)
+        self.required_keys = {"passage"}
+
+    async def generate(self, inputs):
+        return f"summary of {inputs['passage']}", {"raw_outputs": "raw"}, None
+
+
+class TestMapFlowStep(unittest.TestCase):
+    def create_flow(self, map_step):
+        map_step.connect(FunctionalFlowStep("combine", combine, "combined"))
+        return map_step
+
+    def test_required_keys(self):
+        summary_step = FunctionalFlowStep("summarize", summarize, "summary")
+        map_step = MapFlowStep("map", summary_step, "passages", "passage", "summaries")
+        self.assertEqual(map_step.required_keys, {"passages", "style"})
+
+        with self.assertRaises(ValueError):
+            MapFlowStep("map", summary_step, "passages", "missing", "summaries")
+
+    def test_map_reduce(self):
+        summary_step = FunctionalFlowStep("summarize", summarize, "summary")
+        map_step = MapFlowStep(
+            "map", summary_step, "passages", "passage", "summaries", max_concurrency=4
+        )
+        flow = Flow(self.create_flow(map_step))
+
+        start = time.perf_counter()
+        results = flow.start(passages=["a", "b", "c", "d"], style="short")
+        elapsed = time.perf_counter() - start
+
+        self.assertEqual(
+            results["combine"]["result"]["combined"],
+            "short summary of a | short summary of b | short summary of c | "
+            "short summary of d",
+        )
+        self.assertEqual(len(results["map"]["call_data"]["runs"]), 4)
+        self.assertLess(elapsed, 0.3)
+
+    def test_rejects_non_list_items(self):
+        summary_step = FunctionalFlowStep("summarize", summarize, "summary")
+        map_step = MapFlowStep("map", summary_step, "passages", "passage", "summaries")
+        with self.assertRaises(TypeError):
+            Flow(map_step).start(passages="abc", style="short")
+
+    def test_rejects_non_cacheable_flowstep(self):
+        summary_step = FunctionalFlowStep("summarize", summarize, "summary")
+        summary_step.cacheable = False
+        with self.assertRaises(ValueError):
+            MapFlowStep("map", summary_step, "passages", "passage", "summaries")
+
+    def test_runs_use_recording_level(self):
+        map_step = MapFlowStep(
+            "map", RawSummaryStep(), "passages", "passage", "summaries"
+        )
+
+        results = Flow(map_step, recording="standard").start(passages=["a", "b"])
+
+        runs = results["map"]["call_data"]["runs"]
+        self.assertEqual([run["call_data"] for run in runs], [{}, {}])
+
+    def test_verbose(self):
+        summary_step = FunctionalFlowStep("summarize", summarize, "summary")
+        map_step = MapFlowStep("map", summary_step, "passages", "passage", "summaries")
+
+        output = io.StringIO()
+        with redirect_stdout(output):
+            Flow(map_step).start(verbose=True, passages=["a"], style="short")
+
+        self.assertIn("summarize:\nshort summary of a", output.getvalue())
+
+    def test_async_runs_use_recording_level(self):
+        map_step = AsyncMapFlowStep(
+            "map", AsyncRawSummaryStep(), "passages", "passage", "summaries"
+        )
+
+        results = asyncio.run(
+            AsyncFlow(map_step, recording="standard").start(passages=["a", "b"])
+        )
+
+        runs = results["map"]["call_data"]["runs"]
+        self.assertEqual([run["call_data"] for run in runs], [{}, {}])
+
+    def test_async_map_reduce(self):
+        summary_step = AsyncSummaryStep()
+        map_step = AsyncMapFlowStep(
+            "map", summary_step, "passages", "passage", "summaries", max_concurrency=2
+        )
+        flow = AsyncFlow(self.create_flow(map_step))
+
+        results = asyncio.run(flow.start(passages=list("abcde")))
+
+        self.assertEqual(
+            results["map"]["result"]["summaries"],
+            [f"summary of {passage}" for passage in "abcde"],
+        )
+        self.assertEqual(summary_step.max_in_flight, 2)
+        self.assertIn("combine", results)
+
+
+if __name__ == "__main__":
+    unittest.main()
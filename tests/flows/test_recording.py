@@ -0,0 +1,138 @@
+# pylint: skip-file
+
+import asyncio
+import json
+import unittest
+from llmflows.flows import Flow, AsyncFlow, ChatFlowStep
+from llmflows.flows.base_flowstep import BaseFlowStep
+from llmflows.flows.async_base_flowstep import AsyncBaseFlowStep
+from llmflows.flows.recording import record_execution_info
+from llmflows.llms.chat_llm import BaseChatLLM
+
+
+def llm_outputs():
+    call_data = {
+        "raw_outputs": {"usage": {"prompt_tokens": 10, "completion_tokens": 5}},
+        "retries": 1,
+        "prompt": "prompt",
+    }
+    return call_data, {"model_name": "test-model", "temperature": 0.7}
+
+
+class LLMStep(BaseFlowStep):
+    def __init__(self, name, output_key, recording=None):
+        super().__init__(name, output_key, None, recording=recording)
+        self.required_keys = {"text"}
+
+    def generate(self, inputs):
+        call_data, model_config = llm_outputs()
+        return inputs["text"], call_data, model_config
+
+
+class AsyncLLMStep(AsyncBaseFlowStep):
+    def __init__(self, name, output_key, recording=None):
+        super().__init__(name, output_key, None, recording=recording)
+        self.required_keys = {"text"}
+
+    async def generate(self, inputs):
+        call_data, model_config = llm_outputs()
+        return inputs["text"], call_data, model_config
+
+
+class EchoChatLLM(BaseChatLLM):
+    def generate(self, message_history):
+        return (
+            "reply",
+            {"raw_outputs": {}, "retries": 0},
+            {
+                "model_name": self.model,
+                "messages": message_history.messages,
+            },
+        )
+
+    async def generate_async(self, message_history):
+        return self.generate(message_history)
+
+
+class TestRecording(unittest.TestCase):
+    def test_full_recording_is_default(self):
+        results = Flow(LLMStep("llm", "output")).start(text="hello")
+        self.assertIn("raw_outputs", results["llm"]["call_data"])
+        self.assertEqual(results["llm"]["prompt_inputs"], {"text": "hello"})
+
+    def test_standard_recording(self):
+        results = Flow(LLMStep("llm", "output"), recording="standard").start(
+            text="hello"
+        )
+        info = results["llm"]
+
+        self.assertNotIn("raw_outputs", info["call_data"])
+        self.assertEqual(
+            info["call_data"]["usage"], {"prompt_tokens": 10, "completion_tokens": 5}
+        )
+        self.assertEqual(info["call_data"]["prompt"], "prompt")
+        self.assertEqual(info["config"]["temperature"], 0.7)
+        self.assertEqual(info["prompt_inputs"], {"text": "hello"})
+        self.assertEqual(info["result"], {"output": "hello"})
+
+    def test_minimal_recording(self):
+        results = Flow(LLMStep("llm", "output"), recording="minimal").start(
+            text="hello"
+        )
+        info = results["llm"]
+
+        self.assertNotIn("prompt_inputs", info)
+        self.assertEqual(
+            info["call_data"],
+            {"retries": 1, "usage": {"prompt_tokens": 10, "completion_tokens": 5}},
+        )
+        self.assertEqual(info["config"], {"model_name": "test-model"})
+        self.assertEqual(info["result"], {"output": "hello"})
+        self.assertIn("execution_time", info)
+
+    def test_step_recording_overrides_flow(self):
+        results = Flow(LLMStep("llm", "output", recording="full"), "minimal").start(
+            text="hello"
+        )
+        self.assertIn("raw_outputs", results["llm"]["call_data"])
+
+    def test_async_recording(self):
+        flow = AsyncFlow(AsyncLLMStep("llm", "output"), recording="minimal")
+        results = asyncio.run(flow.start(text="hello"))
+        self.assertEqual(results["llm"]["model_config"], {"model_name": "test-model"})
+        self.assertNotIn("prompt_inputs", results["llm"])
+
+    def test_recording_does_not_modify_original(self):
+        call_data, model_config = llm_outputs()
+        info = {"call_data": call_data, "config": model_config, "prompt_inputs": {}}
+        record_execution_info(info, "minimal")
+        self.assertIn("raw_outputs", call_data)
+        self.assertIn("temperature", model_config)
+
+    def test_invalid_recording(self):
+        with self.assertRaises(ValueError):
+            Flow(LLMStep("llm", "output"), recording="verbose")
+        with self.assertRaises(ValueError):
+            LLMStep("llm", "output", recording="verbose")
+
+    def test_chat_history_snapshot(self):
+        step = ChatFlowStep("chat", EchoChatLLM("chat-model"), "reply", "message")
+        flow = Flow(step)
+        first = flow.start(message="first")
+        flow.start(message="second")
+
+        self.assertEqual(len(first["chat"]["call_data"]["message_history"]), 1)
+        self.assertEqual(len(first["chat"]["config"]["messages"]), 1)
+        self.assertEqual(len(step.message_history.messages), 2)
+        self.assertIsInstance(first["chat"]["call_data"]["message_history"], list)
+        json.dumps(first)
+
+    def test_standard_recording_drops_chat_messages(self):
+        step = ChatFlowStep("chat", EchoChatLLM("chat-model"), "reply", "message")
+        results = Flow(step, recording="standard").start(message="hi")
+        self.assertNotIn("messages", results["chat"]["config"])
+        self.assertEqual(len(results["chat"]["call_data"]["message_history"]), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
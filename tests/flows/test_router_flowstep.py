@@ -0,0 +1,97 @@
+# pylint: skip-file
+
+import asyncio
+import unittest
+from llmflows.flows import Flow, AsyncFlow, FunctionalFlowStep, RouterFlowStep
+from llmflows.flows.async_base_flowstep import AsyncBaseFlowStep
+
+
+class TestRouterFlowStep(unittest.TestCase):
+    def setUp(self):
+        self.calls = calls = []
+
+        def classify(text):
+            return "legal" if "contract" in text else "general"
+
+        def legal(text):
+            calls.append("legal")
+            return f"legal review of {text}"
+
+        def general(text):
+            calls.append("general")
+            return f"general answer to {text}"
+
+        def summary(legal_review):
+            calls.append("summary")
+            return f"summary of {legal_review}"
+
+        self.router = RouterFlowStep("router", classify, "route")
+        self.legal_step = FunctionalFlowStep("legal", legal, "legal_review")
+        self.general_step = FunctionalFlowStep("general", general, "answer")
+        self.summary_step = FunctionalFlowStep("summary", summary, "summary")
+        self.router.connect(self.legal_step, self.general_step)
+        self.legal_step.connect(self.summary_step)
+
+    def test_required_keys(self):
+        self.assertEqual(self.router.required_keys, ["text"])
+        self.assertEqual(Flow(self.router).input_keys, {"text", "legal_review"})
+
+    def test_skips_inactive_subgraph(self):
+        results = Flow(self.router).start(text="hello")
+
+        self.assertEqual(self.calls, ["general"])
+        self.assertEqual(results["router"]["result"], {"route": "general"})
+        self.assertEqual(set(results), {"router", "general"})
+
+    def test_runs_active_subgraph(self):
+        results = Flow(self.router).start(text="a contract")
+
+        self.assertEqual(self.calls, ["legal", "summary"])
+        self.assertEqual(
+            results["summary"]["result"]["summary"],
+            "summary of legal review of a contract",
+        )
+
+    def test_join_after_exclusive_branches_is_skipped(self):
+        join_step = FunctionalFlowStep(
+            "join", lambda legal_review, answer: "joined", "joined"
+        )
+        self.legal_step.connect(join_step)
+        self.general_step.connect(join_step)
+        results = Flow(self.router).start(text="hello")
+        self.assertNotIn("join", results)
+
+    def test_multiple_routes(self):
+        router = RouterFlowStep("router", lambda text: ["legal", "general"], "route")
+        router.connect(self.legal_step, self.general_step)
+        Flow(router).start(text="hello")
+        self.assertEqual(self.calls, ["legal", "summary", "general"])
+
+    def test_unknown_route(self):
+        router = RouterFlowStep("router", lambda text: "missing", "route")
+        router.connect(self.general_step)
+        with self.assertRaises(ValueError):
+            Flow(router).start(text="hello")
+
+    def test_async_flow(self):
+        calls = self.calls
+
+        class AsyncLegalStep(AsyncBaseFlowStep):
+            def __init__(self):
+                super().__init__("async_legal", "async_legal_review", None)
+                self.required_keys = {"text"}
+
+            async def generate(self, inputs):
+                calls.append("async_legal")
+                return "review", None, None
+
+        router = RouterFlowStep("router", lambda text: "general", "route")
+        router.connect(AsyncLegalStep(), self.general_step)
+        results = asyncio.run(AsyncFlow(router).start(text="hello"))
+
+        self.assertEqual(self.calls, ["general"])
+        self.assertEqual(set(results), {"router", "general"})
+
+
+if __name__ == "__main__":
+    unittest.main()
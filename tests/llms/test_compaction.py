@@ -0,0 +1,80 @@
+# pylint: skip-file
+
+import asyncio
+import unittest
+from unittest.mock import MagicMock, AsyncMock
+from llmflows.llms import MessageHistory, SummaryCompaction
+
+
+class TestSummaryCompaction(unittest.TestCase):
+    def setUp(self):
+        self.llm = MagicMock()
+        self.llm.generate.return_value = ("short summary", {}, {})
+        self.llm.generate_async = AsyncMock(return_value=("short summary", {}, {}))
+        self.compaction = SummaryCompaction(
+            self.llm, max_tokens=20, keep_last=2, token_counter=len
+        )
+        self.history = MessageHistory()
+        self.history.system_prompt = "system"
+        for i in range(4):
+            self.history.add_user_message(f"question {i}")
+            self.history.add_ai_message(f"answer {i}")
+
+    def test_below_threshold(self):
+        history = MessageHistory()
+        history.add_user_message("hi")
+        self.assertFalse(self.compaction.compact(history))
+        self.llm.generate.assert_not_called()
+
+    def test_compact(self):
+        self.assertTrue(self.compaction.compact(self.history))
+        messages = self.history.messages
+        self.assertEqual(len(messages), 4)
+        self.assertEqual(messages[0]["content"], "system")
+        self.assertEqual(messages[1]["role"], "assistant")
+        self.assertTrue(messages[1]["content"].endswith("short summary"))
+        self.assertEqual(messages[-1]["content"], "answer 3")
+
+    def test_schedule(self):
+        future = self.compaction.schedule(self.history)
+        self.assertTrue(future.result())
+        self.compaction.shutdown()
+        self.assertEqual(len(self.history.messages), 4)
+
+    def test_schedule_async(self):
+        async def run():
+            task = self.compaction.schedule_async(self.history)
+            self.assertIsNone(self.compaction.schedule_async(self.history))
+            return await task
+
+        self.assertTrue(asyncio.run(run()))
+        self.assertEqual(len(self.history.messages), 4)
+
+    def test_wait_async(self):
+        async def run():
+            self.compaction.schedule_async(self.history)
+            await self.compaction.wait_async()
+
+        asyncio.run(run())
+        self.assertEqual(len(self.history.messages), 4)
+
+    def test_relocates_shifted_span(self):
+        def generate(prompt):
+            self.history.replace_range(1, 1, [{"role": "user", "content": "hi"}])
+            return "short summary", {}, {}
+
+        self.llm.generate.side_effect = generate
+        self.assertTrue(self.compaction.compact(self.history))
+        messages = self.history.messages
+        self.assertEqual(messages[1]["content"], "hi")
+        self.assertTrue(messages[2]["content"].endswith("short summary"))
+        self.assertEqual(len(messages), 5)
+
+    def test_skips_changed_history(self):
+        def generate(prompt):
+            self.history.remove_message(1)
+            return "short summary", {}, {}
+
+        self.llm.generate.side_effect = generate
+        self.assertFalse(self.compaction.compact(self.history))
+        self.assertEqual(len(self.history.messages), 8)
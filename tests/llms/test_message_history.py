@@ -73,3 +73,25 @@ class TestMessageHistory(unittest.TestCase):
             self.message_history.add_message("first_message", "user")
 
         self.assertEqual(len(self.message_history.messages), 5)
+
+    def test_snapshot(self):
+        self.message_history.system_prompt = "System prompt"
+        self.message_history.add_user_message("first")
+        snapshot = self.message_history.snapshot()
+
+        self.message_history.add_ai_message("second")
+        self.message_history.replace_message("replaced", "user", 1)
+        self.message_history.remove_message(0)
+
+        self.assertEqual(len(snapshot), 2)
+        self.assertEqual(
+            snapshot,
+            [
+                {"role": "system", "content": "System prompt"},
+                {"role": "user", "content": "first"},
+            ],
+        )
+        self.assertEqual(snapshot[-1]["content"], "first")
+        self.assertEqual(self.message_history.messages[0]["content"], "replaced")
+        self.message_history.messages.append({"role": "user", "content": "direct"})
+        self.assertEqual(len(snapshot), 2)
@@ -0,0 +1,129 @@
+# pylint: skip-file
+
+import tempfile
+import unittest
+from llmflows.llms import (
+    MessageHistory,
+    SQLiteMessageStore,
+    FileMessageStore,
+    MessageHistoryCache,
+)
+
+
+class TestSQLiteMessageStore(unittest.TestCase):
+    def setUp(self):
+        self.store = SQLiteMessageStore(":memory:")
+
+    def test_lazy_load(self):
+        self.store.append("session", [{"role": "user", "content": "Hi"}])
+        history = MessageHistory(session_id="session", store=self.store)
+        self.assertFalse(history._loaded)
+        self.assertEqual(history.messages, [{"role": "user", "content": "Hi"}])
+        self.assertTrue(history._loaded)
+
+    def test_save_appends_new_messages(self):
+        history = MessageHistory(session_id="session", store=self.store)
+        history.system_prompt = "You are a helpful assistant"
+        history.add_user_message("Hello")
+        history.save()
+        history.add_ai_message("Hi there")
+        history.save()
+        self.assertFalse(history.is_dirty)
+        self.assertEqual(
+            [message["content"] for message in self.store.load("session")],
+            ["You are a helpful assistant", "Hello", "Hi there"],
+        )
+
+    def test_save_rewrites_modified_history(self):
+        history = MessageHistory(max_messages=2, session_id="session", store=self.store)
+        history.add_user_message("first")
+        history.add_user_message("second")
+        history.save()
+        history.add_user_message("third")
+        history.save()
+        self.assertEqual(
+            [message["content"] for message in self.store.load("session")],
+            ["first", "third"],
+        )
+
+    def test_max_messages_trims_without_rewrite(self):
+        history = MessageHistory(max_messages=3, session_id="session", store=self.store)
+        history.system_prompt = "system"
+        history.add_user_message("first")
+        history.add_ai_message("second")
+        history.save()
+        self.store.replace = None  # Trimming must not rewrite the session.
+
+        history.add_user_message("third")
+        history.add_ai_message("fourth")
+        history.save()
+
+        self.assertEqual(
+            [message["content"] for message in self.store.load("session")],
+            ["system", "third", "fourth"],
+        )
+        history.add_user_message("fifth")
+        history.save()
+        self.assertEqual(
+            self.store.load("session"),
+            MessageHistory(session_id="session", store=self.store).messages,
+        )
+        self.assertEqual(
+            [message["content"] for message in self.store.load("session")],
+            ["system", "fourth", "fifth"],
+        )
+
+    def test_trimming_unsaved_messages_rewrites(self):
+        history = MessageHistory(max_messages=2, session_id="session", store=self.store)
+        for content in ["first", "second", "third", "fourth"]:
+            history.add_user_message(content)
+        history.save()
+        self.assertEqual(
+            [message["content"] for message in self.store.load("session")],
+            ["first", "fourth"],
+        )
+
+    def test_missing_session_id(self):
+        with self.assertRaises(ValueError):
+            MessageHistory(store=self.store)
+
+
+class TestFileMessageStore(unittest.TestCase):
+    def test_roundtrip(self):
+        with tempfile.TemporaryDirectory() as directory:
+            store = FileMessageStore(directory)
+            history = MessageHistory(session_id="user/1", store=store)
+            history.add_user_message("Hello")
+            history.save()
+            history.replace_message("Hello again", "user", 0)
+            history.save()
+            self.assertEqual(
+                store.load("user/1"), [{"role": "user", "content": "Hello again"}]
+            )
+            store.append("user/1", [{"role": "user", "content": "Bye"}])
+            store.remove_range("user/1", 0, 1)
+            self.assertEqual(store.load("user/1"), [{"role": "user", "content": "Bye"}])
+            store.delete("user/1")
+            self.assertEqual(store.load("user/1"), [])
+
+
+class TestMessageHistoryCache(unittest.TestCase):
+    def test_eviction_saves_history(self):
+        store = SQLiteMessageStore(":memory:")
+        cache = MessageHistoryCache(store, max_sessions=1)
+        first = cache.get("first")
+        first.add_user_message("Hello")
+        self.assertIs(cache.get("first"), first)
+
+        cache.get("second")
+        self.assertEqual(len(cache), 1)
+        self.assertNotIn("first", cache)
+        self.assertEqual(store.load("first"), [{"role": "user", "content": "Hello"}])
+
+    def test_system_prompts_are_interned(self):
+        store = SQLiteMessageStore(":memory:")
+        prompt = "".join(["You are ", "a helpful assistant"])
+        for session_id in ["a", "b"]:
+            store.append(session_id, [{"role": "system", "content": prompt}])
+        cache = MessageHistoryCache(store)
+        self.assertIs(cache.get("a").system_prompt, cache.get("b").system_prompt)
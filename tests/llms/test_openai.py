@@ -81,3 +81,161 @@ class TestOpenAI(unittest.TestCase):
         self.assertEqual(config["model_name"], "test_model")
         self.assertEqual(config["temperature"], 0.7)
         self.assertEqual(config["max_tokens"], 500)
+
+
+class TestOpenAISingleFlight(unittest.TestCase):
+    def setUp(self):
+        self.calls = []
+
+        async def acreate(**kwargs):
+            self.calls.append(kwargs["prompt"])
+            await asyncio.sleep(0.01)
+            output = MagicMock()
+            output.choices = [{"text": f"answer to {kwargs['prompt']}"}]
+            return output
+
+        patcher = patch("openai.Completion.acreate", new=acreate)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def generate_all(self, llm, prompts):
+        return await asyncio.gather(*(llm.generate_async(p) for p in prompts))
+
+    def test_identical_requests_share_one_call(self):
+        llm = OpenAI(api_key="test_api_key", single_flight=True)
+
+        results = asyncio.run(self.generate_all(llm, ["a", "a", "b", "a"]))
+
+        self.assertEqual(sorted(self.calls), ["a", "b"])
+        self.assertEqual(
+            [text for text, _, _ in results],
+            ["answer to a", "answer to a", "answer to b", "answer to a"],
+        )
+        self.assertIsNot(results[0][1], results[1][1])
+        self.assertEqual(
+            [call_data.get("coalesced", False) for _, call_data, _ in results],
+            [False, True, False, True],
+        )
+
+    def test_different_parameters_are_not_shared(self):
+        hot = OpenAI(api_key="test_api_key", temperature=0.9, single_flight=True)
+        cold = OpenAI(api_key="test_api_key", temperature=0.0, single_flight=True)
+
+        async def generate():
+            return await asyncio.gather(
+                hot.generate_async("a"), cold.generate_async("a")
+            )
+
+        asyncio.run(generate())
+
+        self.assertEqual(self.calls, ["a", "a"])
+
+    def test_sequential_requests_are_not_shared(self):
+        llm = OpenAI(api_key="test_api_key", single_flight=True)
+
+        asyncio.run(llm.generate_async("a"))
+        asyncio.run(llm.generate_async("a"))
+
+        self.assertEqual(self.calls, ["a", "a"])
+
+    def test_disabled_by_default(self):
+        llm = OpenAI(api_key="test_api_key")
+
+        asyncio.run(self.generate_all(llm, ["a", "a"]))
+
+        self.assertEqual(self.calls, ["a", "a"])
+
+    def test_errors_are_shared(self):
+        async def failing_acreate(**kwargs):
+            self.calls.append(kwargs["prompt"])
+            await asyncio.sleep(0.01)
+            raise ValueError("invalid request")
+
+        llm = OpenAI(api_key="test_api_key", single_flight=True)
+
+        async def generate():
+            return await asyncio.gather(
+                llm.generate_async("a"),
+                llm.generate_async("a"),
+                return_exceptions=True,
+            )
+
+        with patch("openai.Completion.acreate", new=failing_acreate):
+            errors = asyncio.run(generate())
+
+        self.assertEqual(self.calls, ["a"])
+        self.assertTrue(all(isinstance(error, ValueError) for error in errors))
+
+
+class TestOpenAIMicroBatching(unittest.TestCase):
+    def setUp(self):
+        self.requests = []
+
+        async def acreate(**kwargs):
+            self.requests.append(kwargs)
+            await asyncio.sleep(0.01)
+            choices = [
+                {"index": i, "text": f"answer to {prompt}"}
+                for i, prompt in enumerate(kwargs["prompt"])
+            ]
+            return {"choices": choices[::-1], "usage": {"total_tokens": 10}}
+
+        patcher = patch("openai.Completion.acreate", new=acreate)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def generate_all(self, llm, prompts):
+        return await asyncio.gather(*(llm.generate_async(p) for p in prompts))
+
+    def test_concurrent_prompts_share_one_request(self):
+        llm = OpenAI(api_key="test_api_key", batch_size=10, batch_wait=0.05)
+
+        results = asyncio.run(self.generate_all(llm, ["a", "b", "c"]))
+
+        self.assertEqual(len(self.requests), 1)
+        self.assertEqual(self.requests[0]["prompt"], ["a", "b", "c"])
+        self.assertEqual(
+            [text for text, _, _ in results],
+            ["answer to a", "answer to b", "answer to c"],
+        )
+        self.assertEqual(results[0][1]["usage"], {"total_tokens": 10})
+        self.assertNotIn("usage", results[1][1])
+        self.assertEqual(results[1][1]["batch_size"], 3)
+
+    def test_full_batches_are_sent_immediately(self):
+        llm = OpenAI(api_key="test_api_key", batch_size=2, batch_wait=10)
+
+        results = asyncio.run(self.generate_all(llm, ["a", "b", "c", "d"]))
+
+        self.assertEqual(
+            [request["prompt"] for request in self.requests], [["a", "b"], ["c", "d"]]
+        )
+        self.assertEqual(results[3][0], "answer to d")
+
+    def test_single_flight_deduplicates_batch(self):
+        llm = OpenAI(
+            api_key="test_api_key", batch_size=10, batch_wait=0.01, single_flight=True
+        )
+
+        results = asyncio.run(self.generate_all(llm, ["a", "b", "a"]))
+
+        self.assertEqual(self.requests[0]["prompt"], ["a", "b"])
+        self.assertEqual(results[2][0], "answer to a")
+
+    def test_errors_are_raised_for_every_prompt(self):
+        async def failing_acreate(**kwargs):
+            raise ValueError("invalid request")
+
+        llm = OpenAI(api_key="test_api_key", batch_size=10)
+
+        async def generate():
+            return await asyncio.gather(
+                llm.generate_async("a"),
+                llm.generate_async("b"),
+                return_exceptions=True,
+            )
+
+        with patch("openai.Completion.acreate", new=failing_acreate):
+            errors = asyncio.run(generate())
+
+        self.assertTrue(all(isinstance(error, ValueError) for error in errors))
@@ -3,6 +3,7 @@
 import os
 import asyncio
 import unittest
+from concurrent.futures import ThreadPoolExecutor
 from unittest.mock import MagicMock, patch
 from llmflows.llms import OpenAIEmbeddings
 from llmflows.vectorstores.vector_doc import VectorDoc
@@ -65,3 +66,82 @@ class TestOpenAIEmbeddings(unittest.TestCase):
         # Assert that the method returned the expected output
         self.assertEqual(result_docs[0].embedding, "test_embedding_1")
         self.assertEqual(result_docs[1].embedding, "test_embedding_2")
+
+
+class TestOpenAIEmbeddingsSingleFlight(unittest.TestCase):
+    def test_identical_requests_share_one_call(self):
+        calls = []
+
+        async def acreate(**kwargs):
+            calls.append(kwargs["input"])
+            await asyncio.sleep(0.01)
+            return {"data": [{"embedding": [len(text)]} for text in kwargs["input"]]}
+
+        llm = OpenAIEmbeddings(api_key="test_key", single_flight=True)
+        docs = [VectorDoc(doc="query"), VectorDoc(doc="query"), VectorDoc(doc="another")]
+
+        async def generate():
+            return await asyncio.gather(*(llm.generate_async(doc) for doc in docs))
+
+        with patch("openai.Embedding.acreate", new=acreate):
+            results = asyncio.run(generate())
+
+        self.assertEqual(sorted(calls), [["another"], ["query"]])
+        self.assertEqual([doc.embedding for doc in results], [[5], [5], [7]])
+        self.assertEqual(results, docs)
+
+
+class TestOpenAIEmbeddingsBatching(unittest.TestCase):
+    def setUp(self):
+        self.requests = []
+
+        def create(**kwargs):
+            self.requests.append(kwargs["input"])
+            return {"data": [{"embedding": [len(text)]} for text in kwargs["input"]]}
+
+        async def acreate(**kwargs):
+            await asyncio.sleep(0.01)
+            return create(**kwargs)
+
+        for name, mock in (("create", create), ("acreate", acreate)):
+            patcher = patch(f"openai.Embedding.{name}", new=mock)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_concurrent_threads_share_one_request(self):
+        llm = OpenAIEmbeddings(api_key="test_key", batch_size=4, batch_wait=5)
+        docs = [VectorDoc(doc=text) for text in ["a", "bb", "a", "cccc"]]
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            results = list(executor.map(llm.generate, docs))
+
+        self.assertEqual(len(self.requests), 1)
+        self.assertEqual(sorted(self.requests[0]), ["a", "bb", "cccc"])
+        self.assertEqual([doc.embedding for doc in results], [[1], [2], [1], [4]])
+
+    def test_single_thread_is_sent_after_wait(self):
+        llm = OpenAIEmbeddings(api_key="test_key", batch_size=4, batch_wait=0.01)
+
+        doc = llm.generate(VectorDoc(doc="abc"))
+
+        self.assertEqual(self.requests, [["abc"]])
+        self.assertEqual(doc.embedding, [3])
+
+    def test_concurrent_async_requests_share_one_request(self):
+        llm = OpenAIEmbeddings(api_key="test_key", batch_size=10, batch_wait=0.05)
+        docs = [VectorDoc(doc=text) for text in ["a", "bb", "ccc"]]
+
+        async def generate():
+            return await asyncio.gather(*(llm.generate_async(doc) for doc in docs))
+
+        results = asyncio.run(generate())
+
+        self.assertEqual(self.requests, [["a", "bb", "ccc"]])
+        self.assertEqual([doc.embedding for doc in results], [[1], [2], [3]])
+
+    def test_lists_are_not_batched(self):
+        llm = OpenAIEmbeddings(api_key="test_key", batch_size=10, batch_wait=5)
+
+        llm.generate([VectorDoc(doc="a"), VectorDoc(doc="bb")])
+
+        self.assertEqual(self.requests, [["a", "bb"]])
@@ -0,0 +1,152 @@
+# pylint: skip-file
+
+import asyncio
+import unittest
+from llmflows.flows import Flow, AsyncFlow, FunctionalFlowStep
+from llmflows.flows.base_flowstep import BaseFlowStep
+from llmflows.flows.async_base_flowstep import AsyncBaseFlowStep
+from llmflows.metrics import MetricsRegistry, Histogram, set_registry
+
+
+def upper(text):
+    return text.upper()
+
+
+class LLMStep(BaseFlowStep):
+    def __init__(self, name, output_key, retries=0, coalesced=False):
+        super().__init__(name, output_key, None)
+        self.required_keys = {"text"}
+        self.retries = retries
+        self.coalesced = coalesced
+
+    def generate(self, inputs):
+        call_data = {
+            "raw_outputs": {"usage": {"prompt_tokens": 10, "completion_tokens": 5}},
+            "retries": self.retries,
+        }
+        if self.coalesced:
+            call_data["coalesced"] = True
+        return inputs["text"], call_data, {"model_name": "test-model"}
+
+
+class AsyncLLMStep(AsyncBaseFlowStep):
+    def __init__(self, name, output_key):
+        super().__init__(name, output_key, None)
+        self.required_keys = {"text"}
+
+    async def generate(self, inputs):
+        call_data = {
+            "raw_outputs": {"usage": {"prompt_tokens": 3, "completion_tokens": 2}},
+            "retries": 1,
+        }
+        return inputs["text"], call_data, {"model_name": "async-model"}
+
+
+class FailingStep(BaseFlowStep):
+    def __init__(self):
+        super().__init__("failing", "output", None)
+        self.required_keys = {"text"}
+
+    def generate(self, inputs):
+        raise RuntimeError("failed")
+
+
+class TestMetricsRegistry(unittest.TestCase):
+    def setUp(self):
+        self.registry = MetricsRegistry()
+        set_registry(self.registry)
+
+    def tearDown(self):
+        set_registry(None)
+
+    def test_disabled_metrics(self):
+        set_registry(None)
+        Flow(LLMStep("llm", "output")).start(text="hello")
+        self.assertEqual(self.registry.step_runs.snapshot(), {})
+
+    def test_step_metrics(self):
+        flow = Flow(LLMStep("llm", "output", retries=2))
+        flow.start(text="hello")
+        flow.start(text="hello")
+
+        labels = ("llm", "test-model")
+        self.assertEqual(self.registry.step_runs.get(labels), 2)
+        self.assertEqual(self.registry.prompt_tokens.get(labels), 20)
+        self.assertEqual(self.registry.completion_tokens.get(labels), 10)
+        self.assertEqual(self.registry.retries.get(labels), 4)
+        self.assertEqual(self.registry.step_latency.snapshot()[labels]["count"], 2)
+        self.assertEqual(self.registry.steps_in_flight.get(("llm",)), 0)
+        self.assertEqual(self.registry.flows_in_flight.get(("Flow",)), 0)
+        self.assertEqual(self.registry.flow_latency.snapshot()[("Flow",)]["count"], 2)
+
+    def test_coalesced_usage_is_counted_once(self):
+        first = LLMStep("llm", "output", retries=1)
+        first.connect(LLMStep("shared", "shared_output", retries=1, coalesced=True))
+        Flow(first).start(text="hello")
+
+        self.assertEqual(self.registry.prompt_tokens.get(("llm", "test-model")), 10)
+        self.assertEqual(self.registry.prompt_tokens.get(("shared", "test-model")), 0)
+        self.assertEqual(self.registry.retries.get(("shared", "test-model")), 0)
+        self.assertEqual(self.registry.step_runs.get(("shared", "test-model")), 1)
+
+    def test_functional_step_without_model(self):
+        Flow(FunctionalFlowStep("upper", upper, "upper_text")).start(text="hi")
+        self.assertEqual(self.registry.step_runs.get(("upper", "")), 1)
+        self.assertEqual(self.registry.prompt_tokens.snapshot(), {})
+
+    def test_async_step_metrics(self):
+        asyncio.run(AsyncFlow(AsyncLLMStep("llm", "output")).start(text="hello"))
+
+        labels = ("llm", "async-model")
+        self.assertEqual(self.registry.step_runs.get(labels), 1)
+        self.assertEqual(self.registry.prompt_tokens.get(labels), 3)
+        self.assertEqual(self.registry.retries.get(labels), 1)
+        self.assertEqual(self.registry.flows_in_flight.get(("AsyncFlow",)), 0)
+
+    def test_error_metrics(self):
+        with self.assertRaises(RuntimeError):
+            Flow(FailingStep()).start(text="hello")
+
+        self.assertEqual(self.registry.errors.get(("failing", "RuntimeError")), 1)
+        self.assertEqual(self.registry.steps_in_flight.get(("failing",)), 0)
+        self.assertEqual(self.registry.step_runs.snapshot(), {})
+
+    def test_histogram_buckets(self):
+        histogram = Histogram("latency", "Latency.", ("step",), buckets=(0.1, 1.0))
+        for value in [0.05, 0.1, 0.5, 2.0]:
+            histogram.observe(("a",), value)
+
+        state = histogram.snapshot()[("a",)]
+        self.assertEqual(state["buckets"], {0.1: 2, 1.0: 3, float("inf"): 4})
+        self.assertEqual(state["count"], 4)
+        self.assertAlmostEqual(state["sum"], 2.65)
+
+    def test_prometheus_export(self):
+        Flow(LLMStep("llm", "output", retries=1)).start(text="hello")
+        text = self.registry.to_prometheus()
+
+        self.assertIn("# TYPE llmflows_step_latency_seconds histogram", text)
+        self.assertIn(
+            'llmflows_step_latency_seconds_bucket{step="llm",model="test-model",'
+            'le="+Inf"} 1',
+            text,
+        )
+        self.assertIn(
+            'llmflows_prompt_tokens_total{step="llm",model="test-model"} 10', text
+        )
+        self.assertIn('llmflows_retries_total{step="llm",model="test-model"} 1', text)
+        self.assertTrue(text.endswith("\n"))
+
+    def test_snapshot_and_clear(self):
+        Flow(LLMStep("llm", "output")).start(text="hello")
+        snapshot = self.registry.snapshot()
+        self.assertEqual(
+            snapshot["llmflows_step_runs_total"], {("llm", "test-model"): 1}
+        )
+
+        self.registry.clear()
+        self.assertEqual(self.registry.step_runs.snapshot(), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -72,3 +72,45 @@ class TestPromptTemplate(unittest.TestCase):
         self.assertEqual(
             template.get_prompt(name1="John", name2="Jane"), "Hello, John and Jane!"
         )
+
+    def test_percent_sign_in_template(self):
+        template = PromptTemplate("{name} is 100% sure")
+        self.assertEqual(template.get_prompt(name="John"), "John is 100% sure")
+
+    def test_braces_in_values(self):
+        template = PromptTemplate("Hello, {name}!")
+        self.assertEqual(template.get_prompt(name="{John}"), "Hello, {John}!")
+
+        escaping_template = PromptTemplate("Hello, {name}!", escape_values=True)
+        self.assertEqual(
+            escaping_template.get_prompt(name="{John}"), "Hello, {{John}}!"
+        )
+
+    def test_format_spec_fallback(self):
+        template = PromptTemplate("Score: {score:.2f}")
+        self.assertEqual(template.get_prompt(score=0.5), "Score: 0.50")
+
+    def test_render_many(self):
+        template = PromptTemplate("Hello, {first_name} {last_name}!")
+        self.assertEqual(
+            template.render_many(
+                [
+                    {"first_name": "John", "last_name": "Doe"},
+                    {"first_name": "Jane", "last_name": "Roe"},
+                ]
+            ),
+            ["Hello, John Doe!", "Hello, Jane Roe!"],
+        )
+        with self.assertRaises(ValueError):
+            template.render_many([{"first_name": "John"}])
+
+    def test_render_columns(self):
+        template = PromptTemplate("Hello, {first_name} {last_name}!")
+        self.assertEqual(
+            template.render_columns(
+                {"last_name": ["Doe", "Roe"], "first_name": ["John", "Jane"]}
+            ),
+            ["Hello, John Doe!", "Hello, Jane Roe!"],
+        )
+        with self.assertRaises(ValueError):
+            template.render_columns({"first_name": ["John"], "last_name": []})
@@ -0,0 +1,41 @@
+# pylint: skip-file
+
+import sys
+import subprocess
+import unittest
+
+SDKS = ["openai", "anthropic", "google.generativeai", "pinecone"]
+
+
+def imported_sdks(code):
+    script = (
+        f"import sys\n{code}\nprint(','.join(m for m in {SDKS!r} if m in sys.modules))"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", script], capture_output=True, check=True, text=True
+    ).stdout
+    return [name for name in output.strip().split(",") if name]
+
+
+class TestLazyImports(unittest.TestCase):
+    def test_flows_do_not_import_sdks(self):
+        self.assertEqual(imported_sdks("from llmflows.flows import Flow, FlowStep"), [])
+
+    def test_packages_do_not_import_sdks(self):
+        code = "import llmflows.llms, llmflows.vectorstores, llmflows.prompts"
+        self.assertEqual(imported_sdks(code), [])
+
+    def test_provider_is_imported_on_access(self):
+        sdks = imported_sdks("from llmflows.llms import OpenAI")
+        self.assertIn("openai", sdks)
+        self.assertNotIn("anthropic", sdks)
+
+    def test_unknown_attribute(self):
+        import llmflows.llms
+
+        with self.assertRaises(AttributeError):
+            llmflows.llms.UnknownLLM
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+# pylint: skip-file
+
+import asyncio
+import unittest
+import unittest.mock
+from llmflows.flows import Flow, AsyncFlow, FunctionalFlowStep
+from llmflows.flows.async_base_flowstep import AsyncBaseFlowStep
+from llmflows.callbacks import FunctionalCallback
+from llmflows.llms.llm_utils import call_with_retry
+from llmflows.tracing import (
+    Tracer,
+    set_tracer,
+    start_span,
+    to_chrome_trace,
+    to_otlp_json,
+)
+
+
+def upper(text):
+    return text.upper()
+
+
+class TestTracer(unittest.TestCase):
+    def setUp(self):
+        self.tracer = Tracer()
+        set_tracer(self.tracer)
+
+    def tearDown(self):
+        set_tracer(None)
+
+    def test_disabled_tracing(self):
+        set_tracer(None)
+        with start_span("span") as span:
+            span.set_attribute("key", "value")
+        self.assertEqual(self.tracer.spans, [])
+
+    def test_flow_spans(self):
+        step = FunctionalFlowStep(
+            "upper", upper, "upper_text", callbacks=[FunctionalCallback()]
+        )
+        Flow(step).start(text="hello")
+
+        spans = {span.name: span for span in self.tracer.spans}
+        self.assertEqual(spans["Flow"].kind, "flow")
+        self.assertEqual(spans["upper"].parent_id, spans["Flow"].span_id)
+        self.assertEqual(spans["on_end"].parent_id, spans["upper"].span_id)
+        self.assertEqual(
+            {span.trace_id for span in self.tracer.spans}, {spans["Flow"].trace_id}
+        )
+
+    def test_retry_spans(self):
+        attempts = []
+
+        def flaky():
+            attempts.append(1)
+            if len(attempts) == 1:
+                raise ValueError("fail")
+            return "ok"
+
+        with unittest.mock.patch("time.sleep"):
+            call_with_retry(flaky, (ValueError,), 2)
+
+        kinds = [span.name for span in self.tracer.spans]
+        self.assertEqual(kinds, ["request_attempt", "retry_backoff", "request_attempt"])
+        self.assertIsNotNone(self.tracer.spans[0].error)
+
+    def test_async_flow_spans_and_export(self):
+        class EchoStep(AsyncBaseFlowStep):
+            required_keys = {"text"}
+
+            async def generate(self, inputs):
+                await asyncio.sleep(0.01)
+                return inputs["text"], None, None
+
+        first = EchoStep("first", "a", None)
+        first.connect(EchoStep("second", "b", None), EchoStep("third", "c", None))
+        asyncio.run(AsyncFlow(first).start(text="hi"))
+
+        chrome_trace = to_chrome_trace(self.tracer.spans)
+        events = {event["name"]: event for event in chrome_trace["traceEvents"]}
+        self.assertEqual(events["second"]["ph"], "X")
+        self.assertNotEqual(events["second"]["tid"], events["third"]["tid"])
+
+        otlp = to_otlp_json(self.tracer.spans)
+        otlp_spans = otlp["resourceSpans"][0]["scopeSpans"][0]["spans"]
+        self.assertEqual(len(otlp_spans), 4)
+        self.assertTrue(all("traceId" in span for span in otlp_spans))
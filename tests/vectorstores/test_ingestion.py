@@ -0,0 +1,255 @@
+# pylint: skip-file
+
+import os
+import time
+import asyncio
+import tempfile
+import unittest
+from llmflows.llms.compaction import approximate_token_count
+from llmflows.llms.embeddings import BaseEmbeddings
+from llmflows.vectorstores import (
+    VectorDoc,
+    TokenChunker,
+    IngestionPipeline,
+    read_text_files,
+)
+from llmflows.vectorstores.vector_store import VectorStore
+
+
+class FakeEmbeddings(BaseEmbeddings):
+    def __init__(self, delay=0.0, fail_on=None):
+        super().__init__("fake")
+        self.delay = delay
+        self.fail_on = fail_on
+        self.batches = []
+
+    def generate(self, docs):
+        self.batches.append(len(docs))
+        for doc in docs:
+            if doc.doc == self.fail_on:
+                raise ValueError("invalid input")
+            doc.embedding = [len(doc.doc)]
+        time.sleep(self.delay)
+        return docs
+
+    async def generate_async(self, docs):
+        await asyncio.sleep(self.delay)
+        return self.generate(docs)
+
+
+class FakeVectorStore(VectorStore):
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.docs = {}
+        self.batches = []
+
+    def describe(self):
+        return {}
+
+    def search(self, query, top_k):
+        return []
+
+    def upsert(self, docs):
+        time.sleep(self.delay)
+        self.batches.append(len(docs))
+        for doc in docs:
+            self.docs[doc.doc_id] = doc.embedding
+
+    async def upsert_async(self, docs):
+        await asyncio.sleep(self.delay)
+        self.upsert(docs)
+
+
+def make_docs(count, words=10):
+    for i in range(count):
+        yield VectorDoc(doc=" ".join(f"w{i}x{j}" for j in range(words)), doc_id=str(i))
+
+
+def count_words(text):
+    return len(text.split())
+
+
+class TestTokenChunker(unittest.TestCase):
+    def test_chunks_with_overlap(self):
+        chunker = TokenChunker(max_tokens=4, overlap=1, token_counter=count_words)
+        doc = VectorDoc(doc="a b c d e f g", doc_id="doc", metadata={"lang": "en"})
+
+        chunks = list(chunker.chunk(doc))
+
+        self.assertEqual([chunk.doc for chunk in chunks], ["a b c d", "d e f g"])
+        self.assertEqual([chunk.doc_id for chunk in chunks], ["doc-0", "doc-1"])
+        self.assertEqual(
+            chunks[1].metadata, {"lang": "en", "parent_id": "doc", "chunk": 1}
+        )
+
+    def test_long_word_gets_its_own_chunk(self):
+        chunker = TokenChunker(max_tokens=3, overlap=1, token_counter=len)
+
+        chunks = [chunk.doc for chunk in chunker.chunk(VectorDoc(doc="a bcdef g"))]
+
+        self.assertEqual(chunks, ["a", "bcdef", "g"])
+
+    def test_counts_joined_text(self):
+        chunker = TokenChunker(max_tokens=500, overlap=50)
+        doc = VectorDoc(doc=" ".join(f"word{i % 10}" for i in range(2000)))
+
+        chunks = [chunk.doc for chunk in chunker.chunk(doc)]
+
+        for text in chunks:
+            self.assertLessEqual(approximate_token_count(text), 500)
+        for text in chunks[:-1]:
+            self.assertGreater(approximate_token_count(text), 490)
+
+    def test_chunk_stream_joins_words_across_blocks(self):
+        chunker = TokenChunker(max_tokens=2, overlap=0, token_counter=count_words)
+
+        chunks = list(chunker.chunk_stream(["a b", "c d ", " e"], doc_id="doc"))
+
+        self.assertEqual([chunk.doc for chunk in chunks], ["a bc", "d e"])
+        self.assertEqual(chunks[1].metadata, {"parent_id": "doc", "chunk": 1})
+
+    def test_invalid_overlap(self):
+        with self.assertRaises(ValueError):
+            TokenChunker(max_tokens=10, overlap=10)
+
+
+class TestReadTextFiles(unittest.TestCase):
+    def test_reads_directories(self):
+        with tempfile.TemporaryDirectory() as directory:
+            os.makedirs(os.path.join(directory, "sub"))
+            for name, text in (("a.txt", "first"), ("sub/b.txt", "second")):
+                with open(os.path.join(directory, name), "w") as file:
+                    file.write(text)
+
+            docs = list(read_text_files([directory]))
+
+        self.assertEqual(sorted(doc.doc for doc in docs), ["first", "second"])
+        self.assertTrue(all(doc.metadata["source"] for doc in docs))
+
+    def test_streams_files_into_chunker(self):
+        chunker = TokenChunker(max_tokens=3, overlap=1, token_counter=count_words)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "a.txt")
+            with open(path, "w") as file:
+                file.write("one two\nthree four five")
+
+            docs = list(read_text_files([path], chunker=chunker, block_size=4))
+
+        self.assertEqual(
+            [doc.doc for doc in docs], ["one two three", "three four five"]
+        )
+        self.assertEqual(docs[0].metadata["source"], path)
+        self.assertEqual(docs[0].metadata["parent_id"], docs[1].metadata["parent_id"])
+
+
+class TestIngestionPipeline(unittest.TestCase):
+    def test_run(self):
+        embeddings = FakeEmbeddings()
+        store = FakeVectorStore()
+        updates = []
+        pipeline = IngestionPipeline(
+            embeddings,
+            store,
+            chunker=TokenChunker(max_tokens=5, overlap=0, token_counter=count_words),
+            embed_batch_size=3,
+            upsert_batch_size=4,
+            on_progress=lambda progress: updates.append(progress.upserted),
+        )
+
+        progress = pipeline.run(make_docs(5))
+
+        self.assertEqual(progress.docs, 5)
+        self.assertEqual(progress.chunks, 10)
+        self.assertEqual(progress.upserted, 10)
+        self.assertEqual(embeddings.batches, [3, 3, 3, 1])
+        self.assertEqual(store.batches, [4, 4, 2])
+        self.assertEqual(updates, [4, 8, 10])
+        self.assertIn("0-1", store.docs)
+        self.assertGreater(progress.throughput, 0)
+
+    def test_stages_overlap(self):
+        pipeline = IngestionPipeline(
+            FakeEmbeddings(delay=0.05),
+            FakeVectorStore(delay=0.05),
+            embed_batch_size=1,
+            upsert_batch_size=1,
+        )
+
+        start = time.perf_counter()
+        pipeline.run(make_docs(10))
+        elapsed = time.perf_counter() - start
+
+        # Sequential stages would take 10 * (0.05 + 0.05) seconds.
+        self.assertLess(elapsed, 0.85)
+
+    def test_source_is_read_lazily(self):
+        read = []
+
+        def docs():
+            for doc in make_docs(100):
+                read.append(doc.doc_id)
+                yield doc
+
+        store = FakeVectorStore(delay=0.01)
+        in_flight = []
+
+        def on_progress(progress):
+            in_flight.append(len(read) - progress.upserted)
+
+        pipeline = IngestionPipeline(
+            FakeEmbeddings(),
+            store,
+            embed_batch_size=1,
+            upsert_batch_size=1,
+            queue_size=2,
+            on_progress=on_progress,
+        )
+        pipeline.run(docs())
+
+        self.assertEqual(len(store.docs), 100)
+        self.assertLessEqual(max(in_flight), 8)
+
+    def test_errors_stop_the_pipeline(self):
+        store = FakeVectorStore()
+        pipeline = IngestionPipeline(
+            FakeEmbeddings(fail_on="fail"),
+            store,
+            embed_batch_size=1,
+            upsert_batch_size=1,
+        )
+        docs = [VectorDoc(doc="ok"), VectorDoc(doc="fail"), VectorDoc(doc="ok")]
+
+        with self.assertRaises(ValueError):
+            pipeline.run(iter(docs))
+        self.assertLessEqual(len(store.docs), 1)
+
+    def test_run_async(self):
+        async def docs():
+            for doc in make_docs(5):
+                yield doc
+
+        store = FakeVectorStore(delay=0.01)
+        pipeline = IngestionPipeline(
+            FakeEmbeddings(delay=0.01),
+            store,
+            embed_batch_size=2,
+            upsert_batch_size=3,
+        )
+
+        progress = asyncio.run(pipeline.run_async(docs()))
+
+        self.assertEqual(progress.upserted, 5)
+        self.assertEqual(store.batches, [3, 2])
+        self.assertEqual(store.docs["4"], [len(" ".join(f"w4x{j}" for j in range(10)))])
+
+    def test_run_async_errors(self):
+        pipeline = IngestionPipeline(
+            FakeEmbeddings(fail_on="fail"), FakeVectorStore(), embed_batch_size=1
+        )
+
+        with self.assertRaises(ValueError):
+            asyncio.run(pipeline.run_async([VectorDoc(doc="fail")]))
+
+
+if __name__ == "__main__":
+    unittest.main()